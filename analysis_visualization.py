@@ -1,16 +1,57 @@
 import json
-import matplotlib.pyplot as plt
+import argparse
 import numpy as np
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 import sys
+from results_store import ResultStoreReader
+from metrics_table import (build_table, group_stats, improvement,
+                           improvement_matrix, ratios, field_index,
+                           METRIC_FIELDS, METRIC_LABELS)
+from chart_renderer import (ChartJob, ChartPipeline, config_colors,
+                            render_comparison, render_metric, render_config,
+                            render_latency_cdf, render_host_series,
+                            render_host_timeline, render_density)
+from tracing import Tracer, NULL_TRACER, format_timings
+from density import saturation_points, format_density, CPU_SATURATION
+
+def _disk_direction(m: Dict, operation: str) -> Dict:
+    # Con --disk-trace las latencias por dirección están en disk_io.replay
+    disk_io = m.get('disk_io', {})
+    return disk_io.get(operation) or disk_io.get('replay', {}).get(operation, {})
+
+
+LATENCY_SOURCES = [
+    ('Lectura de disco', lambda m: _disk_direction(m, 'read')),
+    ('Escritura de disco', lambda m: _disk_direction(m, 'write')),
+    ('Red', lambda m: m.get('network', {})),
+]
 
 class VirtualizationAnalyzer:
-    def __init__(self, results_file: str = "results.json"):
+    def __init__(self, results_file: str = "results.json",
+                 store_dir: str = None, run_id: int = None,
+                 baseline: str = None, chart_dir: str = ".",
+                 render_workers: int = 0, dpi: int = 150,
+                 tracer: Tracer = NULL_TRACER, all_runs: bool = False):
+        self.tracer = tracer
+        self.all_runs = all_runs
         self.results_file = results_file
+        self.baseline = baseline
+        self.chart_dir = chart_dir
+        self.render_workers = render_workers
+        self.dpi = dpi
+        self._table = None
+        self._stats = None
+        self.store_dir = store_dir
+        self.run_id = run_id
+        self.store = None
         self.data = None
-        self.load_results()
+        with self.tracer.span('load_results', 'analyzer'):
+            self.load_results()
     
     def load_results(self):
+        if self.store_dir:
+            self.load_store()
+            return
         try:
             with open(self.results_file, 'r') as f:
                 self.data = json.load(f)
@@ -22,206 +63,455 @@ class VirtualizationAnalyzer:
             print(f"[ERROR] Formato JSON inválido en {self.results_file}")
             sys.exit(1)
     
-    def create_comparison_charts(self):
-        if not self.data or 'metrics' not in self.data:
-            print("[ERROR] Datos no disponibles para visualización")
-            return
-        
-        metrics = self.data['metrics']
-        if len(metrics) < 2:
-            print("[ERROR] Se necesitan al menos 2 conjuntos de métricas")
+    def load_store(self):
+        """Abre el store con mmap; solo decodifica la ejecución pedida (por
+        defecto la última completada)."""
+        self.store = ResultStoreReader(self.store_dir)
+        if self.store.truncated:
+            print(f"[WARN] Último registro de {self.store_dir} incompleto, se ignora")
+        run_id = self.run_id
+        if run_id is None:
+            run_id = self.store.latest_run('completed')
+            if run_id is None:
+                print(f"[WARN] Ninguna ejecución completada en {self.store_dir}; "
+                      f"se usa la última")
+        self.data = self.store.results(run_id)
+        if self.data is None:
+            print(f"[ERROR] No hay ejecuciones en {self.store_dir}")
+            sys.exit(1)
+        print(f"[OK] Ejecución {self.data['run_id']} ({self.data['status']}) "
+              f"cargada desde {self.store_dir}")
+    
+    def history(self) -> Iterator[Tuple[int, List[Dict]]]:
+        """Métricas escalares de cada ejecución del store, una a una."""
+        if self.store is None:
+            yield 0, self.data.get('metrics', []) if self.data else []
             return
-        
-        virtio = metrics[0]
-        emulated = metrics[1]
-        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
-        fig.suptitle('Comparación Virtio vs Dispositivos Emulados', 
-                     fontsize=16, fontweight='bold')
-        ax1 = axes[0, 0]
-        categories = ['Virtio', 'Emulado']
-        boot_times = [virtio['boot_time'], emulated['boot_time']]
-        bars1 = ax1.bar(categories, boot_times, color=['#2ecc71', '#e74c3c'])
-        ax1.set_ylabel('Segundos')
-        ax1.set_title('Tiempo de Arranque')
-        ax1.grid(axis='y', alpha=0.3)
-        for bar in bars1:
-            height = bar.get_height()
-            ax1.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{height:.2f}s',
-                    ha='center', va='bottom')
-        ax2 = axes[0, 1]
-        read_speeds = [virtio['disk_read_speed'], emulated['disk_read_speed']]
-        bars2 = ax2.bar(categories, read_speeds, color=['#2ecc71', '#e74c3c'])
-        ax2.set_ylabel('MB/s')
-        ax2.set_title('Velocidad de Lectura de Disco')
-        ax2.grid(axis='y', alpha=0.3)
-        for bar in bars2:
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{height:.1f}',
-                    ha='center', va='bottom')
-
-        ax3 = axes[0, 2]
-        write_speeds = [virtio['disk_write_speed'], emulated['disk_write_speed']]
-        bars3 = ax3.bar(categories, write_speeds, color=['#2ecc71', '#e74c3c'])
-        ax3.set_ylabel('MB/s')
-        ax3.set_title('Velocidad de Escritura de Disco')
-        ax3.grid(axis='y', alpha=0.3)
-        for bar in bars3:
-            height = bar.get_height()
-            ax3.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{height:.1f}',
-                    ha='center', va='bottom')
-
-        ax4 = axes[1, 0]
-        net_throughput = [virtio['network_throughput'], 
-                         emulated['network_throughput']]
-        bars4 = ax4.bar(categories, net_throughput, color=['#2ecc71', '#e74c3c'])
-        ax4.set_ylabel('Mbps')
-        ax4.set_title('Throughput de Red')
-        ax4.grid(axis='y', alpha=0.3)
-        for bar in bars4:
-            height = bar.get_height()
-            ax4.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{height:.0f}',
-                    ha='center', va='bottom')
-  
-        ax5 = axes[1, 1]
-        cpu_overhead = [virtio['cpu_overhead'], emulated['cpu_overhead']]
-        bars5 = ax5.bar(categories, cpu_overhead, color=['#2ecc71', '#e74c3c'])
-        ax5.set_ylabel('Porcentaje (%)')
-        ax5.set_title('Overhead de CPU')
-        ax5.grid(axis='y', alpha=0.3)
-        for bar in bars5:
-            height = bar.get_height()
-            ax5.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{height:.1f}%',
-                    ha='center', va='bottom')
+        for run_id in self.store.runs():
+            yield run_id, self.store.summaries(run_id)
+    
+    def host_series(self) -> Dict[str, Dict]:
+        """Series del host de la ejecución cargada, como vistas sobre el mmap."""
+        if self.store is None or not self.data:
+            return {}
+        return {m['config_name']: self.store.series(m['host_series'])
+                for m in self.data['metrics'] if m.get('host_series')}
+    
+    def table(self) -> np.ndarray:
+        """Filas (ejecución × configuración) como array estructurado.
 
-        ax6 = axes[1, 2]
-        improvements = {
-            'Arranque': ((emulated['boot_time'] - virtio['boot_time']) / 
-                        emulated['boot_time'] * 100),
-            'Lectura': ((virtio['disk_read_speed'] - emulated['disk_read_speed']) / 
-                       emulated['disk_read_speed'] * 100),
-            'Escritura': ((virtio['disk_write_speed'] - emulated['disk_write_speed']) / 
-                         emulated['disk_write_speed'] * 100),
-            'Red': ((virtio['network_throughput'] - emulated['network_throughput']) / 
-                   emulated['network_throughput'] * 100),
-            'CPU': ((emulated['cpu_overhead'] - virtio['cpu_overhead']) / 
-                   emulated['cpu_overhead'] * 100)
-        }
+        Con store, las de la ejecución cargada (la misma que usan los demás
+        gráficos) o, con ``all_runs``, las de todas las ejecuciones; sin
+        store, las métricas del JSON.
+        """
+        if self._table is not None:
+            return self._table
+        if self.store is not None:
+            run_ids = self.store.runs() if self.all_runs else [self.data['run_id']]
+            rows, owners = [], []
+            for run_id in run_ids:
+                summaries = self.store.summaries(run_id)
+                rows.extend(summaries)
+                owners.extend([run_id] * len(summaries))
+            self._table = build_table(rows, owners)
+        else:
+            self._table = build_table(self.data.get('metrics', []) if self.data else [])
+        return self._table
+    
+    def group_summary(self, key: str = 'config_name') -> Dict:
+        if self._stats is None or self._stats.get('key') != key:
+            self._stats = group_stats(self.table(), key)
+            self._stats['key'] = key
+        return self._stats
+    
+    def baseline_index(self, stats: Dict) -> int:
+        """Referencia: ``baseline`` si se indicó; si no, la primera
+        configuración con disco emulado (o la primera)."""
+        keys = list(stats['keys'])
+        if self.baseline is not None:
+            if self.baseline not in keys:
+                raise ValueError(f"Configuración de referencia desconocida: {self.baseline}")
+            return keys.index(self.baseline)
+        if stats.get('key') == 'config_name':
+            table = self.table()
+            for i, name in enumerate(keys):
+                disk_types = table['disk_type'][table['config_name'] == name]
+                if len(disk_types) and disk_types[0] != 'virtio':
+                    return i
+        return 0
+    
+    def host_scoped_fields(self) -> List[str]:
+        """Métricas medidas en el host igual para todas las interfaces: su
+        diferencia no es una mejora del dispositivo virtual."""
+        metrics = (self.data or {}).get('metrics', [])
+        if any(m.get('disk_scope') == 'host' for m in metrics):
+            return [f for f in METRIC_FIELDS if f.startswith('disk_')]
+        return []
+    
+    def gains(self, values: np.ndarray, base: int, fields: List[str]) -> np.ndarray:
+        """``improvement()`` sin las métricas de ``host_scoped_fields()``
+        (quedan como NaN)."""
+        gains = improvement(values, base, fields)
+        scoped = self.host_scoped_fields()
+        for j, field in enumerate(fields):
+            if field in scoped:
+                gains[:, j] = np.nan
+        return gains
+    
+    def _charts(self, jobs: List[ChartJob]):
+        pipeline = ChartPipeline(self.chart_dir, self.render_workers)
+        for job in jobs:
+            pipeline.add(job)
+        with self.tracer.span('render_charts', 'analyzer', jobs=len(pipeline.jobs)) as span:
+            result = pipeline.run()
+            span.finish(rendered=len(result['rendered']), cached=len(result['cached']))
+        # Cada gráfico se dibuja en su proceso: se añade a la traza con el
+        # pid de quien lo renderizó
+        self.tracer.merge([{'name': output, 'cat': 'chart', 'ph': 'X',
+                            'ts': round(t['start'] * 1e6, 3),
+                            'dur': round((t['end'] - t['start']) * 1e6, 3),
+                            'pid': t['pid'], 'tid': t['pid']}
+                           for output, t in result['timings'].items()], "render")
+        return result
+    
+    def comparison_job(self) -> Optional[ChartJob]:
+        stats = self.group_summary()
+        keys = [str(k) for k in stats['keys']]
+        if len(keys) < 2:
+            print("[ERROR] Se necesitan al menos 2 configuraciones")
+            return None
         
-        imp_categories = list(improvements.keys())
-        imp_values = list(improvements.values())
-        colors = ['#27ae60' if v > 0 else '#e67e22' for v in imp_values]
-        bars6 = ax6.barh(imp_categories, imp_values, color=colors)
-        ax6.set_xlabel('Mejora (%)')
-        ax6.set_title('Mejora de Virtio sobre Emulado')
-        ax6.axvline(x=0, color='black', linestyle='-', linewidth=0.5)
-        ax6.grid(axis='x', alpha=0.3)
-        for i, bar in enumerate(bars6):
-            width = bar.get_width()
-            ax6.text(width, bar.get_y() + bar.get_height()/2.,
-                    f'{width:.1f}%',
-                    ha='left' if width > 0 else 'right',
-                    va='center', fontsize=9)
+        base = self.baseline_index(stats)
+        repeated = bool((stats['count'] > 1).any())
+        panels = [('boot_time', 'Segundos', 'Tiempo de Arranque', '{:.2f}s'),
+                  ('disk_read_speed', 'MB/s', 'Velocidad de Lectura de Disco', '{:.1f}'),
+                  ('disk_write_speed', 'MB/s', 'Velocidad de Escritura de Disco', '{:.1f}'),
+                  ('network_throughput', 'Mbps', 'Throughput de Red', '{:.0f}'),
+                  ('cpu_overhead', 'Porcentaje (%)', 'Overhead de CPU', '{:.1f}%')]
+        fields = [p[0] for p in panels]
+        columns = [field_index(stats, f) for f in fields]
+        gains = self.gains(stats['mean'][:, columns], base, fields)
+        data = {
+            'keys': keys, 'baseline': keys[base],
+            'colors': config_colors(keys, base),
+            'panels': [{'ylabel': ylabel, 'title': title, 'fmt': fmt,
+                        'means': stats['mean'][:, j].tolist(),
+                        'errors': stats['std'][:, j].tolist() if repeated else None}
+                       for (field, ylabel, title, fmt), j in zip(panels, columns)],
+            'gain_labels': ['Arranque', 'Lectura', 'Escritura', 'Red', 'CPU'],
+            'gains': {keys[i]: gains[i].tolist() for i in range(len(keys)) if i != base},
+        }
+        return ChartJob('virtualization_comparison.png', render_comparison, data,
+                        self.dpi)
+    
+    def metric_jobs(self) -> List[ChartJob]:
+        """Un gráfico por métrica con todas las configuraciones."""
+        stats = self.group_summary()
+        keys = [str(k) for k in stats['keys']]
+        if not keys:
+            return []
+        colors = config_colors(keys, self.baseline_index(stats))
+        jobs = []
+        for j, field in enumerate(stats['fields']):
+            if not stats['count'][:, j].any():
+                continue
+            title, unit = METRIC_LABELS.get(field, (field, ''))
+            repeated = bool((stats['count'][:, j] > 1).any())
+            jobs.append(ChartJob(f'metric_{field}.png', render_metric, {
+                'title': title, 'unit': unit, 'keys': keys, 'colors': colors,
+                'means': stats['mean'][:, j].tolist(),
+                'errors': stats['std'][:, j].tolist() if repeated else None,
+                'p99': stats['p99'][:, j].tolist() if repeated else None,
+            }, self.dpi))
+        return jobs
+    
+    def config_jobs(self) -> List[ChartJob]:
+        """Un gráfico por configuración frente a la de referencia."""
+        stats = self.group_summary()
+        keys = [str(k) for k in stats['keys']]
+        if len(keys) < 2:
+            return []
+        base = self.baseline_index(stats)
+        gains = self.gains(stats['mean'], base, stats['fields'])
+        labels = [METRIC_LABELS.get(f, (f, ''))[0] for f in stats['fields']]
+        latest = {m.get('config_name'): m for m in (self.data or {}).get('metrics', [])}
+        jobs = []
+        for i, name in enumerate(keys):
+            if i == base:
+                continue
+            histograms = {title: getter(latest[name]).get('latency_histogram')
+                          for title, getter in LATENCY_SOURCES
+                          if name in latest and getter(latest[name]).get('latency_histogram')}
+            jobs.append(ChartJob(f'config_{name}.png', render_config, {
+                'config': name, 'baseline': keys[base], 'labels': labels,
+                'gains': gains[i].tolist(), 'histograms': histograms,
+            }, self.dpi))
+        return jobs
+    
+    def latency_cdf_job(self) -> Optional[ChartJob]:
+        if not self.data or 'metrics' not in self.data:
+            print("[ERROR] Datos no disponibles para visualización")
+            return None
         
-        plt.tight_layout()
-        plt.savefig('virtualization_comparison.png', dpi=300, bbox_inches='tight')
-        print("[OK] Gráficos guardados en 'virtualization_comparison.png'")
-        plt.show()
+        metrics = self.data['metrics']
+        panels = []
+        for title, getter in LATENCY_SOURCES:
+            histograms = {m['config_name']: getter(m)['latency_histogram']
+                          for m in metrics if getter(m).get('latency_histogram')}
+            if histograms:
+                panels.append({'title': title, 'histograms': histograms})
+        if not panels:
+            print("[WARN] No hay histogramas de latencia en los resultados")
+            return None
+        names = [m['config_name'] for m in metrics]
+        colors = dict(zip(names, config_colors(names, -1)))
+        return ChartJob('latency_cdf.png', render_latency_cdf,
+                        {'panels': panels, 'colors': colors}, self.dpi)
+    
+    def host_series_job(self, series_by_config: Dict[str, Dict],
+                        output: str = 'host_series.png') -> Optional[ChartJob]:
+        if not series_by_config:
+            print("[WARN] No hay series de muestreo del host")
+            return None
+        panels = [('cpu_total', 'CPU (%)'),
+                  ('interrupts_per_s', 'Interrupciones/s'),
+                  ('disk_write_bytes_per_s', 'Escritura disco (B/s)'),
+                  ('net_rx_bytes_per_s', 'Red RX (B/s)')]
+        keys = ['timestamp'] + [key for key, _ in panels]
+        series = {name: {key: np.asarray(columns[key]) for key in keys}
+                  for name, columns in series_by_config.items()}
+        return ChartJob(output, render_host_series,
+                        {'panels': panels, 'series': series}, self.dpi)
+    
+    def host_timeline_job(self) -> Optional[ChartJob]:
+        """Series de CPU por fase guardadas en las métricas (``host_timeline``)."""
+        timelines = {m['config_name']: m['host_timeline']
+                     for m in (self.data or {}).get('metrics', [])
+                     if m.get('host_timeline')}
+        if not timelines:
+            return None
+        names = list(timelines)
+        return ChartJob('host_timeline.png', render_host_timeline, {
+            'configs': timelines,
+            'colors': dict(zip(names, config_colors(names, -1)))}, self.dpi)
+    
+    def density_results(self) -> Dict:
+        """Resultados de ``--density``: del JSON o, con store, de las fases
+        ``density`` de la ejecución cargada."""
+        if not self.data:
+            return {}
+        if self.data.get('density'):
+            return self.data['density']
+        if self.store is None:
+            return {}
+        configs = {}
+        for phase in self.store.phases(self.data['run_id']):
+            if phase['phase'] == 'density':
+                configs.setdefault(phase['config'], {'steps': []})['steps'].append(
+                    phase['data'])
+        for config in configs.values():
+            config['saturation'] = saturation_points(config['steps'])
+        if not configs:
+            return {}
+        return {'max_instances': max(s['instances'] for c in configs.values()
+                                     for s in c['steps']),
+                'configs': configs}
+    
+    def density_job(self) -> Optional[ChartJob]:
+        density = self.density_results()
+        if not density.get('configs'):
+            return None
+        panels = [{'key': 'disk_read_mb_s', 'per_vm': 'vm_disk_read_mb_s',
+                   'title': 'Lectura de disco (agregada y por VM)', 'unit': 'MB/s'},
+                  {'key': 'disk_write_mb_s', 'per_vm': 'vm_disk_write_mb_s',
+                   'title': 'Escritura de disco (agregada y por VM)', 'unit': 'MB/s'},
+                  {'key': 'network_mbps', 'per_vm': 'vm_network_mbps',
+                   'title': 'Throughput de red (agregado y por VM)', 'unit': 'Mbps'},
+                  {'key': 'host_cpu', 'title': 'CPU del host', 'unit': '%',
+                   'limit': CPU_SATURATION}]
+        configs = {}
+        for name, result in density['configs'].items():
+            steps = result['steps']
+            if not steps:
+                continue
+            series = {'instances': [s['instances'] for s in steps],
+                      'host_cpu': [s['host_cpu'] for s in steps],
+                      'saturation': result['saturation']}
+            for key in ('disk_read_mb_s', 'disk_write_mb_s', 'network_mbps'):
+                series[key] = [s['aggregate'].get(key, 0) for s in steps]
+                series[f'vm_{key}'] = [s['per_vm_mean'].get(key, 0) for s in steps]
+            configs[name] = series
+        names = list(configs)
+        return ChartJob('density_scaling.png', render_density, {
+            'panels': panels, 'configs': configs,
+            'colors': dict(zip(names, config_colors(names, -1))),
+            'max_instances': density['max_instances']}, self.dpi)
+    
+    def create_comparison_charts(self):
+        self._charts([self.comparison_job()])
+    
+    def create_latency_cdf_charts(self):
+        self._charts([self.latency_cdf_job()])
+    
+    def create_host_series_charts(self, series_by_config: Dict[str, Dict],
+                                  output: str = 'host_series.png'):
+        """Grafica series de HostSampler.series() o del store."""
+        self._charts([self.host_series_job(series_by_config, output)])
+    
+    def render_all(self) -> Dict[str, List[str]]:
+        """Todos los gráficos en una sola pasada del pipeline (en paralelo)."""
+        jobs = []
+        with self.tracer.span('build_chart_jobs', 'analyzer'):
+            if (self.data or {}).get('metrics'):
+                jobs = [self.comparison_job(), self.latency_cdf_job()]
+                jobs += self.metric_jobs() + self.config_jobs()
+                jobs.append(self.host_timeline_job())
+                if self.store is not None:
+                    jobs.append(self.host_series_job(self.host_series()))
+            jobs.append(self.density_job())
+        return self._charts(jobs)
     
     def generate_detailed_report(self):
-        if not self.data or 'metrics' not in self.data:
-            print("[ERROR] Datos no disponibles")
+        with self.tracer.span('detailed_report', 'analyzer'):
+            self._detailed_report()
+    
+    def _detailed_report(self):
+        stats = self.group_summary()
+        keys = [str(k) for k in stats['keys']]
+        density = self.density_results()
+        if len(keys) < 2:
+            if density.get('configs'):
+                self._save_report(format_density(density))
+            else:
+                print("[ERROR] Datos no disponibles")
             return
         
-        metrics = self.data['metrics']
-        virtio = metrics[0]
-        emulated = metrics[1]
+        base = self.baseline_index(stats)
+        others = [i for i in range(len(keys)) if i != base]
+        mean = stats['mean']
+        gains = self.gains(mean, base, stats['fields'])
+        host_disk = 'disk_read_speed' in self.host_scoped_fields()
+        ratio = ratios(mean, base)
+        col = {f: field_index(stats, f) for f in stats['fields']}
         
         report = []
         report.append("\n" + "="*80)
         report.append("ANÁLISIS DETALLADO: VIRTUALIZACIÓN DE E/S")
         report.append("="*80 + "\n")
+        report.append(f"   Configuraciones: {len(keys)}, filas: {len(self.table())}, "
+                      f"referencia: {keys[base]}\n")
         
         report.append("1. ANÁLISIS DE RENDIMIENTO DE DISCO")
         report.append("-" * 80)
-        
-        read_ratio = virtio['disk_read_speed'] / emulated['disk_read_speed']
-        write_ratio = virtio['disk_write_speed'] / emulated['disk_write_speed']
-        
-        report.append(f"   Lectura:")
-        report.append(f"      • Virtio: {virtio['disk_read_speed']:.2f} MB/s")
-        report.append(f"      • Emulado: {emulated['disk_read_speed']:.2f} MB/s")
-        report.append(f"      • Ratio: {read_ratio:.2f}x más rápido")
-        report.append(f"      • Mejora: {(read_ratio - 1) * 100:.1f}%\n")
-        
-        report.append(f"   Escritura:")
-        report.append(f"      • Virtio: {virtio['disk_write_speed']:.2f} MB/s")
-        report.append(f"      • Emulado: {emulated['disk_write_speed']:.2f} MB/s")
-        report.append(f"      • Ratio: {write_ratio:.2f}x más rápido")
-        report.append(f"      • Mejora: {(write_ratio - 1) * 100:.1f}%\n")
+        for field, label in (('disk_read_speed', 'Lectura'),
+                             ('disk_write_speed', 'Escritura')):
+            j = col[field]
+            report.append(f"   {label}:")
+            report.append(f"      • {keys[base]}: {mean[base, j]:.2f} MB/s "
+                          f"(p50 {stats['p50'][base, j]:.2f}, p99 {stats['p99'][base, j]:.2f})")
+            for i in others:
+                report.append(f"      • {keys[i]}: {mean[i, j]:.2f} MB/s, "
+                              f"{ratio[i, j]:.2f}x" +
+                              ("" if host_disk else f", mejora {gains[i, j]:.1f}%"))
+            report.append("")
         
         report.append(f"   Interpretación:")
-        report.append(f"      Virtio utiliza paravirtualización, permitiendo al guest OS")
-        report.append(f"      comunicarse directamente con el hypervisor mediante drivers")
-        report.append(f"      optimizados. IDE requiere emulación completa del hardware.\n")
+        if host_disk and any('replay' in (m.get('disk_io') or {})
+                             for m in self.data.get('metrics', [])):
+            report.append(f"      Traza reproducida en el host, sobre un fichero de trabajo y")
+            report.append(f"      no a través del dispositivo virtio o IDE: las diferencias entre")
+            report.append(f"      configuraciones son ruido del host, no mejora de la interfaz.\n")
+        elif host_disk:
+            report.append(f"      Disco medido en el host, sobre un fichero de trabajo y no")
+            report.append(f"      a través del dispositivo virtio o IDE: las diferencias entre")
+            report.append(f"      configuraciones son ruido del host, no mejora de la interfaz.\n")
+        else:
+            report.append(f"      Virtio utiliza paravirtualización, permitiendo al guest OS")
+            report.append(f"      comunicarse directamente con el hypervisor mediante drivers")
+            report.append(f"      optimizados. IDE requiere emulación completa del hardware.\n")
 
         report.append("\n2. ANÁLISIS DE RENDIMIENTO DE RED")
         report.append("-" * 80)
-        
-        net_ratio = virtio['network_throughput'] / emulated['network_throughput']
-        
+        j = col['network_throughput']
         report.append(f"   Throughput:")
-        report.append(f"      • Virtio-net: {virtio['network_throughput']:.2f} Mbps")
-        report.append(f"      • e1000: {emulated['network_throughput']:.2f} Mbps")
-        report.append(f"      • Ratio: {net_ratio:.2f}x más rápido")
-        report.append(f"      • Mejora: {(net_ratio - 1) * 100:.1f}%\n")
+        report.append(f"      • {keys[base]}: {mean[base, j]:.2f} Mbps")
+        for i in others:
+            report.append(f"      • {keys[i]}: {mean[i, j]:.2f} Mbps, "
+                          f"{ratio[i, j]:.2f}x, mejora {gains[i, j]:.1f}%")
+        report.append("")
         
         report.append(f"   Interpretación:")
         report.append(f"      Virtio-net reduce el overhead eliminando la necesidad de")
         report.append(f"      emular completamente una tarjeta Intel e1000. Usa un modelo")
         report.append(f"      de cola compartida más eficiente.\n")
+        backends = [(m.get('config_name'), m['network']['backends'])
+                    for m in (self.data or {}).get('metrics', [])
+                    if (m.get('network') or {}).get('backends')]
+        if backends:
+            report.append(f"   Backends de red (mismo host, misma carga):")
+            for name, rows in backends:
+                for backend, row in rows.items():
+                    if 'error' in row:
+                        continue
+                    report.append(f"      • {name} / {backend} ({row['path']}): "
+                                  f"{row['mbps']:.2f} Mbps, p99 {row['lat_p99_ms']} ms")
+            report.append("")
 
         report.append("\n3. ANÁLISIS DE TIEMPO DE ARRANQUE")
         report.append("-" * 80)
-        
-        boot_improvement = ((emulated['boot_time'] - virtio['boot_time']) / 
-                           emulated['boot_time'] * 100)
-        
-        report.append(f"   Tiempo de arranque:")
-        report.append(f"      • Virtio: {virtio['boot_time']:.3f} segundos")
-        report.append(f"      • Emulado: {emulated['boot_time']:.3f} segundos")
-        report.append(f"      • Diferencia: {emulated['boot_time'] - virtio['boot_time']:.3f} segundos")
-        report.append(f"      • Mejora: {boot_improvement:.1f}%\n")
-        
-        report.append(f"   Interpretación:")
-        report.append(f"      La detección y configuración de dispositivos virtio es más")
-        report.append(f"      rápida ya que no requiere sondeo extensivo de hardware.\n")
+        j = col['boot_time']
+        if np.isnan(mean[:, j]).all():
+            # Sin --real-vm (ni --simulate) no se mide el arranque
+            report.append(f"   Tiempo de arranque: no medido (requiere --real-vm)\n")
+        else:
+            report.append(f"   Tiempo de arranque:")
+            report.append(f"      • {keys[base]}: {mean[base, j]:.3f} segundos")
+            for i in others:
+                report.append(f"      • {keys[i]}: {mean[i, j]:.3f} segundos, "
+                              f"diferencia {mean[base, j] - mean[i, j]:.3f} s, "
+                              f"mejora {gains[i, j]:.1f}%")
+            report.append("")
+            
+            report.append(f"   Interpretación:")
+            report.append(f"      La detección y configuración de dispositivos virtio es más")
+            report.append(f"      rápida ya que no requiere sondeo extensivo de hardware.\n")
 
         report.append("\n4. ANÁLISIS DE OVERHEAD DE CPU")
         report.append("-" * 80)
-        
-        cpu_reduction = ((emulated['cpu_overhead'] - virtio['cpu_overhead']) / 
-                        emulated['cpu_overhead'] * 100)
-        
+        j = col['cpu_overhead']
         report.append(f"   Uso de CPU del host:")
-        report.append(f"      • Virtio: {virtio['cpu_overhead']:.2f}%")
-        report.append(f"      • Emulado: {emulated['cpu_overhead']:.2f}%")
-        report.append(f"      • Reducción: {cpu_reduction:.1f}%\n")
+        report.append(f"      • {keys[base]}: {mean[base, j]:.2f}%")
+        for i in others:
+            report.append(f"      • {keys[i]}: {mean[i, j]:.2f}%, reducción {gains[i, j]:.1f}%")
+        report.append("")
         
         report.append(f"   Interpretación:")
         report.append(f"      La paravirtualización reduce ciclos de CPU necesarios para")
         report.append(f"      traducir operaciones de E/S, mejorando la densidad de VMs.\n")
 
-        report.append("\n5. CONCLUSIONES Y RECOMENDACIONES")
+        report.append("\n5. MATRIZ DE MEJORA (throughput de red, fila sobre columna, %)")
+        report.append("-" * 80)
+        matrix = improvement_matrix(mean[:, col['network_throughput']], 'network_throughput')
+        width = max(12, max(len(k) for k in keys) + 2)
+        report.append(" " * width + "".join(f"{k:>{width}}" for k in keys))
+        for i, name in enumerate(keys):
+            report.append(f"{name:<{width}}" + "".join(
+                f"{value:>{width}.1f}" for value in matrix[i]))
+
+        report.append("\n6. CONCLUSIONES Y RECOMENDACIONES")
         report.append("-" * 80)
-        report.append("   • Virtio ofrece mejoras significativas en todos los aspectos medidos")
-        report.append(f"   • Rendimiento de E/S mejora ~{((read_ratio + write_ratio) / 2 - 1) * 100:.0f}%")
-        report.append(f"   • Throughput de red aumenta ~{(net_ratio - 1) * 100:.0f}%")
-        report.append(f"   • Overhead de CPU se reduce ~{cpu_reduction:.0f}%")
+        best = int(np.nanargmax(np.nanmean(gains[:, [col['disk_read_speed'],
+                                                      col['disk_write_speed'],
+                                                      col['network_throughput']]], axis=1)))
+        for i in others:
+            disk = ""
+            if not host_disk:
+                disk = np.nanmean(gains[i, [col['disk_read_speed'], col['disk_write_speed']]])
+                disk = f"E/S de disco ~{disk:.0f}%, "
+            report.append(f"   • {keys[i]}: {disk}red "
+                          f"~{gains[i, col['network_throughput']]:.0f}%, CPU "
+                          f"~{gains[i, col['cpu_overhead']]:.0f}% frente a {keys[base]}")
+        report.append(f"   • Mejor configuración en throughput: {keys[best]}")
         report.append("\n   Recomendaciones:")
         report.append("   1. Usar virtio para cargas de producción cuando sea posible")
         report.append("   2. Dispositivos emulados solo para compatibilidad legacy")
@@ -229,27 +519,64 @@ class VirtualizationAnalyzer:
         report.append("   4. Implementar SR-IOV para E/S crítica en entornos cloud\n")
         
         report.append("="*80 + "\n")
+        if density.get('configs'):
+            report.append(format_density(density))
         
-        report_text = "\n".join(report)
+        self._save_report("\n".join(report))
+    
+    def _save_report(self, report_text: str):
         print(report_text)
         with open('detailed_analysis.txt', 'w') as f:
             f.write(report_text)
         print("[OK] Reporte detallado guardado en 'detailed_analysis.txt'")
 
 
-def main():
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Análisis y visualización de resultados de virtualización de E/S")
+    parser.add_argument("--results", default="results.json",
+                        help="Fichero JSON de resultados")
+    parser.add_argument("--store", default=None,
+                        help="Leer del almacén incremental en lugar del JSON")
+    parser.add_argument("--run", type=int, default=None,
+                        help="Ejecución del store a analizar (por defecto la "
+                             "última completada)")
+    parser.add_argument("--all-runs", action="store_true",
+                        help="Agregar en la tabla y el informe todas las "
+                             "ejecuciones del store, no solo la analizada")
+    parser.add_argument("--baseline", default=None,
+                        help="Configuración de referencia para ratios y mejoras")
+    parser.add_argument("--charts-dir", default=".",
+                        help="Directorio de salida de los gráficos")
+    parser.add_argument("--render-workers", type=int, default=0,
+                        help="Procesos de renderizado (0 = uno por CPU)")
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--trace", default=None, metavar="FICHERO",
+                        help="Exportar los tiempos de cada paso en formato Chrome trace")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None):
+    args = parse_args(argv)
     print("\n╔══════════════════════════════════════════════════╗")
     print("║  ANALIZADOR DE VIRTUALIZACIÓN DE E/S            ║")
     print("╚══════════════════════════════════════════════════╝\n")
     
     try:
-        analyzer = VirtualizationAnalyzer()
+        tracer = Tracer(process_name="analyzer") if args.trace else NULL_TRACER
+        analyzer = VirtualizationAnalyzer(args.results, args.store, args.run,
+                                          args.baseline, args.charts_dir,
+                                          args.render_workers, args.dpi, tracer,
+                                          args.all_runs)
         
         print("[INFO] Generando análisis detallado...")
         analyzer.generate_detailed_report()
         
         print("\n[INFO] Generando visualizaciones...")
-        analyzer.create_comparison_charts()
+        analyzer.render_all()
+        if args.trace:
+            print(format_timings(tracer.timing_table()))
+            tracer.export(args.trace)
         
         print("\n[INFO] Análisis completado exitosamente")
         
@@ -0,0 +1,386 @@
+import hashlib
+import json
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List
+import numpy as np
+from latency_histogram import LatencyHistogram
+
+# Cambiar al modificar cualquier función render_*: invalida la caché
+RENDERER_VERSION = 1
+CACHE_FILE = ".chart_cache.json"
+BASELINE_COLOR = '#e74c3c'
+PALETTE = ['#2ecc71', '#3498db', '#9b59b6', '#f39c12', '#1abc9c', '#34495e']
+_PLT = None
+
+
+def pyplot():
+    """matplotlib con backend Agg, importado solo cuando se dibuja."""
+    global _PLT
+    if _PLT is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        _PLT = plt
+    return _PLT
+
+
+def _feed(digest, obj):
+    if isinstance(obj, dict):
+        digest.update(b"{")
+        for key in sorted(obj, key=str):
+            _feed(digest, str(key))
+            _feed(digest, obj[key])
+        digest.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"[")
+        for item in obj:
+            _feed(digest, item)
+        digest.update(b"]")
+    elif isinstance(obj, np.ndarray):
+        digest.update(f"nd{obj.dtype.str}{obj.shape}".encode())
+        digest.update(np.ascontiguousarray(obj).data)
+    elif isinstance(obj, float):
+        digest.update(b"f" + struct.pack("<d", obj))
+    else:
+        digest.update(f"{type(obj).__name__}:{obj!r}".encode())
+
+
+def data_hash(obj) -> str:
+    """Hash estable del contenido (dicts, listas, escalares y arrays NumPy)."""
+    digest = hashlib.sha256()
+    _feed(digest, obj)
+    return digest.hexdigest()
+
+
+class ChartJob:
+    """Un gráfico: función ``render(data, output, dpi)`` de nivel de módulo
+    (para poder enviarla a otro proceso) y los datos que necesita."""
+    def __init__(self, output: str, render: Callable, data: Dict, dpi: int = 150):
+        self.output = output
+        self.render = render
+        self.data = data
+        self.dpi = dpi
+        self.key = data_hash([render.__module__, render.__qualname__,
+                              RENDERER_VERSION, dpi, data])
+
+
+def _run_job(render: Callable, data: Dict, output: str, dpi: int) -> Dict:
+    start = time.perf_counter()
+    render(data, output, dpi)
+    return {'pid': os.getpid(), 'start': start, 'end': time.perf_counter()}
+
+
+class ChartPipeline:
+    """Renderiza gráficos sin pantalla, en paralelo y solo si cambiaron.
+
+    La caché (``.chart_cache.json`` en ``output_dir``) guarda el hash de los
+    datos de cada fichero generado; un gráfico cuyo hash coincide y cuyo
+    fichero existe no se vuelve a dibujar.
+    """
+    def __init__(self, output_dir: str = ".", workers: int = 1):
+        self.output_dir = output_dir
+        self.workers = workers
+        self.cache_path = os.path.join(output_dir, CACHE_FILE)
+        self.jobs = []
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, job: ChartJob):
+        if job is not None:
+            self.jobs.append(job)
+
+    def _load_cache(self) -> Dict[str, str]:
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_cache(self, cache: Dict[str, str]):
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(cache, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.cache_path)
+
+    def run(self) -> Dict[str, List[str]]:
+        cache = self._load_cache()
+        stale, cached = [], []
+        for job in self.jobs:
+            path = os.path.join(self.output_dir, job.output)
+            if cache.get(job.output) == job.key and os.path.exists(path):
+                cached.append(job.output)
+            else:
+                stale.append(job)
+        rendered, failed = [], []
+        workers = self.workers if self.workers > 0 else (os.cpu_count() or 1)
+        if workers > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(stale))) as pool:
+                futures = [(job, pool.submit(_run_job, job.render, job.data,
+                                             os.path.join(self.output_dir, job.output),
+                                             job.dpi))
+                           for job in stale]
+                outcomes = []
+                for job, future in futures:
+                    try:
+                        timing = future.result()
+                        outcomes.append((job, None, timing))
+                    except Exception as e:
+                        outcomes.append((job, e, None))
+        else:
+            outcomes = []
+            for job in stale:
+                try:
+                    timing = _run_job(job.render, job.data,
+                                      os.path.join(self.output_dir, job.output), job.dpi)
+                    outcomes.append((job, None, timing))
+                except Exception as e:
+                    outcomes.append((job, e, None))
+        timings = {}
+        for job, error, timing in outcomes:
+            if timing is not None:
+                timings[job.output] = timing
+            if error is None:
+                cache[job.output] = job.key
+                rendered.append(job.output)
+            else:
+                cache.pop(job.output, None)
+                failed.append(job.output)
+                print(f"[ERROR] No se pudo generar '{job.output}': {error}")
+        self._save_cache(cache)
+        self.jobs = []
+        print(f"[OK] Gráficos en '{self.output_dir}': {len(rendered)} generados, "
+              f"{len(cached)} sin cambios")
+        return {'rendered': rendered, 'cached': cached, 'failed': failed,
+                'timings': timings}
+
+
+def config_colors(keys: List[str], baseline: int) -> List[str]:
+    return [BASELINE_COLOR if i == baseline else PALETTE[i % len(PALETTE)]
+            for i in range(len(keys))]
+
+
+def _label_bars(ax, bars, fmt: str):
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                fmt.format(height), ha='center', va='bottom', fontsize=8)
+
+
+def _nan_to_zero(values: List[float]) -> List[float]:
+    return [0.0 if v != v else v for v in values]
+
+
+def render_comparison(data: Dict, output: str, dpi: int):
+    plt = pyplot()
+    keys, colors = data['keys'], data['colors']
+    fig, axes = plt.subplots(2, 3, figsize=(min(48, max(15, 3.6 * len(keys))), 10))
+    fig.suptitle(f"Comparación de Virtualización de E/S (referencia: {data['baseline']})",
+                 fontsize=16, fontweight='bold')
+    for ax, panel in zip(axes.flat, data['panels']):
+        errors = _nan_to_zero(panel['errors']) if panel['errors'] else None
+        bars = ax.bar(keys, _nan_to_zero(panel['means']), yerr=errors,
+                      capsize=4, color=colors)
+        ax.set_ylabel(panel['ylabel'])
+        ax.set_title(panel['title'])
+        ax.grid(axis='y', alpha=0.3)
+        ax.tick_params(axis='x', rotation=30 if len(keys) > 3 else 0)
+        _label_bars(ax, bars, panel['fmt'])
+
+    ax6 = axes[1, 2]
+    labels = data['gain_labels']
+    others = [k for k in keys if k in data['gains']]
+    height = 0.8 / max(len(others), 1)
+    positions = np.arange(len(labels))
+    for n, name in enumerate(others):
+        bars = ax6.barh(positions + n * height, _nan_to_zero(data['gains'][name]),
+                        height=height, color=colors[keys.index(name)], label=name)
+        for bar in bars:
+            width = bar.get_width()
+            ax6.text(width, bar.get_y() + bar.get_height()/2.,
+                     f'{width:.1f}%', ha='left' if width > 0 else 'right',
+                     va='center', fontsize=8)
+    ax6.set_yticks(positions + height * (len(others) - 1) / 2)
+    ax6.set_yticklabels(labels)
+    ax6.set_xlabel('Mejora (%)')
+    ax6.set_title(f"Mejora sobre {data['baseline']}")
+    ax6.axvline(x=0, color='black', linestyle='-', linewidth=0.5)
+    ax6.grid(axis='x', alpha=0.3)
+    if len(others) > 1:
+        ax6.legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_metric(data: Dict, output: str, dpi: int):
+    """Una métrica en todas las configuraciones: media ± desviación y p99."""
+    plt = pyplot()
+    keys = data['keys']
+    fig, ax = plt.subplots(figsize=(min(24, max(6, 0.9 * len(keys))), 4.5))
+    errors = _nan_to_zero(data['errors']) if data['errors'] else None
+    bars = ax.bar(keys, _nan_to_zero(data['means']), yerr=errors, capsize=4,
+                  color=data['colors'])
+    if data.get('p99') and any(v == v for v in data['p99']):
+        ax.scatter(keys, data['p99'], marker='_', s=200, color='black',
+                   label='p99', zorder=3)
+        ax.legend(fontsize=8)
+    _label_bars(ax, bars, '{:.4g}')
+    ax.set_title(data['title'])
+    ax.set_ylabel(data['unit'])
+    ax.grid(axis='y', alpha=0.3)
+    ax.tick_params(axis='x', rotation=30 if len(keys) > 3 else 0)
+    fig.tight_layout()
+    fig.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_config(data: Dict, output: str, dpi: int):
+    """Una configuración: mejora por métrica frente a la referencia y sus CDF."""
+    plt = pyplot()
+    histograms = data.get('histograms') or {}
+    columns = 2 if histograms else 1
+    fig, axes = plt.subplots(1, columns, figsize=(7 * columns, 5), squeeze=False)
+    fig.suptitle(f"{data['config']} frente a {data['baseline']}",
+                 fontsize=14, fontweight='bold')
+    ax = axes[0, 0]
+    gains = _nan_to_zero(data['gains'])
+    ax.barh(data['labels'], gains,
+            color=['#27ae60' if v > 0 else '#e67e22' for v in gains])
+    ax.axvline(x=0, color='black', linewidth=0.5)
+    ax.set_xlabel('Mejora (%)')
+    ax.grid(axis='x', alpha=0.3)
+    if histograms:
+        ax = axes[0, 1]
+        for (title, hist_data), color in zip(histograms.items(), PALETTE):
+            hist = LatencyHistogram.from_dict(hist_data)
+            values, fractions = hist.cdf()
+            ax.step(np.array(values) / 1e3, fractions, where='post', color=color,
+                    label=f"{title} (p99 {hist.percentile(99) / 1e3:.1f} µs)")
+        ax.set_xscale('log')
+        ax.set_xlabel('Latencia (µs)')
+        ax.set_ylabel('Fracción acumulada')
+        ax.set_ylim(0, 1.01)
+        ax.grid(alpha=0.3)
+        ax.legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_latency_cdf(data: Dict, output: str, dpi: int):
+    plt = pyplot()
+    panels = data['panels']
+    fig, axes = plt.subplots(1, len(panels), figsize=(6 * len(panels), 5),
+                             squeeze=False)
+    fig.suptitle('CDF de Latencias por Configuración',
+                 fontsize=16, fontweight='bold')
+    colors = data['colors']
+    for ax, panel in zip(axes[0], panels):
+        for name, hist_data in panel['histograms'].items():
+            hist = LatencyHistogram.from_dict(hist_data)
+            values, fractions = hist.cdf()
+            ax.step(np.array(values) / 1e3, fractions, where='post',
+                    color=colors.get(name),
+                    label=f"{name} (p99 {hist.percentile(99) / 1e3:.1f} µs)")
+        ax.set_xscale('log')
+        ax.set_xlabel('Latencia (µs)')
+        ax.set_ylabel('Fracción acumulada')
+        ax.set_title(panel['title'])
+        ax.set_ylim(0, 1.01)
+        ax.grid(alpha=0.3)
+        ax.legend(fontsize=9)
+    fig.tight_layout()
+    fig.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_host_series(data: Dict, output: str, dpi: int):
+    plt = pyplot()
+    panels = data['panels']
+    fig, axes = plt.subplots(len(panels), 1, figsize=(12, 3 * len(panels)),
+                             sharex=True, squeeze=False)
+    axes = axes[:, 0]
+    for name, series in data['series'].items():
+        t = np.asarray(series['timestamp'])
+        if not len(t):
+            continue
+        for ax, (key, label) in zip(axes, panels):
+            ax.plot(t - t[0], series[key], linewidth=0.8, label=name)
+            ax.set_ylabel(label)
+            ax.grid(alpha=0.3)
+    axes[0].legend(fontsize=9)
+    axes[-1].set_xlabel('Tiempo (s)')
+    fig.suptitle('Muestreo del host', fontsize=14, fontweight='bold')
+    fig.tight_layout()
+    fig.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_host_timeline(data: Dict, output: str, dpi: int):
+    """CPU del host por configuración con las fases sombreadas; la línea
+    discontinua de cada fase es su media sobre las muestras originales."""
+    plt = pyplot()
+    configs = data['configs']
+    fig, axes = plt.subplots(len(configs), 1, figsize=(12, 2.8 * len(configs)),
+                             squeeze=False)
+    for ax, (name, timeline) in zip(axes[:, 0], configs.items()):
+        color = data['colors'][name]
+        for i, phase in enumerate(timeline['phases']):
+            ax.axvspan(phase['start'], phase['end'],
+                       color='#bbbbbb' if i % 2 else '#e5e5e5', alpha=0.5,
+                       linewidth=0)
+            ax.text((phase['start'] + phase['end']) / 2, 1.0, phase['name'],
+                    transform=ax.get_xaxis_transform(), ha='center',
+                    va='bottom', fontsize=8)
+            if not phase['samples']:
+                continue
+            ax.plot(phase['t'], phase['cpu_total'], color=color, linewidth=0.9)
+            ax.hlines(phase['mean'], phase['start'], phase['end'], color=color,
+                      linestyle='--', linewidth=0.8)
+        ax.set_ylabel('CPU (%)')
+        ax.set_ylim(0, max(100, ax.get_ylim()[1]))
+        ax.set_title(f"{name} ({timeline['method']}, "
+                     f"{timeline['samples']} muestras)", fontsize=10, pad=14)
+        ax.grid(alpha=0.3)
+    axes[-1, 0].set_xlabel('Tiempo (s)')
+    fig.suptitle('CPU del host por fase', fontsize=14, fontweight='bold')
+    fig.tight_layout()
+    fig.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_density(data: Dict, output: str, dpi: int):
+    """Curvas de escalado por densidad: agregado (continuo), media por VM
+    (discontinuo) y densidad de saturación marcada con una línea vertical."""
+    plt = pyplot()
+    panels = data['panels']
+    fig, axes = plt.subplots(2, 2, figsize=(13, 9))
+    fig.suptitle('Escalado por densidad de VMs', fontsize=16, fontweight='bold')
+    for ax, panel in zip(axes.flat, panels):
+        for name, config in data['configs'].items():
+            color = data['colors'][name]
+            x = config['instances']
+            ax.plot(x, config[panel['key']], marker='o', color=color,
+                    label=name)
+            if panel.get('per_vm'):
+                ax.plot(x, config[panel['per_vm']], linestyle='--', marker='.',
+                        color=color, alpha=0.7)
+            knee = config['saturation'].get(panel['key'])
+            if knee in x:
+                ax.axvline(knee, color=color, linestyle=':', linewidth=1.2)
+                ax.scatter([knee], [config[panel['key']][x.index(knee)]],
+                           marker='*', s=220, color=color, edgecolor='black',
+                           zorder=4, label=f'{name}: saturación ({knee} VM)')
+        if panel.get('limit'):
+            ax.axhline(panel['limit'], color='black', linestyle=':', linewidth=0.8)
+        ax.set_title(panel['title'])
+        ax.set_xlabel('Instancias concurrentes')
+        ax.set_ylabel(panel['unit'])
+        ax.set_xticks(range(1, data['max_instances'] + 1))
+        ax.grid(alpha=0.3)
+        ax.legend(fontsize=7)
+    fig.tight_layout()
+    fig.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
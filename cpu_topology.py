@@ -0,0 +1,226 @@
+import os
+import re
+from typing import Dict, List, Optional
+from metrics_table import HIGHER_IS_BETTER
+
+SYSFS = "/sys/devices/system"
+PINNING_MODES = ("off", "on")
+# Métricas del informe pinned vs unpinned
+PINNING_METRICS = ('disk_read_speed', 'disk_write_speed', 'network_throughput',
+                   'disk_read_latency_p99_ms', 'disk_write_latency_p99_ms',
+                   'network_latency_p99_ms', 'cpu_overhead')
+# Nombres de hilo de QEMU con -name ...,debug-threads=on
+_VCPU_THREAD = re.compile(r"^CPU (\d+)/")
+_IOTHREAD = re.compile(r"^IO (iothread\d+)")
+
+
+def parse_cpulist(text: str) -> List[int]:
+    """``"0-3,8,10-11"`` -> ``[0, 1, 2, 3, 8, 10, 11]``."""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def format_cpulist(cpus: List[int]) -> str:
+    ranges, cpus = [], sorted(set(cpus))
+    for cpu in cpus:
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def allowed_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class HostTopology:
+    """Nodos NUMA y núcleos físicos del host, leídos de /sys.
+
+    Sin /sys (u otro sistema operativo) se asume un único nodo con las CPUs
+    permitidas al proceso y un núcleo por CPU.
+    """
+    def __init__(self, nodes: Dict[int, List[int]], cores: Dict[int, tuple]):
+        self.nodes = nodes
+        self.cores = cores
+
+    @classmethod
+    def discover(cls, sysfs: str = SYSFS) -> 'HostTopology':
+        nodes = {}
+        node_dir = os.path.join(sysfs, "node")
+        if os.path.isdir(node_dir):
+            for name in sorted(os.listdir(node_dir)):
+                if re.fullmatch(r"node\d+", name):
+                    cpulist = _read(os.path.join(node_dir, name, "cpulist"))
+                    if cpulist:
+                        nodes[int(name[4:])] = parse_cpulist(cpulist)
+        if not nodes:
+            nodes = {0: allowed_cpus()}
+        cores = {}
+        for cpus in nodes.values():
+            for cpu in cpus:
+                base = os.path.join(sysfs, "cpu", f"cpu{cpu}", "topology")
+                package = _read(os.path.join(base, "physical_package_id"))
+                core = _read(os.path.join(base, "core_id"))
+                cores[cpu] = (int(package or 0), int(core if core is not None else cpu))
+        return cls(nodes, cores)
+
+    def node_of(self, cpu: int) -> Optional[int]:
+        for node, cpus in self.nodes.items():
+            if cpu in cpus:
+                return node
+        return None
+
+    def spread(self, cpus: List[int]) -> List[int]:
+        """CPUs ordenadas para repartir primero entre núcleos físicos
+        distintos y solo después sobre sus hermanos SMT."""
+        rank, order = {}, []
+        for cpu in sorted(cpus):
+            core = self.cores.get(cpu, (0, cpu))
+            rank[core] = rank.get(core, -1) + 1
+            order.append((rank[core], cpu))
+        return [cpu for _, cpu in sorted(order)]
+
+    def summary(self) -> Dict:
+        return {'nodes': {str(n): format_cpulist(c) for n, c in self.nodes.items()},
+                'cpus': sum(len(c) for c in self.nodes.values()),
+                'physical_cores': len(set(self.cores.values()))}
+
+
+def plan_placement(topology: HostTopology, vcpus: int, iothreads: int = 0,
+                   node: Optional[int] = None,
+                   allowed: Optional[List[int]] = None,
+                   exclusive: bool = True) -> Dict:
+    """Asigna una CPU a cada vCPU y reparte el resto entre iothreads, hilos
+    de emulación y workers del benchmark, todo dentro de un nodo NUMA.
+
+    Sin ``node`` se elige el nodo con más CPUs permitidas. Si no hay CPUs
+    suficientes se reutilizan (``shared``), y el informe lo indica. Con
+    ``exclusive=False`` solo se restringe todo al nodo, sin CPU por vCPU.
+    """
+    allowed = set(allowed if allowed is not None else allowed_cpus())
+    candidates = {n: [c for c in cpus if c in allowed]
+                  for n, cpus in topology.nodes.items()}
+    if node is None:
+        node = max(candidates, key=lambda n: (len(candidates[n]), -n))
+    elif node not in topology.nodes:
+        raise ValueError(f"Nodo NUMA inexistente: {node} "
+                         f"(disponibles: {sorted(topology.nodes)})")
+    cpus = topology.spread(candidates[node] or sorted(allowed))
+    if not exclusive:
+        return {'node': node, 'vcpus': [], 'iothreads': [],
+                'emulator': sorted(cpus), 'benchmark': sorted(cpus),
+                'shared': False}
+    shared = vcpus + iothreads >= len(cpus)
+    vcpu_cpus = [cpus[i % len(cpus)] for i in range(vcpus)]
+    rest = cpus[vcpus:] or cpus
+    iothread_cpus = [rest[i % len(rest)] for i in range(iothreads)]
+    others = rest[iothreads:] or rest
+    return {'node': node, 'vcpus': vcpu_cpus, 'iothreads': iothread_cpus,
+            'emulator': sorted(others), 'benchmark': sorted(others),
+            'shared': shared}
+
+
+def thread_roles(pid: int) -> Dict[int, str]:
+    """Rol de cada hilo de un proceso QEMU: ``vcpu<N>``, ``iothread<N>`` o
+    ``emulator``."""
+    roles = {}
+    task_dir = f"/proc/{pid}/task"
+    try:
+        tids = os.listdir(task_dir)
+    except OSError:
+        return roles
+    for tid in tids:
+        comm = _read(os.path.join(task_dir, tid, "comm")) or ""
+        vcpu = _VCPU_THREAD.match(comm)
+        iothread = _IOTHREAD.match(comm)
+        if vcpu:
+            roles[int(tid)] = f"vcpu{vcpu.group(1)}"
+        elif iothread:
+            roles[int(tid)] = iothread.group(1)
+        else:
+            roles[int(tid)] = "emulator"
+    return roles
+
+
+def pin_threads(pid: int, placement: Dict) -> Dict[str, int]:
+    """Fija cada hilo del proceso según ``placement``; devuelve cuántos hilos
+    de cada tipo se fijaron. Los hilos que terminan entretanto se ignoran."""
+    counts = {'vcpu': 0, 'iothread': 0, 'emulator': 0}
+    for tid, role in thread_roles(pid).items():
+        if role.startswith("vcpu") and placement['vcpus']:
+            index, kind = int(role[4:]), 'vcpu'
+            cpus = [placement['vcpus'][index % len(placement['vcpus'])]]
+        elif role.startswith("iothread") and placement['iothreads']:
+            index, kind = int(role[8:]), 'iothread'
+            cpus = [placement['iothreads'][index % len(placement['iothreads'])]]
+        else:
+            kind, cpus = 'emulator', placement['emulator']
+        try:
+            os.sched_setaffinity(tid, cpus)
+        except (ProcessLookupError, PermissionError):
+            continue
+        counts[kind] += 1
+    return counts
+
+
+def _pair_key(m: Dict) -> tuple:
+    tuning = tuple(sorted((k, str(v)) for k, v in (m.get('tuning') or {}).items()
+                          if k != 'pinning'))
+    return m.get('disk_type'), m.get('network_type'), tuning
+
+
+def pinning_gain(metrics: List[Dict]) -> List[Dict]:
+    """Empareja cada configuración con ``pinning=on`` con su variante
+    ``off`` y calcula la ganancia (positiva = mejor) de cada métrica."""
+    variants = {}
+    for m in metrics:
+        mode = (m.get('tuning') or {}).get('pinning')
+        if mode in PINNING_MODES:
+            variants.setdefault(_pair_key(m), {})[mode] = m
+    rows = []
+    for pair in variants.values():
+        if len(pair) < 2:
+            continue
+        off, on = pair['off'], pair['on']
+        row = {'off': off['config_name'], 'on': on['config_name'], 'metrics': {}}
+        for metric in PINNING_METRICS:
+            before, after = off.get(metric) or 0, on.get(metric) or 0
+            if not before or not after:
+                continue
+            sign = 1 if HIGHER_IS_BETTER[metric] else -1
+            row['metrics'][metric] = {
+                'off': before, 'on': after,
+                'gain_percent': round((after / before - 1) * 100 * sign, 2)}
+        rows.append(row)
+    return rows
+
+
+def format_pinning(rows: List[Dict]) -> str:
+    lines = ["\nFIJACIÓN DE CPU (pinned vs unpinned, ganancia positiva = mejor):"]
+    lines.append(f"{'Configuración (pinned)':<40} {'Métrica':<26} {'Sin fijar':>10} "
+                 f"{'Fijada':>10} {'Ganancia':>9}")
+    lines.append("-" * 99)
+    for row in rows:
+        for metric, values in row['metrics'].items():
+            lines.append(f"{row['on'][:40]:<40} {metric:<26} {values['off']:>10.2f} "
+                         f"{values['on']:>10.2f} {values['gain_percent']:>8.1f}%")
+    if not rows:
+        lines.append("[WARN] No hay pares de configuraciones con y sin fijación")
+    lines.append("-" * 99)
+    return "\n".join(lines)
@@ -0,0 +1,374 @@
+import asyncio
+import copy
+import json
+import os
+import statistics
+import sys
+from typing import Dict, List, Optional
+from disk_io_engine import DiskIOEngine, DiskIOJob
+from network_engine import NetworkEngine, NetworkJob
+from host_sampler import HostSampler
+from process_accounting import ProcessTreeAccountant
+from qemu_launcher import QemuLauncher, BootTimeoutError
+from simulation import (CPU_LOAD_MODEL, SimulatedCounters, config_rng,
+                        density_factor, device_family, simulate_disk_result,
+                        simulate_network_result, tuning_factors)
+
+DENSITY_PHASES = ('disk_read', 'disk_write', 'network')
+# Duración virtual de cada fase en modo simulación (como en el benchmark)
+SIMULATED_SECONDS = {'disk_read': 1.5, 'disk_write': 1.5, 'network': 1.0}
+# Throughput agregado (suma de todas las VMs) en el que se busca la saturación
+AGGREGATE_FIELDS = ('disk_read_mb_s', 'disk_write_mb_s', 'network_mbps')
+SATURATION_GAIN = 0.1
+CPU_SATURATION = 90.0
+INSTANCE_TIMEOUT = 10.0
+
+
+def instance_spec(config, target: Optional[str] = None) -> Dict:
+    """Parámetros de disco y red de una instancia (serializables a JSON)."""
+    return {
+        'disk': {'path': config.disk_scratch, 'pattern': config.disk_pattern,
+                 'block_size': config.disk_block_size,
+                 'queue_depth': config.disk_queue_depth,
+                 'workers': config.disk_workers, 'mode': config.disk_io_mode,
+                 'size': config.disk_test_size, 'runtime': config.disk_runtime},
+        'network': {'protocol': config.network_protocol,
+                    'streams': config.network_streams,
+                    'message_size': config.network_message_size,
+                    'duration': config.network_duration,
+                    'zero_copy': config.network_zero_copy, 'target': target},
+    }
+
+
+def phase_summary(phase: str, result: Dict) -> Dict:
+    """Campos por VM de un resultado de fase (sin histogramas)."""
+    if phase == 'network':
+        return {'network_mbps': result['mbps'],
+                'network_pps': result['packets_per_s'],
+                'network_lat_p99_ms': result.get('lat_p99_ms', 0)}
+    return {f'{phase}_mb_s': result['mb_s'], f'{phase}_iops': result['iops'],
+            f'{phase}_lat_avg_ms': result['lat_avg_ms'],
+            f'{phase}_lat_p99_ms': result.get('lat_p99_ms', 0)}
+
+
+def run_phase(spec: Dict, phase: str) -> Dict:
+    if phase == 'network':
+        return phase_summary(phase, NetworkEngine(NetworkJob(**spec['network'])).run())
+    job = DiskIOJob(operation=phase[len('disk_'):], **spec['disk'])
+    return phase_summary(phase, DiskIOEngine(job).run())
+
+
+def instance_main(spec: Dict) -> int:
+    """Proceso sustituto de una VM: ejecuta cada fase que recibe por stdin
+    y responde con una línea JSON."""
+    print("ready", flush=True)
+    for line in sys.stdin:
+        phase = line.strip()
+        try:
+            result = run_phase(spec, phase)
+        except (OSError, ValueError) as e:
+            result = {'error': f"{phase}: {e}"}
+        print(json.dumps(result), flush=True)
+    return 0
+
+
+def step_summary(instances: int, per_vm: List[Dict], host_cpu: float) -> Dict:
+    """Agregados de un paso. La media por VM incluye las instancias que
+    fallaron o dieron cero (cuentan como 0); los errores van aparte."""
+    fields = sorted({k for row in per_vm for k, v in row.items()
+                     if k != 'instance' and isinstance(v, (int, float))})
+    per_vm_mean = {}
+    for field in fields:
+        values = [row.get(field) or 0 for row in per_vm]
+        per_vm_mean[field] = round(statistics.fmean(values), 3) if values else 0
+    step = {'instances': instances, 'host_cpu': host_cpu,
+            'aggregate': {f: round(sum(row.get(f, 0) for row in per_vm), 2)
+                          for f in AGGREGATE_FIELDS},
+            'per_vm_mean': per_vm_mean, 'per_vm': per_vm}
+    errors = [e for row in per_vm for e in row.get('errors', [])]
+    if errors:
+        step['errors'] = errors
+        step['failed_instances'] = sum(1 for row in per_vm if row.get('errors'))
+    return step
+
+
+def saturation_points(steps: List[Dict],
+                      threshold: float = SATURATION_GAIN) -> Dict[str, Optional[int]]:
+    """Densidad de saturación por métrica agregada.
+
+    Es la última densidad en la que añadir una VM aún aportaba al menos
+    ``threshold`` veces el throughput de una sola instancia (``None`` si no
+    se alcanzó). Para la CPU del host, la primera con ``CPU_SATURATION`` %.
+    """
+    points = {}
+    for field in AGGREGATE_FIELDS:
+        values = [s['aggregate'].get(field, 0) for s in steps]
+        points[field] = None
+        if not values or not values[0]:
+            continue
+        for step, previous, current in zip(steps, values, values[1:]):
+            if current - previous < threshold * values[0]:
+                points[field] = step['instances']
+                break
+    points['host_cpu'] = next((s['instances'] for s in steps
+                               if s['host_cpu'] >= CPU_SATURATION), None)
+    return points
+
+
+async def _expect_ready(process):
+    line = await asyncio.wait_for(process.stdout.readline(), INSTANCE_TIMEOUT)
+    if line.strip() != b"ready":
+        raise RuntimeError(f"La instancia {process.pid} no arrancó")
+
+
+async def _phase(process, phase: str) -> Dict:
+    process.stdin.write(f"{phase}\n".encode())
+    await process.stdin.drain()
+    line = await process.stdout.readline()
+    if not line:
+        return {'error': f"{phase}: la instancia {process.pid} terminó"}
+    return json.loads(line)
+
+
+class DensityBenchmark:
+    """Escalado por densidad: 1..K instancias concurrentes de cada configuración.
+
+    Cada instancia es una VM real (``real_vm``) o, sin QEMU, un proceso
+    sustituto que genera la misma carga de E/S. La carga de disco se genera
+    siempre en el host, sobre un fichero de trabajo por instancia (nunca la
+    imagen de la VM); la de red va al guest por ``hostfwd`` si hay VM. La CPU
+    por VM es la del proceso de carga, y con VMs reales también se guarda la
+    del proceso QEMU (``qemu_cpu_percent``). Los procesos de carga se
+    orquestan con asyncio: cada fase (lectura, escritura, red) empieza a la
+    vez en todas las instancias y la siguiente no arranca hasta que todas
+    terminan, de modo que cada fase mide la contención de su recurso.
+    """
+    def __init__(self, benchmark, max_instances: int,
+                 threshold: float = SATURATION_GAIN):
+        if max_instances <= 0:
+            raise ValueError("max_instances debe ser > 0")
+        self.benchmark = benchmark
+        self.max_instances = max_instances
+        self.threshold = threshold
+
+    def run(self, configurations: List) -> Dict:
+        self.benchmark.begin_run()
+        results = {}
+        for config in configurations:
+            steps = []
+            for instances in range(1, self.max_instances + 1):
+                try:
+                    step = self.run_step(config, instances)
+                except (BootTimeoutError, RuntimeError, OSError,
+                        asyncio.TimeoutError) as e:
+                    print(f"[ERROR] {config.name} con {instances} instancias: {e}")
+                    break
+                steps.append(step)
+                self.record(config, step)
+            results[config.name] = {
+                'disk_type': config.disk_type,
+                'network_type': config.network_type,
+                'steps': steps,
+                'saturation': saturation_points(steps, self.threshold),
+            }
+        return {'max_instances': self.max_instances, 'threshold': self.threshold,
+                'configs': results}
+
+    def record(self, config, step: Dict):
+        bench = self.benchmark
+        if bench.store is not None and bench.run_id is not None:
+            bench.store.record_phase(bench.run_id, config.name, 'density', step)
+
+    def run_step(self, config, instances: int) -> Dict:
+        print(f"[INFO] {config.name}: {instances} instancia(s) concurrentes")
+        with self.benchmark.tracer.span(f"density_{instances}", 'density',
+                                        config=config.name):
+            if self.benchmark.simulate:
+                per_vm, host_cpu = self._simulate_step(config, instances)
+            else:
+                per_vm, host_cpu = asyncio.run(self._run_step(config, instances))
+        step = step_summary(instances, per_vm, host_cpu)
+        aggregate = step['aggregate']
+        print(f"[OK] {instances} VM: lectura {aggregate['disk_read_mb_s']} MB/s, "
+              f"escritura {aggregate['disk_write_mb_s']} MB/s, "
+              f"red {aggregate['network_mbps']} Mbps, CPU host {host_cpu}%")
+        for error in step.get('errors', []):
+            print(f"[WARN] {error}")
+        return step
+
+    @staticmethod
+    def _guest(config, index: int):
+        guest = copy.deepcopy(config)
+        guest.name = f"{config.name}_vm{index}"
+        if config.network_guest_port:
+            guest.network_guest_port = config.network_guest_port + index
+        return guest
+
+    async def _run_step(self, config, instances: int):
+        bench = self.benchmark
+        guests = [self._guest(config, i) for i in range(instances)]
+        acquired, launchers = [], []
+        try:
+            for guest in guests:
+                guest.disk_scratch = bench.image_pool.scratch(guest.name)
+                acquired.append(guest.disk_scratch)
+                if bench.real_vm:
+                    guest.disk_path, guest.disk_format = bench.image_pool.acquire(
+                        guest.name, config.image_format, config.preallocation)
+                    acquired.append(guest.disk_path)
+            targets = [guest.network_target for guest in guests]
+            if bench.real_vm:
+                print("[WARN] La carga de disco de --density se genera en el host, "
+                      "no dentro de los guests")
+                with bench.tracer.span('boot', 'phase', instances=instances):
+                    for guest in guests:
+                        launcher = QemuLauncher(bench.build_qemu_command(guest),
+                                                guest.boot_markers, guest.boot_timeout)
+                        launchers.append(launcher)
+                        launcher.start()
+                    await asyncio.gather(*(asyncio.to_thread(l.wait_for_boot)
+                                           for l in launchers))
+                targets = [f"127.0.0.1:{g.network_guest_port}"
+                           if g.network_guest_port else g.network_target
+                           for g in guests]
+            sampler = HostSampler(bench.sample_rate, bench.sample_capacity)
+            sampler.start()
+            try:
+                per_vm = await self._drive(
+                    [instance_spec(g, t) for g, t in zip(guests, targets)],
+                    [l.process.pid for l in launchers])
+            finally:
+                sampler.stop()
+            return per_vm, round(sampler.mean('cpu_total'), 2)
+        finally:
+            await asyncio.gather(*(asyncio.to_thread(l.stop) for l in launchers))
+            for path in acquired:
+                bench.image_pool.release(path)
+
+    async def _drive(self, specs: List[Dict], vm_pids: List[int]) -> List[Dict]:
+        """Lanza un proceso de carga por instancia y ejecuta las fases en
+        paralelo. La CPU por VM es la del proceso de carga, que es quien
+        genera el trabajo; la de QEMU (``vm_pids``) se guarda aparte."""
+        script = os.path.abspath(__file__)
+        processes = []
+        try:
+            for spec in specs:
+                processes.append(await asyncio.create_subprocess_exec(
+                    sys.executable, script, "--instance", json.dumps(spec),
+                    stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE))
+            await asyncio.gather(*(_expect_ready(p) for p in processes))
+            accountants = [ProcessTreeAccountant(p.pid) for p in processes]
+            vm_accountants = [ProcessTreeAccountant(pid) for pid in vm_pids]
+            for accountant in accountants + vm_accountants:
+                accountant.begin_phase('load')
+            per_vm = [{'instance': i} for i in range(len(processes))]
+            for phase in DENSITY_PHASES:
+                with self.benchmark.tracer.span(phase, 'phase',
+                                                instances=len(processes)):
+                    results = await asyncio.gather(*(_phase(p, phase)
+                                                     for p in processes))
+                for row, result in zip(per_vm, results):
+                    if 'error' in result:
+                        row.setdefault('errors', []).append(
+                            f"vm{row['instance']} {result.pop('error')}")
+                    row.update(result)
+            for row, accountant in zip(per_vm, accountants):
+                accountant.end_phase('load')
+                row['cpu_percent'] = accountant.cpu_percent(['load'])
+            for row, accountant in zip(per_vm, vm_accountants):
+                accountant.end_phase('load')
+                row['qemu_cpu_percent'] = accountant.cpu_percent(['load'])
+            return per_vm
+        finally:
+            for process in processes:
+                process.stdin.close()
+            for process in processes:
+                try:
+                    await asyncio.wait_for(process.wait(), INSTANCE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+
+    def _simulate_step(self, config, instances: int):
+        bench = self.benchmark
+        clock = bench.clock
+        family = device_family(config.disk_type)
+        factors = tuning_factors(config)
+        disk_share = density_factor(config.disk_type, 'disk', instances)
+        network_share = density_factor(config.network_type, 'network', instances)
+        rngs = [config_rng(bench.seed, f"{config.name}#{instances}#vm{i}")
+                for i in range(instances)]
+        counters = SimulatedCounters(clock, config_rng(bench.seed, f"{config.name}#{instances}"))
+        sampler = HostSampler(bench.sample_rate, bench.sample_capacity,
+                              clock=clock, counter_source=counters)
+        per_vm = [{'instance': i} for i in range(instances)]
+        loads = []
+        sampler.start()
+        try:
+            for phase in DENSITY_PHASES:
+                span = bench.tracer.begin(phase, 'phase', instances=instances)
+                counters.load = min(100.0, CPU_LOAD_MODEL[family][phase] *
+                                    factors['cpu'] * instances)
+                loads.append(counters.load)
+                for row, rng in zip(per_vm, rngs):
+                    if phase == 'network':
+                        result = simulate_network_result(
+                            rng, config.network_type, config.network_protocol,
+                            config.network_streams, config.network_message_size,
+                            factors['network'] * network_share)
+                    else:
+                        operation = phase[len('disk_'):]
+                        result = simulate_disk_result(
+                            rng, config.disk_type, operation, config.disk_block_size,
+                            config.disk_queue_depth, config.disk_workers,
+                            config.disk_pattern, config.disk_io_mode,
+                            factors[operation] * disk_share)
+                    row.update(phase_summary(phase, result))
+                clock.sleep(SIMULATED_SECONDS[phase])
+                span.finish()
+        finally:
+            sampler.stop()
+        for row in per_vm:
+            row['cpu_percent'] = round(statistics.fmean(loads) / instances, 2)
+        return per_vm, round(sampler.mean('cpu_total'), 2)
+
+
+def _saturation_label(value: Optional[int]) -> str:
+    return f"{value} VM" if value else "sin saturar"
+
+
+def format_density(result: Dict) -> str:
+    lines = [f"\nESCALADO POR DENSIDAD (1..{result['max_instances']} instancias concurrentes):"]
+    for name, data in result['configs'].items():
+        if 'disk_type' in data:
+            lines.append(f"\n{name} (disco {data['disk_type']}, red {data['network_type']})")
+        else:
+            lines.append(f"\n{name}")
+        lines.append(f"{'VMs':>4} {'Lect. MB/s':>11} {'Escr. MB/s':>11} {'Red Mbps':>10} "
+                     f"{'Lect./VM':>9} {'Red/VM':>9} {'p99 lect. ms':>13} "
+                     f"{'p99 red ms':>11} {'CPU host %':>11}")
+        lines.append("-" * 96)
+        for step in data['steps']:
+            aggregate, mean = step['aggregate'], step['per_vm_mean']
+            lines.append(f"{step['instances']:>4} {aggregate['disk_read_mb_s']:>11.1f} "
+                         f"{aggregate['disk_write_mb_s']:>11.1f} "
+                         f"{aggregate['network_mbps']:>10.1f} "
+                         f"{mean.get('disk_read_mb_s', 0):>9.1f} "
+                         f"{mean.get('network_mbps', 0):>9.1f} "
+                         f"{mean.get('disk_read_lat_p99_ms', 0):>13.3f} "
+                         f"{mean.get('network_lat_p99_ms', 0):>11.3f} "
+                         f"{step['host_cpu']:>11.2f}")
+        lines.append("-" * 96)
+        saturation = data['saturation']
+        lines.append(f"Saturación: lectura {_saturation_label(saturation['disk_read_mb_s'])}, "
+                     f"escritura {_saturation_label(saturation['disk_write_mb_s'])}, "
+                     f"red {_saturation_label(saturation['network_mbps'])}, "
+                     f"CPU del host {_saturation_label(saturation['host_cpu'])}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--instance":
+        sys.exit(instance_main(json.loads(sys.argv[2])))
+    print("Uso: density.py --instance SPEC_JSON (lo lanza virtualization_benchmark.py --density)")
+    sys.exit(2)
@@ -0,0 +1,184 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+from typing import Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl FICLONE de Linux (_IOW(0x94, 9, int)): copia reflink en btrfs/xfs
+FICLONE = 0x40049409
+_SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(size) -> int:
+    if isinstance(size, int):
+        return size
+    text = str(size).strip().upper().rstrip("B")
+    if text and text[-1] in _SIZE_UNITS:
+        return int(float(text[:-1]) * _SIZE_UNITS[text[-1]])
+    return int(text)
+
+
+def create_sparse_file(path: str, size, preallocate: bool = False):
+    """Crea un fichero del tamaño pedido sin escribir sus bloques."""
+    size = parse_size(size)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if preallocate and hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, size)
+        else:
+            os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+
+def reflink_copy(src: str, dst: str) -> bool:
+    if fcntl is None:
+        return False
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            return True
+        except OSError:
+            pass
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    os.remove(dst)
+    return False
+
+
+class DiskImagePool:
+    """Pool de imágenes de disco basado en una imagen base reutilizable.
+
+    La imagen base se prepara una vez (o se toma de ``source``) y cada
+    ejecución recibe un overlay qcow2 con ``backing_file`` hacia ella; sin
+    ``qemu-img`` se usa una copia reflink y, si el sistema de ficheros no la
+    soporta, un fichero raw disperso. Ninguna de estas rutas escribe los
+    datos de la imagen (salvo copiar ``source`` cuando no hay ni qemu-img ni
+    reflink), así que el coste es casi nulo y todas las repeticiones parten
+    del mismo contenido.
+    """
+    def __init__(self, directory: str = "/tmp/vm_image_pool", size="2G",
+                 source: Optional[str] = None, qemu_img: str = "qemu-img"):
+        self.directory = directory
+        self.size = parse_size(size)
+        self.source = os.path.abspath(source) if source else None
+        self.qemu_img = qemu_img
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._base = None
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def has_qemu_img(self) -> bool:
+        return shutil.which(self.qemu_img) is not None
+
+    def _run_qemu_img(self, *args) -> subprocess.CompletedProcess:
+        result = subprocess.run([self.qemu_img, *args],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise OSError(f"qemu-img {args[0]} falló: {result.stderr.strip()}")
+        return result
+
+    def base_image(self) -> Tuple[str, str]:
+        """Ruta y formato de la imagen base, creándola si no existe."""
+        with self._lock:
+            if self._base is not None:
+                return self._base
+            if self.source:
+                fmt = "raw"
+                if self.has_qemu_img:
+                    info = self._run_qemu_img("info", "--output=json", self.source)
+                    fmt = json.loads(info.stdout).get("format", "raw")
+                self._base = (self.source, fmt)
+                return self._base
+            fmt = "qcow2" if self.has_qemu_img else "raw"
+            path = os.path.join(self.directory, f"base_{self.size}.{fmt}")
+            if not os.path.exists(path):
+                tmp = f"{path}.{os.getpid()}.tmp"
+                if fmt == "qcow2":
+                    self._run_qemu_img("create", "-f", "qcow2", tmp, str(self.size))
+                else:
+                    create_sparse_file(tmp, self.size)
+                # rename atómico: workers paralelos pueden competir aquí
+                os.replace(tmp, path)
+            self._base = (path, fmt)
+            return self._base
+
+    def acquire(self, name: str, fmt: Optional[str] = None,
+                preallocation: Optional[str] = None) -> Tuple[str, str]:
+        """Entrega una imagen desechable para ``name``: (ruta, formato).
+
+        ``fmt`` fuerza el formato (``qcow2`` o ``raw``) y ``preallocation``
+        (``off``, ``metadata``, ``falloc``, ``full``) la reserva de espacio;
+        sin ellos se usa la ruta más barata disponible.
+        """
+        base, base_fmt = self.base_image()
+        with self._lock:
+            self._counter += 1
+            stem = f"{name}_{os.getpid()}_{self._counter}"
+        if self.has_qemu_img and fmt in (None, "qcow2"):
+            path = os.path.join(self.directory, f"{stem}.qcow2")
+            options = []
+            if preallocation and preallocation != "off":
+                # Con backing file, qemu-img solo admite preallocation si el
+                # overlay usa subclusters (extended_l2, QEMU >= 5.2)
+                options = ["-o", f"preallocation={preallocation},extended_l2=on,"
+                                 f"cluster_size=128k"]
+            self._run_qemu_img("create", "-f", "qcow2", *options, "-b", base,
+                               "-F", base_fmt, path, str(self.size))
+            return path, "qcow2"
+        preallocate = preallocation in ("falloc", "full")
+        if fmt == "raw" and base_fmt != "raw":
+            # Un raw no admite backing file: se convierte la base una vez
+            base = self._raw_base(base, base_fmt)
+        path = os.path.join(self.directory, f"{stem}.raw" if fmt == "raw"
+                            else f"{stem}.{base_fmt}")
+        if preallocate or not reflink_copy(base, path):
+            if self.source:
+                shutil.copyfile(base, path)
+            else:
+                create_sparse_file(path, self.size, preallocate)
+        # Sin qemu-img no hay qcow2: se entrega raw y el formato real lo indica
+        return path, "raw" if fmt == "raw" else base_fmt
+
+    def scratch(self, name: str) -> str:
+        """Ruta de un fichero de trabajo para el benchmark de disco de
+        ``name``, distinto de su imagen: los motores lo crean y sobrescriben,
+        y ``release()`` lo borra."""
+        with self._lock:
+            self._counter += 1
+            stem = f"{name}_{os.getpid()}_{self._counter}"
+        return os.path.join(self.directory, f"{stem}.scratch")
+
+    def _raw_base(self, base: str, base_fmt: str) -> str:
+        path = os.path.join(self.directory, f"base_{self.size}.raw")
+        with self._lock:
+            if not os.path.exists(path):
+                tmp = f"{path}.{os.getpid()}.tmp"
+                self._run_qemu_img("convert", "-f", base_fmt, "-O", "raw", base, tmp)
+                os.replace(tmp, path)
+        return path
+
+    def release(self, path: str):
+        if path and os.path.exists(path) and path != self.source:
+            os.remove(path)
+
+    def purge(self):
+        """Elimina la imagen base generada (no la de ``source``)."""
+        with self._lock:
+            if self._base and self._base[0] != self.source:
+                try:
+                    os.remove(self._base[0])
+                except FileNotFoundError:
+                    pass
+            self._base = None
@@ -0,0 +1,250 @@
+import os
+import mmap
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+from latency_histogram import LatencyHistogram
+
+PATTERNS = ("sequential", "random")
+OPERATIONS = ("read", "write")
+IO_MODES = ("buffered", "direct", "mmap")
+DIRECT_ALIGNMENT = 4096
+# Cabeceras de imágenes de VM (qcow2, QED, VMDK): el motor no las sobrescribe
+IMAGE_MAGICS = (b"QFI\xfb", b"QED\x00", b"KDMV")
+
+
+def check_scratch_target(path: str):
+    """Rechaza ``path`` si es una imagen de disco de una VM.
+
+    Los motores escriben datos aleatorios sobre su fichero de trabajo, así
+    que apuntarlos a la imagen (o al overlay) de un guest la destruiría.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(8)
+    except FileNotFoundError:
+        return
+    if head.startswith(IMAGE_MAGICS):
+        raise ValueError(f"{path} es una imagen de disco de VM; el benchmark "
+                         f"de disco necesita un fichero de trabajo propio")
+
+
+class DiskIOJob:
+    """Parámetros de una ejecución del motor de E/S de disco"""
+    def __init__(self, path: str, operation: str = "read",
+                 pattern: str = "sequential", block_size: int = 1024 * 1024,
+                 queue_depth: int = 1, workers: int = 1,
+                 mode: str = "buffered", size: int = 64 * 1024 * 1024,
+                 runtime: Optional[float] = None, fsync: bool = True,
+                 seed: int = 0):
+        if operation not in OPERATIONS:
+            raise ValueError(f"Operación no soportada: {operation}")
+        if pattern not in PATTERNS:
+            raise ValueError(f"Patrón no soportado: {pattern}")
+        if mode not in IO_MODES:
+            raise ValueError(f"Modo de E/S no soportado: {mode}")
+        if block_size <= 0 or queue_depth <= 0 or workers <= 0:
+            raise ValueError("block_size, queue_depth y workers deben ser > 0")
+        if mode == "direct" and block_size % DIRECT_ALIGNMENT:
+            raise ValueError(f"O_DIRECT requiere bloques múltiplos de "
+                             f"{DIRECT_ALIGNMENT} bytes")
+        if size < block_size:
+            raise ValueError("size debe ser al menos un bloque")
+        self.path = path
+        self.operation = operation
+        self.pattern = pattern
+        self.block_size = block_size
+        self.queue_depth = queue_depth
+        self.workers = workers
+        self.mode = mode
+        self.size = size - (size % block_size)
+        self.runtime = runtime
+        self.fsync = fsync
+        self.seed = seed
+
+
+class _WorkerStats:
+    def __init__(self):
+        self.ops = 0
+        self.bytes = 0
+        self.latency = LatencyHistogram()
+        self.error = None
+
+    def record(self, nbytes: int, latency_ns: int):
+        self.ops += 1
+        self.bytes += nbytes
+        self.latency.record(latency_ns)
+
+
+class DiskIOEngine:
+    """Motor de E/S real sobre un fichero o dispositivo de bloques del host.
+
+    Cada worker mantiene ``queue_depth`` hilos emisores, de modo que la
+    concurrencia total es ``workers * queue_depth`` operaciones en vuelo.
+    Las llamadas ``pread``/``pwrite`` liberan el GIL, por lo que los hilos
+    se solapan realmente en el kernel. El fichero se sobrescribe: nunca debe
+    ser la imagen de una VM (``check_scratch_target``).
+    """
+    def __init__(self, job: DiskIOJob):
+        self.job = job
+        self._deadline = None
+
+    def prepare(self):
+        job = self.job
+        check_scratch_target(job.path)
+        flags = os.O_RDWR | os.O_CREAT
+        fd = os.open(job.path, flags, 0o644)
+        try:
+            st = os.fstat(fd)
+            if job.operation == "write":
+                if st.st_size < job.size:
+                    os.ftruncate(fd, job.size)
+                return
+            # Las lecturas sobre huecos de un fichero disperso no tocan el
+            # disco: se materializa la región si no está asignada.
+            if st.st_size >= job.size and st.st_blocks * 512 >= job.size:
+                return
+            chunk = os.urandom(min(job.block_size, 4 * 1024 * 1024))
+            offset = 0
+            while offset < job.size:
+                n = min(len(chunk), job.size - offset)
+                os.pwrite(fd, chunk[:n], offset)
+                offset += n
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _offsets(self, index: int, total: int) -> List[int]:
+        job = self.job
+        blocks = job.size // job.block_size
+        per_thread = max(1, blocks // total)
+        if job.pattern == "sequential":
+            first = (index * per_thread) % blocks
+            return [((first + i) % blocks) * job.block_size
+                    for i in range(per_thread)]
+        rng = random.Random(job.seed * 1000003 + index)
+        return [rng.randrange(blocks) * job.block_size
+                for _ in range(per_thread)]
+
+    def _open(self) -> int:
+        flags = os.O_RDONLY if self.job.operation == "read" else os.O_RDWR
+        if self.job.mode == "direct":
+            flags |= os.O_DIRECT
+        return os.open(self.job.path, flags)
+
+    def _worker(self, index: int, total: int, stats: _WorkerStats,
+                barrier: threading.Barrier):
+        job = self.job
+        offsets = self._offsets(index, total)
+        bs = job.block_size
+        # mmap anónimo: buffer alineado a página, válido para O_DIRECT
+        buf = mmap.mmap(-1, bs)
+        if job.operation == "write":
+            buf.write(os.urandom(bs))
+        view = memoryview(buf)
+        fd = -1
+        mapped = None
+        try:
+            fd = self._open()
+            if job.mode == "mmap":
+                access = mmap.ACCESS_READ if job.operation == "read" \
+                    else mmap.ACCESS_WRITE
+                mapped = mmap.mmap(fd, job.size, access=access)
+            barrier.wait()
+            clock = time.perf_counter_ns
+            deadline = self._deadline
+            while True:
+                for offset in offsets:
+                    t0 = clock()
+                    if mapped is not None:
+                        if job.operation == "read":
+                            view[:] = mapped[offset:offset + bs]
+                        else:
+                            mapped[offset:offset + bs] = view
+                        n = bs
+                    elif job.operation == "read":
+                        n = os.preadv(fd, [view], offset)
+                    else:
+                        n = os.pwritev(fd, [view], offset)
+                    stats.record(n, clock() - t0)
+                    if deadline is not None and clock() >= deadline:
+                        return
+                if deadline is None:
+                    return
+        except Exception as e:
+            stats.error = e
+            barrier.abort()
+        finally:
+            view.release()
+            if mapped is not None:
+                if job.operation == "write":
+                    mapped.flush()
+                mapped.close()
+            if fd >= 0:
+                if job.operation == "write" and job.fsync:
+                    os.fsync(fd)
+                os.close(fd)
+            buf.close()
+
+    def run(self) -> Dict:
+        job = self.job
+        self.prepare()
+        total = job.workers * job.queue_depth
+        stats = [_WorkerStats() for _ in range(total)]
+        barrier = threading.Barrier(total + 1)
+        threads = [
+            threading.Thread(target=self._worker,
+                             args=(i, total, stats[i], barrier), daemon=True)
+            for i in range(total)
+        ]
+        for t in threads:
+            t.start()
+        start = time.perf_counter_ns()
+        if job.runtime is not None:
+            self._deadline = start + int(job.runtime * 1e9)
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        for t in threads:
+            t.join()
+        elapsed_ns = time.perf_counter_ns() - start
+
+        errors = [s.error for s in stats if s.error is not None]
+        errors.sort(key=lambda e: isinstance(e, threading.BrokenBarrierError))
+        if errors:
+            raise errors[0]
+        return self._summarize(stats, elapsed_ns)
+
+    def _summarize(self, stats: List[_WorkerStats], elapsed_ns: int) -> Dict:
+        job = self.job
+        ops = sum(s.ops for s in stats)
+        nbytes = sum(s.bytes for s in stats)
+        elapsed = max(elapsed_ns / 1e9, 1e-9)
+        latency = LatencyHistogram()
+        for s in stats:
+            latency.merge(s.latency)
+        summary = latency.summary()
+        return {
+            'scope': 'host',
+            'operation': job.operation,
+            'pattern': job.pattern,
+            'mode': job.mode,
+            'block_size': job.block_size,
+            'queue_depth': job.queue_depth,
+            'workers': job.workers,
+            'ops': ops,
+            'bytes': nbytes,
+            'elapsed': round(elapsed, 6),
+            'mb_s': round(nbytes / (1024 * 1024) / elapsed, 2),
+            'iops': round(ops / elapsed, 2),
+            'lat_avg_ms': summary['mean'],
+            'lat_min_ms': summary['min'],
+            'lat_max_ms': summary['max'],
+            'lat_p50_ms': summary['p50'],
+            'lat_p90_ms': summary['p90'],
+            'lat_p99_ms': summary['p99'],
+            'lat_p999_ms': summary['p999'],
+            'latency_histogram': latency.to_dict(),
+        }
@@ -0,0 +1,90 @@
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Largest-Triangle-Three-Buckets: conserva el primer y el último punto
+    y, de cada cubo intermedio, el que forma el triángulo de mayor área con
+    el punto elegido antes y la media del cubo siguiente."""
+    n = len(x)
+    if points >= n or points < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    selected = np.empty(points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous]) -
+                      (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return x[selected], y[selected]
+
+
+def minmax(x: np.ndarray, y: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mínimo y máximo de cada cubo, en orden temporal: ningún pico se pierde."""
+    n = len(x)
+    buckets = points // 2
+    if points >= n or buckets < 1:
+        return x, y
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        window = y[start:end]
+        selected.extend(sorted({start + int(window.argmin()),
+                                start + int(window.argmax())}))
+    selected = np.asarray(selected)
+    return x[selected], y[selected]
+
+
+DOWNSAMPLERS = {'lttb': lttb, 'minmax': minmax}
+
+
+def downsample(x: Sequence[float], y: Sequence[float], points: int,
+               method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray]:
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Método de reducción desconocido: {method}")
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    return DOWNSAMPLERS[method](x, y, points)
+
+
+def phase_timeline(timestamps: Sequence[float], values: Sequence[float],
+                   phases: List[Dict], points: int = 200,
+                   method: str = 'lttb') -> Dict:
+    """Serie reducida por fase: cada fase (``name``, ``start``, ``end`` en el
+    mismo reloj que ``timestamps``) recibe hasta ``points`` puntos, así que
+    una fase corta no queda diluida en una ejecución larga. La media y el
+    máximo se calculan sobre las muestras originales. Los tiempos son
+    relativos a la primera muestra o al inicio de la primera fase."""
+    t = np.asarray(timestamps, dtype=np.float64)
+    v = np.asarray(values, dtype=np.float64)
+    starts = [float(t[0])] if len(t) else []
+    origin = min(starts + [p['start'] for p in phases], default=0.0)
+    timeline = {'method': method, 'points_per_phase': points,
+                'samples': int(len(t)), 'phases': []}
+    for phase in phases:
+        mask = (t >= phase['start']) & (t <= phase['end'])
+        entry = {'name': phase['name'],
+                 'start': round(phase['start'] - origin, 3),
+                 'end': round(phase['end'] - origin, 3),
+                 'samples': int(mask.sum())}
+        if entry['samples']:
+            x, y = downsample(t[mask] - origin, v[mask], points, method)
+            entry.update({'mean': round(float(v[mask].mean()), 2),
+                          'max': round(float(v[mask].max()), 2),
+                          't': np.round(x, 3).tolist(),
+                          'cpu_total': np.round(y, 2).tolist()})
+        timeline['phases'].append(entry)
+    return timeline
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Sustituto de qemu-system-x86_64 para pruebas sin hipervisor.
+
+Emite por stdout los marcadores de arranque por defecto con retardos
+configurables y termina al recibir Ctrl-A x (como ``-serial mon:stdio``)
+o SIGTERM. Uso: apuntar ``VirtualizationConfig.qemu_binary`` a este script
+o enlazarlo como ``qemu-system-x86_64`` en el PATH.
+
+Variables de entorno:
+    FAKE_QEMU_DELAYS   retardos en segundos entre etapas, p. ej. "0.1,0.3,0.2"
+    FAKE_QEMU_EXIT     si vale "1", termina tras el prompt de login
+    FAKE_QEMU_IGNORE   señales de parada a ignorar: "quit" (Ctrl-A x) y/o
+                       "term" (SIGTERM), p. ej. "quit,term" para forzar SIGKILL
+"""
+import os
+import select
+import signal
+import sys
+import time
+
+STAGES = [
+    b"SeaBIOS (version fake-1.16)\r\n",
+    b"[    0.000000] Linux version 6.1.0-fake\r\n",
+    b"\r\nfake-guest login: ",
+]
+
+
+def _terminate(signum, frame):
+    sys.stdout.buffer.write(b"qemu-system-x86_64: terminating on signal 15\r\n")
+    sys.stdout.buffer.flush()
+    sys.exit(0)
+
+
+def main():
+    ignore = os.environ.get("FAKE_QEMU_IGNORE", "").split(",")
+    signal.signal(signal.SIGTERM, signal.SIG_IGN if "term" in ignore else _terminate)
+    delays = [float(d) for d in
+              os.environ.get("FAKE_QEMU_DELAYS", "0.05,0.1,0.05").split(",")]
+    out = sys.stdout.buffer
+    for i, text in enumerate(STAGES):
+        time.sleep(delays[i] if i < len(delays) else 0)
+        out.write(text)
+        out.flush()
+    if os.environ.get("FAKE_QEMU_EXIT") == "1":
+        return 0
+    stdin = sys.stdin.buffer.fileno()
+    pending = b""
+    while True:
+        ready, _, _ = select.select([stdin], [], [], 1.0)
+        if not ready:
+            continue
+        data = os.read(stdin, 1024)
+        if not data:
+            return 0
+        pending = (pending + data)[-2:]
+        if b"\x01x" in pending and "quit" not in ignore:
+            out.write(b"QEMU: Terminated\r\n")
+            out.flush()
+            return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""Benchmark distribuido: agentes por host y un coordinador que reparte.
+
+    fleet.py agent --host 0.0.0.0 --port 7070
+    fleet.py run --agent h1:7070 --agent h2:7070 -- --simulate --sweep network_type=virtio,vhost-net
+
+Cada agente ejecuta la suite a petición y devuelve cada configuración en
+cuanto termina. El protocolo es JSON por líneas sobre TCP. La petición es
+``{"type": "run", "configurations": [...], "options": {...}}`` o
+``{"type": "ping"}``. El agente responde ``hello``, después ``result``
+(uno por configuración) y ``heartbeat`` mientras mide, y termina con
+``done``, ``error`` o ``busy``.
+
+No hay cifrado: use ``--token`` y una red de confianza.
+"""
+import argparse
+import hmac
+import json
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from network_engine import parse_target
+from result_cache import config_fields, host_fingerprint
+from virtualization_benchmark import (IOVirtualizationBenchmark, VirtualizationConfig,
+                                      build_configurations, repetition_options,
+                                      parse_args as parse_benchmark_args)
+
+DEFAULT_PORT = 7070
+PROTOCOL_VERSION = 1
+HEARTBEAT = 5.0
+# Parámetros del benchmark que fija el coordinador; el ejecutable de QEMU,
+# la caché, el store y el pool de imágenes son de cada agente
+BENCHMARK_OPTIONS = ('real_vm', 'sample_rate', 'base_image', 'repetition',
+                     'simulate', 'seed', 'series_points', 'downsample')
+# Estados de un agente tras los que merece la pena reintentar
+RETRYABLE = ('busy', 'failed')
+
+
+def config_from_dict(fields: Dict) -> VirtualizationConfig:
+    config = VirtualizationConfig(fields['name'], fields['disk_type'],
+                                  fields['network_type'])
+    for key, value in fields.items():
+        setattr(config, key, value)
+    return config
+
+
+def _encode(message: Dict) -> bytes:
+    return (json.dumps(message, default=str) + "\n").encode()
+
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.agent.serve(self.connection, self.rfile)
+
+
+class _AgentServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class BenchmarkAgent:
+    """Ejecuta el benchmark a petición de un coordinador.
+
+    Atiende una ejecución cada vez: mientras mide, las demás peticiones
+    reciben ``busy``. Si el coordinador se desconecta la ejecución sigue
+    hasta el final. Con caché, el reintento del coordinador recibe de
+    inmediato lo ya medido.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 name: Optional[str] = None, qemu_binary: str = "qemu-system-x86_64",
+                 cache_dir: Optional[str] = None,
+                 store_dir: Optional[str] = None,
+                 image_dir: str = "/tmp/vm_image_pool",
+                 token: Optional[str] = None, heartbeat: float = HEARTBEAT):
+        self.server = _AgentServer((host, port), _AgentHandler)
+        self.server.agent = self
+        self.address = self.server.server_address
+        self.name = name or f"{socket.gethostname()}:{self.address[1]}"
+        self.qemu_binary = qemu_binary
+        self.cache_dir = cache_dir
+        self.store_dir = store_dir
+        self.image_dir = image_dir
+        self.token = token
+        self.heartbeat = heartbeat
+        self._busy = threading.Lock()
+
+    def hello(self) -> Dict:
+        return {'type': 'hello', 'version': PROTOCOL_VERSION, 'agent': self.name,
+                'hostname': socket.gethostname(),
+                'host': host_fingerprint(self.qemu_binary)}
+
+    def serve(self, sock: socket.socket, rfile):
+        lock = threading.Lock()
+
+        def send(message: Dict):
+            with lock:
+                sock.sendall(_encode(message))
+
+        try:
+            request = json.loads(rfile.readline() or "null")
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            send({'type': 'error', 'message': "petición inválida"})
+            return
+        if self.token and not hmac.compare_digest(str(request.get('token')), self.token):
+            send({'type': 'error', 'message': "token inválido"})
+            return
+        if request.get('type') == 'ping':
+            send(self.hello())
+            return
+        if request.get('type') != 'run':
+            send({'type': 'error', 'message': f"petición desconocida: {request.get('type')}"})
+            return
+        if not self._busy.acquire(blocking=False):
+            send({'type': 'busy'})
+            return
+        try:
+            send(self.hello())
+            self.run(request, send)
+        finally:
+            self._busy.release()
+
+    def run(self, request: Dict, send: Callable[[Dict], None]):
+        started = time.monotonic()
+        connected = threading.Event()
+        connected.set()
+        stop = threading.Event()
+
+        def deliver(message: Dict):
+            if not connected.is_set():
+                return
+            try:
+                send(message)
+            except OSError:
+                connected.clear()
+                print("[WARN] Coordinador desconectado: la ejecución continúa")
+
+        def beat():
+            while not stop.wait(self.heartbeat):
+                deliver({'type': 'heartbeat',
+                         'elapsed': round(time.monotonic() - started, 3)})
+
+        try:
+            configurations = [config_from_dict(c) for c in request['configurations']]
+            options = {k: v for k, v in (request.get('options') or {}).items()
+                       if k in BENCHMARK_OPTIONS}
+            benchmark = IOVirtualizationBenchmark(image_dir=self.image_dir,
+                                                  cache_dir=self.cache_dir,
+                                                  store_dir=self.store_dir, **options)
+        except (KeyError, TypeError, ValueError) as e:
+            deliver({'type': 'error', 'message': f"petición inválida: {e}"})
+            return
+        print(f"[INFO] {self.name}: {len(configurations)} configuraciones")
+        threading.Thread(target=beat, daemon=True).start()
+        try:
+            metrics = benchmark.run_comparison(
+                qemu_binary=self.qemu_binary,
+                boot_timeout=request.get('boot_timeout', 120.0),
+                workers=request.get('workers', 1),
+                configurations=configurations,
+                on_result=lambda config, m: deliver(
+                    {'type': 'result', 'config': config.name, 'metrics': m}))
+            benchmark.end_run()
+            deliver({'type': 'done', 'configs': len(metrics),
+                     'elapsed': round(time.monotonic() - started, 3)})
+        except Exception as e:
+            benchmark.end_run("failed")
+            print(f"[ERROR] {self.name}: {e}")
+            deliver({'type': 'error', 'message': str(e)})
+        finally:
+            stop.set()
+
+    def serve_forever(self):
+        host, port = self.address
+        print(f"[INFO] Agente {self.name} escuchando en {host}:{port}", flush=True)
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+class FleetCoordinator:
+    """Lanza la misma matriz de configuraciones en varios agentes a la vez
+    y junta los resultados, cada uno etiquetado con el host que lo midió.
+
+    ``timeout`` es el silencio máximo de un agente (mientras mide envía
+    latidos); pasado ese tiempo se abandona y se conserva lo recibido.
+    ``deadline`` limita la ejecución completa. Un agente inalcanzable,
+    ocupado o que corta la conexión se reintenta ``retries`` veces, y cada
+    reintento pide solo las configuraciones que faltan.
+    """
+    def __init__(self, agents: List[str], timeout: float = 60.0,
+                 deadline: Optional[float] = None, retries: int = 2,
+                 token: Optional[str] = None, connect_timeout: float = 5.0,
+                 backoff: float = 1.0):
+        if not agents:
+            raise ValueError("No se indicó ningún agente")
+        self.agents = [parse_target(a) for a in agents]
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.token = token
+        self.connect_timeout = connect_timeout
+        self.backoff = backoff
+        self._expires = None
+        self._print_lock = threading.Lock()
+
+    def _remaining(self) -> float:
+        if self._expires is None:
+            return float("inf")
+        return self._expires - time.monotonic()
+
+    def _wait(self, limit: float) -> float:
+        remaining = self._remaining()
+        if remaining <= 0:
+            raise TimeoutError("plazo total agotado")
+        return min(limit, remaining)
+
+    def ping(self, agent) -> Dict:
+        with socket.create_connection(agent, timeout=self.connect_timeout) as sock:
+            sock.sendall(_encode({'type': 'ping', 'token': self.token}))
+            line = sock.makefile("r", encoding="utf-8").readline()
+        if not line:
+            raise ConnectionError("el agente cerró la conexión")
+        return json.loads(line)
+
+    def run(self, configurations: List[VirtualizationConfig], options: Dict,
+            boot_timeout: float = 120.0, workers: int = 1) -> Dict:
+        started = time.monotonic()
+        self._expires = started + self.deadline if self.deadline else None
+        request = {'type': 'run', 'token': self.token,
+                   'options': {k: v for k, v in options.items() if k in BENCHMARK_OPTIONS},
+                   'boot_timeout': boot_timeout, 'workers': workers}
+        payload = [config_fields(c) for c in configurations]
+        with ThreadPoolExecutor(max_workers=len(self.agents)) as pool:
+            outcomes = list(pool.map(lambda a: self._drive(a, payload, request),
+                                     self.agents))
+        metrics = []
+        for outcome in outcomes:
+            metrics.extend(outcome.pop('metrics'))
+        return {'metrics': metrics, 'agents': outcomes,
+                'configurations': len(payload),
+                'elapsed': round(time.monotonic() - started, 3)}
+
+    def _drive(self, agent, payload: List[Dict], request: Dict) -> Dict:
+        address = f"{agent[0]}:{agent[1]}"
+        outcome = {'agent': address, 'host': address, 'status': 'pending',
+                   'expected': len(payload), 'received': 0, 'attempts': 0,
+                   'error': None, 'fingerprint': None}
+        results = {}
+        started = time.monotonic()
+        while True:
+            outcome['attempts'] += 1
+            pending = [c for c in payload if c['name'] not in results]
+            try:
+                status = self._session(agent, {**request, 'configurations': pending},
+                                       results, outcome)
+            except (socket.timeout, TimeoutError):
+                expired = self._remaining() <= 0
+                status = 'deadline' if expired else 'timeout'
+                outcome['error'] = (f"plazo total de {self.deadline} s agotado"
+                                    if expired else f"sin respuesta en {self.timeout} s")
+            except (OSError, ValueError) as e:
+                status, outcome['error'] = 'failed', str(e)
+            if status == 'busy':
+                outcome['error'] = "ocupado con otra ejecución"
+            if (status in RETRYABLE and outcome['attempts'] <= self.retries
+                    and self._remaining() > self.backoff * outcome['attempts']):
+                self._log(f"[WARN] {outcome['host']}: {outcome['error']}; "
+                          f"reintento {outcome['attempts']}/{self.retries}")
+                time.sleep(self.backoff * outcome['attempts'])
+                continue
+            break
+        if status == 'completed':
+            outcome['error'] = None
+            if len(results) < len(payload):
+                status = 'partial'
+        outcome['status'] = status
+        outcome['received'] = len(results)
+        outcome['elapsed'] = round(time.monotonic() - started, 3)
+        outcome['metrics'] = [results[c['name']] for c in payload if c['name'] in results]
+        level = "[OK]" if status == 'completed' else "[WARN]"
+        self._log(f"{level} {outcome['host']}: {status}, {len(results)}/{len(payload)} "
+                  f"configuraciones en {outcome['elapsed']} s")
+        return outcome
+
+    def _session(self, agent, request: Dict, results: Dict, outcome: Dict) -> str:
+        with socket.create_connection(agent, timeout=self._wait(self.connect_timeout)) as sock:
+            sock.sendall(_encode(request))
+            stream = sock.makefile("r", encoding="utf-8")
+            while True:
+                sock.settimeout(self._wait(self.timeout))
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError("el agente cerró la conexión")
+                message = json.loads(line)
+                kind = message.get('type')
+                if kind == 'hello':
+                    outcome['host'] = message.get('agent', outcome['host'])
+                    outcome['fingerprint'] = message.get('host')
+                elif kind == 'result':
+                    metrics = message['metrics']
+                    metrics['host'] = outcome['host']
+                    results[message['config']] = metrics
+                    self._log(f"[OK] {outcome['host']}: {message['config']} "
+                              f"({len(results)}/{outcome['expected']})")
+                elif kind == 'done':
+                    return 'completed'
+                elif kind == 'busy':
+                    return 'busy'
+                elif kind == 'error':
+                    outcome['error'] = message.get('message')
+                    return 'error'
+
+    def _log(self, text: str):
+        with self._print_lock:
+            print(text, flush=True)
+
+
+FLEET_METRICS = (('disk_read_speed', 'Lect MB/s'), ('disk_write_speed', 'Escr MB/s'),
+                 ('network_throughput', 'Red Mbps'), ('cpu_overhead', 'CPU %'))
+
+
+def format_fleet(fleet: Dict) -> str:
+    lines = ["\nFLOTA: ESTADO DE LOS AGENTES"]
+    lines.append(f"{'Host':<32} {'Estado':<10} {'Configs':>8} {'Intentos':>9} "
+                 f"{'Tiempo s':>9}  Error")
+    lines.append("-" * 90)
+    for outcome in fleet['agents']:
+        lines.append(f"{outcome['host'][:32]:<32} {outcome['status']:<10} "
+                     f"{outcome['received']:>4}/{outcome['expected']:<3} "
+                     f"{outcome['attempts']:>9} {outcome['elapsed']:>9.1f}  "
+                     f"{outcome['error'] or ''}")
+    lines.append("-" * 90)
+    if not fleet['metrics']:
+        return "\n".join(lines)
+    lines.append("\nFLOTA: RESULTADOS POR HOST")
+    lines.append(f"{'Configuración':<36} {'Host':<24}" +
+                 "".join(f"{label:>11}" for _, label in FLEET_METRICS))
+    lines.append("-" * (60 + 11 * len(FLEET_METRICS)))
+    for m in sorted(fleet['metrics'], key=lambda m: (m.get('config_name') or '',
+                                                     m['host'])):
+        lines.append(f"{(m.get('config_name') or '')[:36]:<36} {m['host'][:24]:<24}" +
+                     "".join(f"{m.get(field) or 0:>11.2f}" for field, _ in FLEET_METRICS))
+    lines.append("-" * (60 + 11 * len(FLEET_METRICS)))
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    benchmark_argv = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, benchmark_argv = argv[:split], argv[split + 1:]
+    parser = argparse.ArgumentParser(
+        description="Benchmark de virtualización de E/S en varios hosts",
+        epilog="Los argumentos tras '--' son los de virtualization_benchmark.py")
+    commands = parser.add_subparsers(dest="command", required=True)
+    agent = commands.add_parser("agent", help="Atender peticiones de un coordinador")
+    agent.add_argument("--host", default="127.0.0.1",
+                       help="Dirección de escucha (0.0.0.0 para toda la red)")
+    agent.add_argument("--port", type=int, default=DEFAULT_PORT,
+                       help="Puerto de escucha (0 = uno libre)")
+    agent.add_argument("--name", default=None,
+                       help="Nombre del host en los resultados (por defecto "
+                            "<hostname>:<puerto>)")
+    agent.add_argument("--qemu-binary", default="qemu-system-x86_64")
+    agent.add_argument("--cache", default="",
+                       help="Caché de resultados del agente (desactivada por "
+                            "defecto; con ella los reintentos no repiten lo medido)")
+    agent.add_argument("--store", default="",
+                       help="Almacén de resultados del agente ('' lo desactiva)")
+    agent.add_argument("--image-dir", default="/tmp/vm_image_pool")
+    agent.add_argument("--token", default=None,
+                       help="Secreto compartido que deben presentar las peticiones")
+    agent.add_argument("--heartbeat", type=float, default=HEARTBEAT,
+                       help="Segundos entre latidos mientras se mide")
+    run = commands.add_parser("run", help="Repartir la matriz entre los agentes")
+    run.add_argument("--agent", action="append", required=True, metavar="HOST:PUERTO",
+                     help="Agente (repetible)")
+    run.add_argument("--timeout", type=float, default=60.0,
+                     help="Silencio máximo de un agente en segundos")
+    run.add_argument("--deadline", type=float, default=None,
+                     help="Tiempo máximo de toda la ejecución en segundos")
+    run.add_argument("--retries", type=int, default=2,
+                     help="Reintentos de un agente inalcanzable u ocupado")
+    run.add_argument("--token", default=None)
+    run.add_argument("--output", default="fleet_results.json")
+    ping = commands.add_parser("ping", help="Comprobar agentes")
+    ping.add_argument("--agent", action="append", required=True, metavar="HOST:PUERTO")
+    ping.add_argument("--token", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "agent":
+        try:
+            server = BenchmarkAgent(args.host, args.port, args.name, args.qemu_binary,
+                                    args.cache or None, args.store or None,
+                                    args.image_dir, args.token, args.heartbeat)
+        except OSError as e:
+            print(f"[ERROR] No se pudo escuchar en {args.host}:{args.port}: {e}")
+            return 1
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n[INFO] Agente detenido")
+        return 0
+
+    try:
+        coordinator = FleetCoordinator(args.agent, token=args.token,
+                                       **({} if args.command == "ping" else
+                                          {'timeout': args.timeout,
+                                           'deadline': args.deadline,
+                                           'retries': args.retries}))
+    except ValueError as e:
+        parser.error(str(e))
+    if args.command == "ping":
+        failed = 0
+        for agent in coordinator.agents:
+            address = f"{agent[0]}:{agent[1]}"
+            try:
+                hello = coordinator.ping(agent)
+                if hello.get('type') != 'hello':
+                    raise ValueError(hello.get('message', hello.get('type')))
+                print(f"[OK] {address}: {hello['agent']} ({hello['host'].get('cpu_model')}, "
+                      f"QEMU {hello['host'].get('qemu') or 'no disponible'})")
+            except (OSError, ValueError) as e:
+                print(f"[ERROR] {address}: {e}")
+                failed += 1
+        return 1 if failed else 0
+
+    benchmark_args = parse_benchmark_args(benchmark_argv)
+    if benchmark_args.density:
+        parser.error("--density no está soportado en la flota")
+    configurations = build_configurations(benchmark_args)
+    options = {'real_vm': benchmark_args.real_vm, 'sample_rate': benchmark_args.sample_rate,
+               'base_image': benchmark_args.base_image,
+               'repetition': repetition_options(benchmark_args),
+               'simulate': benchmark_args.simulate, 'seed': benchmark_args.seed,
+               'series_points': benchmark_args.series_points,
+               'downsample': benchmark_args.downsample}
+    print(f"[INFO] {len(configurations)} configuraciones en {len(coordinator.agents)} agentes")
+    try:
+        fleet = coordinator.run(configurations, options, benchmark_args.boot_timeout,
+                                benchmark_args.workers)
+    except KeyboardInterrupt:
+        print("\n[WARN] Proceso interrumpido por el usuario")
+        return 1
+    print(format_fleet(fleet))
+    data = {'timestamp': datetime.now().isoformat(), 'metrics': fleet.pop('metrics'),
+            'fleet': fleet}
+    with open(args.output, "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"[OK] Resultados de la flota guardados en {args.output}")
+    if not data['metrics']:
+        print("[ERROR] Ningún agente devolvió resultados")
+        return 1
+    incomplete = [a['host'] for a in fleet['agents'] if a['status'] != 'completed']
+    if incomplete:
+        print(f"[WARN] Resultados incompletos de: {', '.join(incomplete)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
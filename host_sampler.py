@@ -0,0 +1,297 @@
+import os
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+import psutil
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class RingBuffer:
+    """Buffer circular de dobles preasignado; no crece con el tiempo."""
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity debe ser > 0")
+        self.capacity = capacity
+        self.data = array('d', bytes(8 * capacity))
+        self.count = 0
+
+    def append(self, value: float):
+        self.data[self.count % self.capacity] = value
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def segments(self) -> List[memoryview]:
+        """Vistas en orden cronológico sobre el buffer, sin copiar."""
+        view = memoryview(self.data)
+        if self.count <= self.capacity:
+            return [view[:self.count]]
+        head = self.count % self.capacity
+        return [view[head:], view[:head]]
+
+    def as_numpy(self):
+        """Vista NumPy sin copia; solo copia si el buffer ya dio la vuelta."""
+        if np is None:
+            raise ImportError("NumPy no está instalado")
+        parts = [np.frombuffer(s, dtype=np.float64) for s in self.segments()]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def clear(self):
+        self.count = 0
+
+
+class _ProcReader:
+    """Lee contadores de /proc reutilizando descriptores abiertos."""
+    def __init__(self):
+        self._fds = {}
+        self._partitions = {}
+        for name in ("stat", "diskstats", "net/dev"):
+            try:
+                self._fds[name] = os.open(f"/proc/{name}", os.O_RDONLY)
+            except OSError:
+                pass
+
+    @property
+    def available(self) -> bool:
+        return "stat" in self._fds
+
+    def _read(self, name: str) -> str:
+        fd = self._fds.get(name)
+        if fd is None:
+            return ""
+        chunks = []
+        offset = 0
+        while True:
+            chunk = os.pread(fd, 65536, offset)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+        return b"".join(chunks).decode()
+
+    def cpu(self) -> Tuple[List[Tuple[int, int]], int, int]:
+        cores, intr, ctxt = [], 0, 0
+        for line in self._read("stat").splitlines():
+            if line.startswith("cpu") and line[3:4].isdigit():
+                v = [int(x) for x in line.split()[1:]]
+                idle = v[3] + (v[4] if len(v) > 4 else 0)
+                cores.append((sum(v[:8]), idle))
+            elif line.startswith("intr "):
+                intr = int(line.split(None, 2)[1])
+            elif line.startswith("ctxt "):
+                ctxt = int(line.split()[1])
+        return cores, intr, ctxt
+
+    def disk(self) -> Tuple[int, int]:
+        read = write = 0
+        for line in self._read("diskstats").splitlines():
+            f = line.split()
+            # Solo dispositivos completos, no particiones ni loop/ram
+            if len(f) < 10 or f[2].startswith(("loop", "ram", "dm-")):
+                continue
+            if f[2] not in self._partitions:
+                self._partitions[f[2]] = os.path.exists(
+                    f"/sys/class/block/{f[2]}/partition")
+            if self._partitions[f[2]]:
+                continue
+            read += int(f[5]) * 512
+            write += int(f[9]) * 512
+        return read, write
+
+    def net(self) -> Tuple[int, int]:
+        rx = tx = 0
+        for line in self._read("net/dev").splitlines()[2:]:
+            name, _, data = line.partition(":")
+            if name.strip() == "lo":
+                continue
+            f = data.split()
+            rx += int(f[0])
+            tx += int(f[8])
+        return rx, tx
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds = {}
+
+
+class HostSampler:
+    """Muestreador de alta frecuencia del host con memoria constante.
+
+    Cada métrica (CPU total y por núcleo, interrupciones, cambios de
+    contexto, bytes de disco y de red por segundo) se guarda en un
+    ``RingBuffer``. La planificación es absoluta (``inicio + k * periodo``),
+    de modo que el tiempo de muestreo no acumula deriva; los ticks perdidos
+    se saltan y se cuentan en ``missed``.
+    """
+    def __init__(self, frequency: float = 100.0, capacity: int = 65536,
+                 cpu_set: Optional[List[int]] = None, clock=None,
+                 counter_source: Optional[Callable[[], Dict]] = None):
+        if frequency <= 0:
+            raise ValueError("frequency debe ser > 0")
+        self.frequency = frequency
+        self.period = 1.0 / frequency
+        self.capacity = capacity
+        self.cpu_set = cpu_set
+        self.clock = clock or time
+        self.counter_source = counter_source
+        # Una fuente simulada fija su propio número de núcleos
+        self.ncores = (getattr(counter_source, 'ncores', None) or
+                       psutil.cpu_count() or 1)
+        names = ["timestamp", "cpu_total", "interrupts_per_s",
+                 "ctx_switches_per_s", "disk_read_bytes_per_s",
+                 "disk_write_bytes_per_s", "net_rx_bytes_per_s",
+                 "net_tx_bytes_per_s"]
+        names += [f"cpu{i}" for i in range(self.ncores)]
+        self.buffers = {name: RingBuffer(capacity) for name in names}
+        self.missed = 0
+        self.busy_time = 0.0
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._timer = None
+        self._reader = None
+        self._previous = None
+
+    def _read_counters(self) -> Dict:
+        if self.counter_source is not None:
+            return self.counter_source()
+        if self._reader is not None and self._reader.available:
+            cores, intr, ctxt = self._reader.cpu()
+            disk = self._reader.disk()
+            net = self._reader.net()
+        else:
+            cores = [(sum(t), t.idle + getattr(t, "iowait", 0))
+                     for t in psutil.cpu_times(percpu=True)]
+            stats = psutil.cpu_stats()
+            intr, ctxt = stats.interrupts, stats.ctx_switches
+            d = psutil.disk_io_counters()
+            disk = (d.read_bytes, d.write_bytes) if d else (0, 0)
+            n = psutil.net_io_counters()
+            net = (n.bytes_recv, n.bytes_sent) if n else (0, 0)
+        return {'time': time.time(), 'mono': time.perf_counter(),
+                'cores': cores, 'intr': intr, 'ctxt': ctxt,
+                'disk': disk, 'net': net}
+
+    def sample(self):
+        current = self._read_counters()
+        previous, self._previous = self._previous, current
+        if previous is None:
+            return
+        dt = max(current['mono'] - previous['mono'], 1e-9)
+        b = self.buffers
+        per_core = []
+        for (total, idle), (total0, idle0) in zip(current['cores'], previous['cores']):
+            delta = total - total0
+            per_core.append(100.0 * (delta - (idle - idle0)) / delta if delta > 0 else 0.0)
+        for i, value in enumerate(per_core[:self.ncores]):
+            b[f"cpu{i}"].append(value)
+        selected = [per_core[c] for c in self.cpu_set if c < len(per_core)] \
+            if self.cpu_set else per_core
+        b["timestamp"].append(current['time'])
+        b["cpu_total"].append(sum(selected) / len(selected) if selected else 0.0)
+        b["interrupts_per_s"].append((current['intr'] - previous['intr']) / dt)
+        b["ctx_switches_per_s"].append((current['ctxt'] - previous['ctxt']) / dt)
+        b["disk_read_bytes_per_s"].append((current['disk'][0] - previous['disk'][0]) / dt)
+        b["disk_write_bytes_per_s"].append((current['disk'][1] - previous['disk'][1]) / dt)
+        b["net_rx_bytes_per_s"].append((current['net'][0] - previous['net'][0]) / dt)
+        b["net_tx_bytes_per_s"].append((current['net'][1] - previous['net'][1]) / dt)
+
+    def _timed_sample(self):
+        t0 = self.clock.perf_counter()
+        self.sample()
+        self.busy_time += self.clock.perf_counter() - t0
+
+    def _run(self):
+        clock = time.perf_counter
+        start = clock()
+        tick = 0
+        while not self._stop.is_set():
+            t0 = clock()
+            self.sample()
+            self.busy_time += clock() - t0
+            tick += 1
+            next_time = start + tick * self.period
+            now = clock()
+            if now > next_time:
+                skipped = int((now - next_time) / self.period) + 1
+                self.missed += skipped
+                tick += skipped
+                next_time = start + tick * self.period
+            self._stop.wait(next_time - now)
+
+    def start(self):
+        if self._thread is not None or self._timer is not None:
+            return
+        self._reader = _ProcReader() if self.counter_source is None else None
+        self._previous = None
+        self._stop.clear()
+        self.started_at = self.clock.perf_counter()
+        self.stopped_at = 0.0
+        self.sample()
+        if getattr(self.clock, "virtual", False):
+            # Con reloj virtual las muestras se toman al avanzar el reloj
+            self._timer = self.clock.call_every(self.period, self._timed_sample)
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._timer is not None:
+            self.clock.cancel(self._timer)
+            self._timer = None
+        elif self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=1)
+            self._thread = None
+        else:
+            return
+        self.stopped_at = self.clock.perf_counter()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def __len__(self) -> int:
+        return len(self.buffers["timestamp"])
+
+    def series(self) -> Dict:
+        """Series como vistas NumPy (o memoryviews si NumPy no está)."""
+        if np is None:
+            return {name: buf.segments() for name, buf in self.buffers.items()}
+        return {name: buf.as_numpy() for name, buf in self.buffers.items()}
+
+    def mean(self, name: str) -> float:
+        buf = self.buffers[name]
+        n = len(buf)
+        return sum(sum(s) for s in buf.segments()) / n if n else 0.0
+
+    def summary(self) -> Dict:
+        elapsed = (self.stopped_at or self.clock.perf_counter()) - self.started_at
+        taken = self.buffers["timestamp"].count
+        result = {
+            'frequency_hz': self.frequency,
+            'samples': taken,
+            'retained': len(self),
+            'achieved_hz': round(taken / elapsed, 2) if elapsed > 0 else 0,
+            'missed_ticks': self.missed,
+            'overhead_percent': round(self.busy_time / elapsed * 100, 3)
+                                if elapsed > 0 else 0,
+        }
+        for name in self.buffers:
+            if name != "timestamp" and not name[3:].isdigit():
+                result[f'{name}_mean'] = round(self.mean(name), 2)
+        return result
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,438 @@
+import argparse
+import mmap
+import os
+import re
+import stat
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from latency_histogram import LatencyHistogram
+from disk_io_engine import check_scratch_target
+
+READ, WRITE = 0, 1
+OP_NAMES = ('read', 'write')
+PACES = ("fast", "recorded")
+CACHE_MODES = ("cold", "warm")
+SECTOR_SIZE = 512
+CSV_HEADER = "time_s,op,offset,size"
+# Formato binario: magia + registros (tiempo relativo, offset, tamaño, tipo)
+_MAGIC = b"IOTR\x01"
+_RECORD = struct.Struct("<dQIB3x")
+# blkparse (salida por defecto): dev cpu seq tiempo pid acción RWBS sector + n
+_BLKPARSE = re.compile(r"^\s*\d+,\d+\s+\d+\s+\d+\s+(\d+\.\d+)\s+\d+\s+([A-Z]+)\s+"
+                       r"([A-Z]+)\s+(\d+)\s+\+\s+(\d+)")
+# strace -ttt/-tt (opcionalmente -f): pread64/pwrite64/preadv/pwritev con offset
+_STRACE = re.compile(r"^(?:\[pid\s+\d+\]\s+|\d+\s+)?(\d+\.\d+|\d\d:\d\d:\d\d\.\d+)\s+"
+                     r"(pread64|pwrite64|preadv|pwritev)\((\d+),.*,\s*(\d+)\)\s+=\s+(\d+)")
+
+
+def _strace_time(text: str) -> float:
+    if ":" not in text:
+        return float(text)
+    hours, minutes, seconds = text.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+class IOTrace:
+    """Traza de E/S: tiempo relativo (s), tipo, offset y tamaño de cada
+    operación, en arrays compactos."""
+    def __init__(self, name: str = "trace"):
+        self.name = name
+        self.times = array('d')
+        self.ops = array('B')
+        self.offsets = array('Q')
+        self.sizes = array('I')
+
+    def append(self, t: float, op: int, offset: int, size: int):
+        self.times.append(t)
+        self.ops.append(op)
+        self.offsets.append(offset)
+        self.sizes.append(size)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def normalize(self) -> 'IOTrace':
+        """Ordena por tiempo y hace que la primera operación ocurra en t=0."""
+        order = sorted(range(len(self)), key=self.times.__getitem__)
+        first = self.times[order[0]] if order else 0.0
+        self.times = array('d', (self.times[i] - first for i in order))
+        self.ops = array('B', (self.ops[i] for i in order))
+        self.offsets = array('Q', (self.offsets[i] for i in order))
+        self.sizes = array('I', (self.sizes[i] for i in order))
+        return self
+
+    @property
+    def duration(self) -> float:
+        return self.times[-1] if len(self) else 0.0
+
+    @property
+    def extent(self) -> int:
+        """Tamaño mínimo del fichero para contener todas las operaciones."""
+        return max((o + s for o, s in zip(self.offsets, self.sizes)), default=0)
+
+    def ranges(self, op: int) -> List[Tuple[int, int]]:
+        """Rangos [inicio, fin) tocados por ``op``, fusionados."""
+        spans = sorted((o, o + s) for o, s, kind in
+                       zip(self.offsets, self.sizes, self.ops) if kind == op)
+        merged = []
+        for start, end in spans:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return [tuple(r) for r in merged]
+
+    def summary(self) -> Dict:
+        counts, volume = [0, 0], [0, 0]
+        for op, size in zip(self.ops, self.sizes):
+            counts[op] += 1
+            volume[op] += size
+        return {'name': self.name, 'ops': len(self),
+                'reads': counts[READ], 'writes': counts[WRITE],
+                'read_bytes': volume[READ], 'write_bytes': volume[WRITE],
+                'duration_s': round(self.duration, 6), 'extent_bytes': self.extent}
+
+    def save(self, path: str):
+        """``.csv`` como texto; cualquier otra extensión en formato binario."""
+        if path.endswith(".csv"):
+            with open(path, "w") as f:
+                f.write(CSV_HEADER + "\n")
+                for t, op, offset, size in zip(self.times, self.ops,
+                                               self.offsets, self.sizes):
+                    f.write(f"{t:.9f},{'RW'[op]},{offset},{size}\n")
+            return
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            for record in zip(self.times, self.offsets, self.sizes, self.ops):
+                f.write(_RECORD.pack(*record))
+
+    @classmethod
+    def load(cls, path: str) -> 'IOTrace':
+        trace = cls(os.path.basename(path))
+        with open(path, "rb") as f:
+            data = f.read()
+        if data.startswith(_MAGIC):
+            body = memoryview(data)[len(_MAGIC):]
+            for t, offset, size, op in _RECORD.iter_unpack(body[:len(body) -
+                                                              len(body) % _RECORD.size]):
+                trace.append(t, op, offset, size)
+            return trace
+        for number, line in enumerate(data.decode().splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith("#") or line == CSV_HEADER:
+                continue
+            try:
+                t, op, offset, size = line.split(",")
+                trace.append(float(t), "RW".index(op.strip().upper()[0]),
+                             int(offset), int(size))
+            except ValueError:
+                raise ValueError(f"{path}:{number}: línea de traza inválida: {line}")
+        return trace
+
+    @classmethod
+    def from_blktrace(cls, lines: Iterable[str], action: str = "Q",
+                      name: str = "blktrace") -> 'IOTrace':
+        """Eventos ``action`` (Q = encolado, D = enviado al driver) de blkparse."""
+        trace = cls(name)
+        for line in lines:
+            match = _BLKPARSE.match(line)
+            if not match or match.group(2) != action:
+                continue
+            rwbs = match.group(3)
+            if "R" in rwbs:
+                op = READ
+            elif "W" in rwbs:
+                op = WRITE
+            else:
+                continue
+            sectors = int(match.group(5))
+            if sectors:
+                trace.append(float(match.group(1)), op,
+                             int(match.group(4)) * SECTOR_SIZE, sectors * SECTOR_SIZE)
+        return trace.normalize()
+
+    @classmethod
+    def from_strace(cls, lines: Iterable[str], fd: Optional[int] = None,
+                    name: str = "strace") -> 'IOTrace':
+        """Llamadas posicionales de ``strace -ttt -e trace=pread64,pwrite64``
+        (el tamaño es el devuelto por la llamada)."""
+        trace = cls(name)
+        for line in lines:
+            match = _STRACE.match(line)
+            if not match or (fd is not None and int(match.group(3)) != fd):
+                continue
+            size = int(match.group(5))
+            if size:
+                op = READ if match.group(2).startswith("pread") else WRITE
+                trace.append(_strace_time(match.group(1)), op,
+                             int(match.group(4)), size)
+        return trace.normalize()
+
+
+class TraceReplayJob:
+    """Parámetros de una reproducción de traza"""
+    def __init__(self, path: str, trace: IOTrace, pace: str = "fast",
+                 cache: str = "warm", queue_depth: int = 1,
+                 speed: float = 1.0, fsync: bool = True):
+        if pace not in PACES:
+            raise ValueError(f"Ritmo no soportado: {pace}")
+        if cache not in CACHE_MODES:
+            raise ValueError(f"Modo de caché no soportado: {cache}")
+        if queue_depth <= 0 or speed <= 0:
+            raise ValueError("queue_depth y speed deben ser > 0")
+        if not len(trace):
+            raise ValueError(f"La traza {trace.name} está vacía")
+        self.path = path
+        self.trace = trace
+        self.pace = pace
+        self.cache = cache
+        self.queue_depth = queue_depth
+        self.speed = speed
+        self.fsync = fsync
+
+
+class _ReplayStats:
+    def __init__(self):
+        self.ops = [0, 0]
+        self.bytes = [0, 0]
+        self.latency = (LatencyHistogram(), LatencyHistogram())
+        self.lag = LatencyHistogram()
+        self.error = None
+
+
+class TraceReplayEngine:
+    """Reproduce una ``IOTrace`` en el host sobre un fichero raw o un
+    dispositivo de bloques de trabajo, que se sobrescribe: las imágenes de
+    VM se rechazan (``check_scratch_target``).
+
+    Conserva offsets, tamaños y mezcla de lecturas y escrituras. Con
+    ``pace="fast"`` las operaciones se emiten en orden tan rápido como lo
+    permiten ``queue_depth`` hilos; con ``"recorded"`` cada una espera a su
+    instante original (dividido por ``speed``) y se mide el retraso de
+    emisión. ``cache`` decide el estado de la caché de páginas al empezar:
+    ``cold`` la vacía para el fichero con ``POSIX_FADV_DONTNEED`` y ``warm``
+    carga antes los rangos que la traza va a leer.
+    """
+    def __init__(self, job: TraceReplayJob):
+        self.job = job
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def prepare(self):
+        job = self.job
+        check_scratch_target(job.path)
+        fd = os.open(job.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            st = os.fstat(fd)
+            if stat.S_ISREG(st.st_mode) and st.st_size < job.trace.extent:
+                os.ftruncate(fd, job.trace.extent)
+            # Como en DiskIOEngine: leer huecos de un fichero disperso no
+            # toca el disco, así que se materializan los rangos leídos
+            filled = False
+            for start, end in job.trace.ranges(READ):
+                if not self._has_hole(fd, start, end):
+                    continue
+                chunk = os.urandom(min(end - start, 4 * 1024 * 1024))
+                offset = start
+                while offset < end:
+                    n = min(len(chunk), end - offset)
+                    os.pwrite(fd, chunk[:n], offset)
+                    offset += n
+                filled = True
+            if filled:
+                os.fsync(fd)
+            self._set_cache(fd)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _has_hole(fd: int, start: int, end: int) -> bool:
+        if not hasattr(os, "SEEK_HOLE"):
+            return True
+        try:
+            return os.lseek(fd, start, os.SEEK_HOLE) < end
+        except OSError:
+            return True
+
+    def _set_cache(self, fd: int):
+        if not hasattr(os, "posix_fadvise"):
+            return
+        if self.job.cache == "cold":
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            return
+        buf = bytearray(1024 * 1024)
+        for start, end in self.job.trace.ranges(READ):
+            os.posix_fadvise(fd, start, end - start, os.POSIX_FADV_WILLNEED)
+            offset = start
+            while offset < end:
+                n = os.preadv(fd, [memoryview(buf)[:min(len(buf), end - offset)]], offset)
+                if n <= 0:
+                    break
+                offset += n
+
+    def _take(self) -> int:
+        with self._lock:
+            index = self._next
+            self._next += 1
+            return index
+
+    def _worker(self, fd: int, stats: _ReplayStats, start_ns: int,
+                barrier: threading.Barrier):
+        job = self.job
+        trace = job.trace
+        buf = mmap.mmap(-1, max(trace.sizes))
+        buf.write(os.urandom(len(buf)))
+        view = memoryview(buf)
+        clock = time.perf_counter_ns
+        recorded = job.pace == "recorded"
+        try:
+            barrier.wait()
+            while True:
+                i = self._take()
+                if i >= len(trace):
+                    return
+                if recorded:
+                    due = start_ns + int(trace.times[i] / job.speed * 1e9)
+                    wait = due - clock()
+                    if wait > 0:
+                        time.sleep(wait / 1e9)
+                    stats.lag.record(max(0, clock() - due))
+                op, size = trace.ops[i], trace.sizes[i]
+                t0 = clock()
+                if op == READ:
+                    n = os.preadv(fd, [view[:size]], trace.offsets[i])
+                else:
+                    n = os.pwritev(fd, [view[:size]], trace.offsets[i])
+                stats.latency[op].record(clock() - t0)
+                stats.ops[op] += 1
+                stats.bytes[op] += n
+        except Exception as e:
+            stats.error = e
+            barrier.abort()
+        finally:
+            view.release()
+            buf.close()
+
+    def run(self) -> Dict:
+        job = self.job
+        self.prepare()
+        self._next = 0
+        fd = os.open(job.path, os.O_RDWR)
+        stats = [_ReplayStats() for _ in range(job.queue_depth)]
+        barrier = threading.Barrier(job.queue_depth + 1)
+        try:
+            start_ns = time.perf_counter_ns()
+            threads = [threading.Thread(target=self._worker,
+                                        args=(fd, s, start_ns, barrier), daemon=True)
+                       for s in stats]
+            for t in threads:
+                t.start()
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+            for t in threads:
+                t.join()
+            if job.fsync and job.trace.summary()['writes']:
+                os.fsync(fd)
+            elapsed_ns = time.perf_counter_ns() - start_ns
+        finally:
+            os.close(fd)
+        errors = [s.error for s in stats if s.error is not None]
+        errors.sort(key=lambda e: isinstance(e, threading.BrokenBarrierError))
+        if errors:
+            raise errors[0]
+        return self._summarize(stats, elapsed_ns)
+
+    def _summarize(self, stats: List[_ReplayStats], elapsed_ns: int) -> Dict:
+        job = self.job
+        elapsed = max(elapsed_ns / 1e9, 1e-9)
+        total = LatencyHistogram()
+        result = {'operation': 'replay', 'scope': 'host', 'trace': job.trace.name,
+                  'pace': job.pace, 'cache': job.cache,
+                  'cache_control': hasattr(os, "posix_fadvise"),
+                  'queue_depth': job.queue_depth, 'speed': job.speed,
+                  'recorded_duration': round(job.trace.duration, 6),
+                  'elapsed': round(elapsed, 6)}
+        for op, name in enumerate(OP_NAMES):
+            latency = LatencyHistogram()
+            for s in stats:
+                latency.merge(s.latency[op])
+            total.merge(latency)
+            ops = sum(s.ops[op] for s in stats)
+            nbytes = sum(s.bytes[op] for s in stats)
+            result[name] = direction_summary(ops, nbytes, elapsed, latency)
+        ops = sum(result[n]['ops'] for n in OP_NAMES)
+        nbytes = sum(result[n]['bytes'] for n in OP_NAMES)
+        result.update(direction_summary(ops, nbytes, elapsed, total))
+        if job.pace == "recorded":
+            lag = LatencyHistogram()
+            for s in stats:
+                lag.merge(s.lag)
+            summary = lag.summary()
+            result['schedule_lag_p50_ms'] = summary['p50']
+            result['schedule_lag_p99_ms'] = summary['p99']
+        return result
+
+
+def direction_summary(ops: int, nbytes: int, elapsed: float,
+                      latency: LatencyHistogram) -> Dict:
+    """Throughput y latencias de una dirección (o del total) de la reproducción."""
+    summary = latency.summary()
+    return {'ops': ops, 'bytes': nbytes,
+            'mb_s': round(nbytes / (1024 * 1024) / elapsed, 2),
+            'iops': round(ops / elapsed, 2),
+            'lat_avg_ms': summary['mean'], 'lat_min_ms': summary['min'],
+            'lat_max_ms': summary['max'], 'lat_p50_ms': summary['p50'],
+            'lat_p90_ms': summary['p90'], 'lat_p99_ms': summary['p99'],
+            'lat_p999_ms': summary['p999'],
+            'latency_histogram': latency.to_dict()}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Conversión e inspección de trazas de E/S para --disk-trace")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="blkparse/strace -> traza CSV o binaria")
+    convert.add_argument("source", choices=["blktrace", "strace"])
+    convert.add_argument("input", help="Salida de blkparse o de strace ('-' = stdin)")
+    convert.add_argument("output", help="Traza de salida (.csv o binaria)")
+    convert.add_argument("--action", default="Q",
+                         help="Acción de blkparse a conservar (Q o D)")
+    convert.add_argument("--fd", type=int, default=None,
+                         help="Descriptor de strace a conservar")
+    info = commands.add_parser("info", help="Resumen de una traza")
+    info.add_argument("trace")
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "info":
+            for key, value in IOTrace.load(args.trace).summary().items():
+                print(f"{key:<14} {value}")
+            return 0
+        source = sys.stdin if args.input == "-" else open(args.input)
+        with source:
+            if args.source == "blktrace":
+                trace = IOTrace.from_blktrace(source, args.action)
+            else:
+                trace = IOTrace.from_strace(source, args.fd)
+        if not len(trace):
+            print(f"[ERROR] No se encontraron operaciones en {args.input}")
+            return 1
+        trace.save(args.output)
+        summary = trace.summary()
+        print(f"[OK] {summary['ops']} operaciones ({summary['reads']} lecturas, "
+              f"{summary['writes']} escrituras, {summary['duration_s']} s) "
+              f"guardadas en {args.output}")
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
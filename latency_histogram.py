@@ -0,0 +1,139 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """Histograma de latencias de memoria fija, estilo HDR.
+
+    Los valores (en nanosegundos) se agrupan en buckets log-lineales: cada
+    potencia de dos se divide en ``2**(sub_bucket_bits - 1)`` sub-buckets,
+    lo que da un error relativo máximo de ``2**-(sub_bucket_bits - 1)``.
+    Dos histogramas con los mismos parámetros se combinan sumando arrays.
+    """
+    def __init__(self, sub_bucket_bits: int = 7, max_bits: int = 40):
+        if sub_bucket_bits < 2 or max_bits <= sub_bucket_bits:
+            raise ValueError("Parámetros de histograma inválidos")
+        self.sub_bucket_bits = sub_bucket_bits
+        self.max_bits = max_bits
+        self._sub = 1 << sub_bucket_bits
+        self._half = self._sub >> 1
+        self._max_value = (1 << max_bits) - 1
+        size = self._sub + (max_bits - sub_bucket_bits) * self._half
+        self.counts = array('Q', bytes(8 * size))
+        self.total = 0
+        self.sum = 0
+        self.min = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self._sub + (shift - 1) * self._half + (value >> shift) - self._half
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        if index < self._sub:
+            return index, index + 1
+        k = index - self._sub
+        shift = k // self._half + 1
+        low = (k % self._half + self._half) << shift
+        return low, low + (1 << shift)
+
+    def record(self, value: int, count: int = 1):
+        if value < 0:
+            value = 0
+        elif value > self._max_value:
+            value = self._max_value
+        self.counts[self._index(value)] += count
+        if self.total == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.total += count
+        self.sum += value * count
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        if (other.sub_bucket_bits != self.sub_bucket_bits or
+                other.max_bits != self.max_bits):
+            raise ValueError("No se pueden combinar histogramas con "
+                             "parámetros distintos")
+        if other.total == 0:
+            return self
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        if self.total == 0 or other.min < self.min:
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        self.total += other.total
+        self.sum += other.sum
+        return self
+
+    def percentile(self, p: float) -> int:
+        if self.total == 0:
+            return 0
+        target = max(1, -(-self.total * p // 100))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c:
+                seen += c
+                if seen >= target:
+                    return min(max(self._bounds(i)[1] - 1, self.min), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+    def cdf(self) -> Tuple[List[int], List[float]]:
+        values, fractions = [], []
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c:
+                seen += c
+                values.append(min(self._bounds(i)[1] - 1, self.max))
+                fractions.append(seen / self.total)
+        return values, fractions
+
+    def summary(self, scale: float = 1e6,
+                percentiles=DEFAULT_PERCENTILES) -> Dict:
+        result = {
+            'count': self.total,
+            'min': round(self.min / scale, 4),
+            'mean': round(self.mean() / scale, 4),
+            'max': round(self.max / scale, 4),
+        }
+        for p in percentiles:
+            key = 'p' + f'{p:g}'.replace('.', '')
+            result[key] = round(self.percentile(p) / scale, 4)
+        return result
+
+    def to_dict(self) -> Dict:
+        last = len(self.counts)
+        while last and not self.counts[last - 1]:
+            last -= 1
+        return {
+            'unit': 'ns',
+            'sub_bucket_bits': self.sub_bucket_bits,
+            'max_bits': self.max_bits,
+            'total': self.total,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'percentiles_ms': self.summary(),
+            'counts': self.counts[:last].tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> 'LatencyHistogram':
+        data = data or {}
+        hist = cls(data.get('sub_bucket_bits', 7), data.get('max_bits', 40))
+        counts = data.get('counts', [])
+        hist.counts[:len(counts)] = array('Q', counts)
+        hist.total = data.get('total', sum(counts))
+        hist.sum = data.get('sum', 0)
+        hist.min = data.get('min', 0)
+        hist.max = data.get('max', 0)
+        return hist
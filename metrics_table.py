@@ -0,0 +1,164 @@
+import math
+from typing import Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+
+# Métrica -> True si un valor mayor es mejor
+HIGHER_IS_BETTER = {
+    'boot_time': False,
+    'disk_read_speed': True,
+    'disk_write_speed': True,
+    'disk_read_iops': True,
+    'disk_write_iops': True,
+    'disk_read_latency_ms': False,
+    'disk_write_latency_ms': False,
+    'disk_read_latency_p99_ms': False,
+    'disk_write_latency_p99_ms': False,
+    'network_throughput': True,
+    'network_pps': True,
+    'network_latency_p99_ms': False,
+    'cpu_overhead': False,
+    'vm_cpu_percent': False,
+}
+METRIC_FIELDS = tuple(HIGHER_IS_BETTER)
+METRIC_LABELS = {
+    'boot_time': ('Tiempo de arranque', 's'),
+    'disk_read_speed': ('Lectura de disco', 'MB/s'),
+    'disk_write_speed': ('Escritura de disco', 'MB/s'),
+    'disk_read_iops': ('IOPS de lectura', 'IOPS'),
+    'disk_write_iops': ('IOPS de escritura', 'IOPS'),
+    'disk_read_latency_ms': ('Latencia media de lectura', 'ms'),
+    'disk_write_latency_ms': ('Latencia media de escritura', 'ms'),
+    'disk_read_latency_p99_ms': ('Latencia p99 de lectura', 'ms'),
+    'disk_write_latency_p99_ms': ('Latencia p99 de escritura', 'ms'),
+    'network_throughput': ('Throughput de red', 'Mbps'),
+    'network_pps': ('Paquetes de red por segundo', 'paquetes/s'),
+    'network_latency_p99_ms': ('Latencia p99 de red', 'ms'),
+    'cpu_overhead': ('Overhead de CPU del host', '%'),
+    'vm_cpu_percent': ('CPU del proceso VM', '%'),
+}
+LABEL_FIELDS = (('config_name', 'U64'), ('disk_type', 'U16'),
+                ('network_type', 'U16'))
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+def table_dtype(fields: Sequence[str] = METRIC_FIELDS) -> np.dtype:
+    return np.dtype([('run_id', 'i8'), *LABEL_FIELDS]
+                    + [(name, 'f8') for name in fields])
+
+
+def build_table(rows: Iterable[Dict], run_ids: Iterable[int] = None,
+                fields: Sequence[str] = METRIC_FIELDS) -> np.ndarray:
+    """Convierte métricas por configuración en un array estructurado.
+
+    Las métricas ausentes o no positivas (0 = fase no medida o fallida)
+    quedan como NaN, de modo que no cuentan en medias ni percentiles.
+    """
+    rows = list(rows)
+    table = np.zeros(len(rows), dtype=table_dtype(fields))
+    table['run_id'] = (np.fromiter(run_ids, dtype='i8', count=len(rows))
+                       if run_ids is not None else 0)
+    for name, _ in LABEL_FIELDS:
+        table[name] = [row.get(name, '') for row in rows]
+    for name in fields:
+        column = np.fromiter((row.get(name) or math.nan for row in rows),
+                             dtype='f8', count=len(rows))
+        column[~(column > 0)] = np.nan
+        table[name] = column
+    return table
+
+
+def group_by(table: np.ndarray, key: str = 'config_name') -> Tuple[np.ndarray, np.ndarray]:
+    """Claves de grupo en orden de primera aparición e índice de grupo por fila."""
+    keys, first, inverse = np.unique(table[key], return_index=True,
+                                     return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    return keys[order], remap[inverse.ravel()]
+
+
+def group_stats(table: np.ndarray, key: str = 'config_name',
+                fields: Sequence[str] = METRIC_FIELDS,
+                percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict:
+    """Estadísticos por grupo y métrica como matrices ``[grupos, métricas]``.
+
+    Todo se calcula sobre las filas ordenadas por grupo con ``reduceat`` e
+    indexación; el único bucle es sobre las métricas (no sobre las filas).
+    """
+    fields = list(fields)
+    keys, groups = group_by(table, key)
+    n_groups = len(keys)
+    values = np.column_stack([table[f] for f in fields]) if len(table) else \
+        np.empty((0, len(fields)))
+    sizes = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    order = np.argsort(groups, kind='stable')
+    ordered = values[order]
+    valid = ~np.isnan(ordered)
+    result = {'keys': keys, 'fields': fields, 'rows': sizes}
+    if not len(table):
+        empty = np.full((0, len(fields)), np.nan)
+        result.update(count=np.zeros((0, len(fields)), dtype='i8'), mean=empty,
+                      std=empty, min=empty, max=empty,
+                      **{f'p{q:g}': empty for q in percentiles})
+        return result
+    count = np.add.reduceat(valid, starts, axis=0)
+    total = np.add.reduceat(np.where(valid, ordered, 0.0), starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        deviation = np.where(valid, ordered - np.repeat(mean, sizes, axis=0), 0.0)
+        variance = np.add.reduceat(deviation ** 2, starts, axis=0) / (count - 1)
+    result['count'] = count
+    result['mean'] = mean
+    result['std'] = np.where(count > 1, np.sqrt(variance), np.nan)
+    # Orden (grupo, valor) por métrica: los NaN quedan al final de su grupo
+    by_value = np.empty_like(values)
+    for j in range(len(fields)):
+        by_value[:, j] = values[np.lexsort((values[:, j], groups)), j]
+    safe = np.maximum(count, 1)
+    result['min'] = np.where(count > 0, by_value[starts], np.nan)
+    result['max'] = np.where(count > 0, np.take_along_axis(
+        by_value, starts[:, None] + safe - 1, axis=0), np.nan)
+    for q in percentiles:
+        position = (safe - 1) * (q / 100.0)
+        low = np.floor(position).astype('i8')
+        high = np.minimum(low + 1, safe - 1)
+        frac = position - low
+        lo = np.take_along_axis(by_value, starts[:, None] + low, axis=0)
+        hi = np.take_along_axis(by_value, starts[:, None] + high, axis=0)
+        result[f'p{q:g}'] = np.where(count > 0, lo + (hi - lo) * frac, np.nan)
+    return result
+
+
+def directions(fields: Sequence[str]) -> np.ndarray:
+    """+1 si mayor es mejor, -1 si menor es mejor."""
+    return np.array([1.0 if HIGHER_IS_BETTER.get(f, True) else -1.0 for f in fields])
+
+
+def ratios(values: np.ndarray, baseline: int) -> np.ndarray:
+    """Cociente de cada grupo frente al de referencia (filas de ``values``)."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return values / values[baseline]
+
+
+def improvement(values: np.ndarray, baseline: int,
+                fields: Sequence[str]) -> np.ndarray:
+    """Mejora (%) de cada grupo sobre la referencia, con el signo de cada
+    métrica: positivo siempre significa mejor."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (values - values[baseline]) / values[baseline] * 100 * directions(fields)
+
+
+def improvement_matrix(values: np.ndarray, field: str) -> np.ndarray:
+    """Matriz ``[i, j]`` con la mejora (%) del grupo i sobre el grupo j."""
+    sign = 1.0 if HIGHER_IS_BETTER.get(field, True) else -1.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (values[:, None] - values[None, :]) / values[None, :] * 100 * sign
+
+
+def field_index(stats: Dict, field: str) -> int:
+    return stats['fields'].index(field)
+
+
+def stats_rows(stats: Dict, field: str, statistic: str = 'mean') -> List[float]:
+    return stats[statistic][:, field_index(stats, field)].tolist()
@@ -0,0 +1,310 @@
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from latency_histogram import LatencyHistogram
+
+PROTOCOLS = ("tcp", "udp")
+ZERO_COPY_MODES = ("copy", "memoryview", "sendfile")
+MAX_UDP_PAYLOAD = 65507
+_HEADER = struct.Struct("!Q")
+
+
+def parse_target(target: str) -> Tuple[str, int]:
+    host, _, port = target.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Destino de red inválido: {target}")
+    return host, int(port)
+
+
+class NetworkJob:
+    """Parámetros de una ejecución del motor de throughput de red"""
+    def __init__(self, protocol: str = "tcp", streams: int = 1,
+                 message_size: int = 64 * 1024, duration: float = 1.0,
+                 zero_copy: str = "memoryview", host: str = "127.0.0.1",
+                 target: Optional[str] = None):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Protocolo no soportado: {protocol}")
+        if zero_copy not in ZERO_COPY_MODES:
+            raise ValueError(f"Modo de envío no soportado: {zero_copy}")
+        if protocol == "udp" and zero_copy == "sendfile":
+            raise ValueError("sendfile solo está disponible en modo TCP")
+        if streams <= 0 or duration <= 0:
+            raise ValueError("streams y duration deben ser > 0")
+        if message_size < _HEADER.size:
+            raise ValueError(f"message_size debe ser >= {_HEADER.size}")
+        if protocol == "udp" and message_size > MAX_UDP_PAYLOAD:
+            raise ValueError(f"message_size UDP debe ser <= {MAX_UDP_PAYLOAD}")
+        self.protocol = protocol
+        self.streams = streams
+        self.message_size = message_size
+        self.duration = duration
+        self.zero_copy = zero_copy
+        self.host = host
+        self.target = target
+
+
+class _StreamStats:
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.latency = LatencyHistogram()
+        self.last_ns = 0
+        self.error = None
+
+
+class NetworkEngine:
+    """Emisor y receptor locales sobre sockets reales.
+
+    Sin ``target`` el engine levanta su propio receptor en loopback (o en la
+    dirección de una interfaz veth/tap) y mide latencia extremo a extremo
+    con una marca de tiempo en la cabecera de cada mensaje. Con ``target``
+    solo emite hacia un receptor externo (p. ej. el guest vía hostfwd) y la
+    latencia medida es la de envío. ``relay`` (p. ej. un ``PacketForwarder``)
+    recibe las direcciones de destino y devuelve las que usan los emisores,
+    para interponer un proceso reenviador en el camino.
+    """
+    def __init__(self, job: NetworkJob, relay=None):
+        self.job = job
+        self.relay = relay
+        self._stop = threading.Event()
+
+    def _payload(self) -> bytearray:
+        return bytearray(os.urandom(self.job.message_size))
+
+    def _send_tcp(self, address, stats: _StreamStats, start: threading.Event,
+                  deadline_ref: List[int]):
+        job = self.job
+        clock = time.perf_counter_ns
+        payload = self._payload()
+        view = memoryview(payload)
+        spool = None
+        try:
+            sock = socket.create_connection(address)
+            try:
+                if job.zero_copy == "sendfile":
+                    spool = tempfile.TemporaryFile()
+                    spool.write(payload)
+                    spool.flush()
+                start.wait()
+                deadline = deadline_ref[0]
+                while clock() < deadline:
+                    t0 = clock()
+                    if spool is not None:
+                        sock.sendfile(spool, 0, job.message_size)
+                    else:
+                        _HEADER.pack_into(payload, 0, t0)
+                        if job.zero_copy == "memoryview":
+                            sock.sendall(view)
+                        else:
+                            sock.sendall(bytes(payload))
+                    stats.messages += 1
+                    stats.bytes += job.message_size
+                    if spool is not None or job.target:
+                        stats.latency.record(clock() - t0)
+                sock.shutdown(socket.SHUT_WR)
+            finally:
+                sock.close()
+        except Exception as e:
+            stats.error = e
+        finally:
+            view.release()
+            if spool is not None:
+                spool.close()
+
+    def _recv_tcp(self, conn: socket.socket, stats: _StreamStats,
+                  timestamps: bool):
+        size = self.job.message_size
+        clock = time.perf_counter_ns
+        buf = bytearray(size)
+        view = memoryview(buf)
+        filled = 0
+        try:
+            while True:
+                n = conn.recv_into(view[filled:])
+                if n == 0:
+                    break
+                filled += n
+                stats.bytes += n
+                stats.last_ns = clock()
+                if filled == size:
+                    stats.messages += 1
+                    if timestamps:
+                        stats.latency.record(clock() - _HEADER.unpack_from(buf)[0])
+                    filled = 0
+        except Exception as e:
+            stats.error = e
+        finally:
+            view.release()
+            conn.close()
+
+    def _send_udp(self, address, stats: _StreamStats, start: threading.Event,
+                  deadline_ref: List[int]):
+        job = self.job
+        clock = time.perf_counter_ns
+        payload = self._payload()
+        view = memoryview(payload)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.connect(address)
+            start.wait()
+            deadline = deadline_ref[0]
+            while clock() < deadline:
+                t0 = clock()
+                _HEADER.pack_into(payload, 0, t0)
+                try:
+                    sock.send(view if job.zero_copy == "memoryview"
+                              else bytes(payload))
+                except (BlockingIOError, ConnectionRefusedError):
+                    continue
+                stats.messages += 1
+                stats.bytes += job.message_size
+                if job.target:
+                    stats.latency.record(clock() - t0)
+        except Exception as e:
+            stats.error = e
+        finally:
+            view.release()
+            sock.close()
+
+    def _recv_udp(self, sock: socket.socket, stats: _StreamStats):
+        clock = time.perf_counter_ns
+        buf = bytearray(self.job.message_size)
+        sock.settimeout(0.1)
+        try:
+            while True:
+                try:
+                    n = sock.recv_into(buf)
+                except socket.timeout:
+                    if self._stop.is_set():
+                        break
+                    continue
+                stats.messages += 1
+                stats.bytes += n
+                stats.last_ns = clock()
+                if n >= _HEADER.size:
+                    stats.latency.record(stats.last_ns - _HEADER.unpack_from(buf)[0])
+        except Exception as e:
+            stats.error = e
+        finally:
+            sock.close()
+
+    def _open_receivers(self, receivers: List[_StreamStats]) -> Tuple[List, List]:
+        job = self.job
+        threads, addresses = [], []
+        timestamps = job.zero_copy != "sendfile"
+        if job.protocol == "tcp":
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((job.host, 0))
+            listener.listen(job.streams)
+            address = listener.getsockname()
+
+            def accept_all():
+                try:
+                    for stats in receivers:
+                        conn, _ = listener.accept()
+                        t = threading.Thread(target=self._recv_tcp,
+                                             args=(conn, stats, timestamps),
+                                             daemon=True)
+                        t.start()
+                        threads.append(t)
+                finally:
+                    listener.close()
+
+            acceptor = threading.Thread(target=accept_all, daemon=True)
+            acceptor.start()
+            threads.insert(0, acceptor)
+            addresses = [address] * job.streams
+        else:
+            for stats in receivers:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+                sock.bind((job.host, 0))
+                addresses.append(sock.getsockname())
+                t = threading.Thread(target=self._recv_udp, args=(sock, stats),
+                                     daemon=True)
+                t.start()
+                threads.append(t)
+        return threads, addresses
+
+    def run(self) -> Dict:
+        job = self.job
+        senders = [_StreamStats() for _ in range(job.streams)]
+        receivers = [] if job.target else \
+            [_StreamStats() for _ in range(job.streams)]
+        if job.target:
+            addresses = [parse_target(job.target)] * job.streams
+            recv_threads = []
+        else:
+            recv_threads, addresses = self._open_receivers(receivers)
+        if self.relay is not None:
+            addresses = self.relay(addresses)
+
+        start = threading.Event()
+        deadline_ref = [0]
+        send_target = self._send_tcp if job.protocol == "tcp" else self._send_udp
+        send_threads = [
+            threading.Thread(target=send_target,
+                             args=(addresses[i], senders[i], start, deadline_ref),
+                             daemon=True)
+            for i in range(job.streams)
+        ]
+        for t in send_threads:
+            t.start()
+        t_start = time.perf_counter_ns()
+        deadline_ref[0] = t_start + int(job.duration * 1e9)
+        start.set()
+        for t in send_threads:
+            t.join()
+        if job.protocol == "tcp" and recv_threads:
+            recv_threads[0].join(timeout=5)
+        self._stop.set()
+        for t in recv_threads[1:] if job.protocol == "tcp" else recv_threads:
+            t.join(timeout=5)
+        end_ns = max((s.last_ns for s in receivers), default=0)
+        elapsed_ns = (end_ns or time.perf_counter_ns()) - t_start
+
+        errors = [s.error for s in senders + receivers if s.error is not None]
+        if errors:
+            raise errors[0]
+        return self._summarize(senders, receivers, elapsed_ns)
+
+    def _summarize(self, senders: List[_StreamStats],
+                   receivers: List[_StreamStats], elapsed_ns: int) -> Dict:
+        job = self.job
+        measured = receivers or senders
+        elapsed = max(elapsed_ns / 1e9, 1e-9)
+        nbytes = sum(s.bytes for s in measured)
+        messages = sum(s.messages for s in measured)
+        sent = sum(s.messages for s in senders)
+        latency = LatencyHistogram()
+        for s in senders + receivers:
+            latency.merge(s.latency)
+        summary = latency.summary()
+        return {
+            'protocol': job.protocol,
+            'streams': job.streams,
+            'message_size': job.message_size,
+            'zero_copy': job.zero_copy,
+            'target': job.target or f"{job.host} (loopback)",
+            'latency_kind': 'one_way' if receivers and job.zero_copy != 'sendfile'
+                            else 'send',
+            'messages_sent': sent,
+            'messages_received': messages if receivers else None,
+            'loss_percent': round((sent - messages) / sent * 100, 3)
+                            if receivers and job.protocol == 'udp' and sent else 0,
+            'bytes': nbytes,
+            'elapsed': round(elapsed, 6),
+            'mbps': round(nbytes * 8 / elapsed / 1e6, 2),
+            'packets_per_s': round(messages / elapsed, 2),
+            'lat_avg_ms': summary['mean'],
+            'lat_p50_ms': summary['p50'],
+            'lat_p90_ms': summary['p90'],
+            'lat_p99_ms': summary['p99'],
+            'lat_p999_ms': summary['p999'],
+            'latency_histogram': latency.to_dict(),
+        }
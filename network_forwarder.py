@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Reenviador de paquetes local: sustituto del datapath de red de la VM.
+
+Se interpone entre los emisores y los receptores de ``NetworkEngine`` para
+que cada backend de red tenga un camino medible sin VM ni infraestructura
+externa:
+
+    user        proxy bloqueante en espacio de usuario (como slirp, que
+                termina y reorigina cada conexión en el bucle de QEMU)
+    vhost-net   camino del kernel, sin salto en espacio de usuario
+    vhost-user  switch en espacio de usuario en modo sondeo (como un PMD de
+                DPDK u OVS-DPDK): sockets no bloqueantes y ráfagas
+
+Uso: ``network_forwarder.py --protocol tcp --mode poll --target H:P ...``.
+Imprime ``listening H:P ...`` (una dirección por destino, en orden) y, al
+cerrarse su stdin o recibir SIGTERM, una línea JSON con lo reenviado.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+from network_engine import parse_target
+
+NETWORK_BACKENDS = ('user', 'vhost-net', 'vhost-user')
+MODES = ('proxy', 'poll')
+# Camino sustituto de cada backend: modo del reenviador (None = directo)
+BACKEND_MODES = {'user': 'proxy', 'vhost-net': None, 'vhost-user': 'poll'}
+BURST = 32
+START_TIMEOUT = 10.0
+
+
+def network_backend(network_type: str) -> str:
+    """Backend de un ``network_type``: virtio y e1000 van sobre slirp."""
+    return network_type if network_type in NETWORK_BACKENDS else 'user'
+
+
+class _Counters:
+    def __init__(self):
+        self.packets = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, nbytes: int):
+        with self._lock:
+            self.packets += 1
+            self.bytes += nbytes
+
+
+def _pipe_tcp(src: socket.socket, dst: socket.socket, counters: _Counters,
+              size: int = 256 * 1024):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    try:
+        while True:
+            n = src.recv_into(view)
+            if n == 0:
+                break
+            dst.sendall(view[:n])
+            counters.add(n)
+    except OSError:
+        pass
+    finally:
+        view.release()
+        for sock in (src, dst):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+
+class Forwarder:
+    """Reenvía cada dirección de escucha a su destino.
+
+    En modo ``proxy`` cada conexión (o socket UDP) tiene su hilo con
+    llamadas bloqueantes. En modo ``poll`` un único hilo recorre todos los
+    sockets no bloqueantes leyendo ráfagas de hasta ``BURST`` paquetes y
+    solo cede la CPU (``sched_yield``) cuando no hay nada que reenviar.
+    """
+    def __init__(self, protocol: str, mode: str, targets: List[Tuple[str, int]],
+                 host: str = "127.0.0.1"):
+        if mode not in MODES:
+            raise ValueError(f"Modo no soportado: {mode}")
+        self.protocol = protocol
+        self.mode = mode
+        self.targets = targets
+        self.counters = _Counters()
+        self._stop = threading.Event()
+        self._listeners = []
+        for _ in targets:
+            kind = socket.SOCK_STREAM if protocol == "tcp" else socket.SOCK_DGRAM
+            sock = socket.socket(socket.AF_INET, kind)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if protocol == "udp":
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+            sock.bind((host, 0))
+            if protocol == "tcp":
+                sock.listen(64)
+            self._listeners.append(sock)
+        self._pairs = []
+        self._lock = threading.Lock()
+
+    @property
+    def addresses(self) -> List[Tuple[str, int]]:
+        return [s.getsockname() for s in self._listeners]
+
+    def _accept(self, listener: socket.socket, target: Tuple[str, int]):
+        while not self._stop.is_set():
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(target)
+            for sock in (conn, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self.mode == "proxy":
+                threading.Thread(target=_pipe_tcp, args=(conn, upstream, self.counters),
+                                 daemon=True).start()
+            else:
+                conn.setblocking(False)
+                with self._lock:
+                    self._pairs.append((conn, upstream))
+
+    def _udp_proxy(self, sock: socket.socket, target: Tuple[str, int]):
+        out = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        out.connect(target)
+        buf = bytearray(65536)
+        sock.settimeout(0.1)
+        while not self._stop.is_set():
+            try:
+                n = sock.recv_into(buf)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                out.send(memoryview(buf)[:n])
+            except OSError:
+                continue
+            self.counters.add(n)
+        out.close()
+
+    def _poll_loop(self):
+        buf = bytearray(256 * 1024)
+        view = memoryview(buf)
+        udp = []
+        if self.protocol == "udp":
+            for sock, target in zip(self._listeners, self.targets):
+                sock.setblocking(False)
+                out = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                out.connect(target)
+                udp.append((sock, out))
+        while not self._stop.is_set():
+            with self._lock:
+                pairs = list(self._pairs)
+            busy = False
+            for src, dst in pairs + udp:
+                for _ in range(BURST):
+                    try:
+                        n = src.recv_into(view)
+                    except BlockingIOError:
+                        break
+                    except OSError:
+                        n = 0
+                    if n == 0 and self.protocol == "tcp":
+                        self._close_pair(src, dst)
+                        break
+                    try:
+                        if self.protocol == "tcp":
+                            dst.sendall(view[:n])
+                        else:
+                            dst.send(view[:n])
+                    except OSError:
+                        break
+                    self.counters.add(n)
+                    busy = True
+            if not busy:
+                os.sched_yield()
+        view.release()
+
+    def _close_pair(self, src: socket.socket, dst: socket.socket):
+        with self._lock:
+            if (src, dst) in self._pairs:
+                self._pairs.remove((src, dst))
+        for sock in (src, dst):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def start(self):
+        for listener, target in zip(self._listeners, self.targets):
+            worker = self._accept if self.protocol == "tcp" else self._udp_proxy
+            if self.protocol == "udp" and self.mode == "poll":
+                continue
+            threading.Thread(target=worker, args=(listener, target), daemon=True).start()
+        if self.mode == "poll":
+            threading.Thread(target=self._poll_loop, daemon=True).start()
+
+    def stop(self) -> Dict:
+        self._stop.set()
+        for sock in self._listeners:
+            sock.close()
+        return {'mode': self.mode, 'packets': self.counters.packets,
+                'bytes': self.counters.bytes}
+
+
+class PacketForwarder:
+    """Lanza ``network_forwarder.py`` como proceso aparte y lo usa como
+    ``relay`` de ``NetworkEngine``: recibe las direcciones de los receptores
+    y devuelve aquellas a las que deben enviar los emisores."""
+    def __init__(self, protocol: str = "tcp", mode: str = "poll",
+                 cpus: Optional[List[int]] = None):
+        self.protocol = protocol
+        self.mode = mode
+        self.cpus = cpus
+        self.process = None
+        self.stats = None
+
+    def __call__(self, addresses: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        targets = list(dict.fromkeys(addresses))
+        cmd = [sys.executable, os.path.abspath(__file__), "--protocol",
+               self.protocol, "--mode", self.mode]
+        for host, port in targets:
+            cmd += ["--target", f"{host}:{port}"]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, text=True)
+        if self.cpus and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(self.process.pid, self.cpus)
+        timer = threading.Timer(START_TIMEOUT, self.process.kill)
+        timer.start()
+        try:
+            line = self.process.stdout.readline().split()
+        finally:
+            timer.cancel()
+        if not line or line[0] != "listening":
+            self.stop()
+            raise OSError("El reenviador de red no arrancó")
+        ready = [parse_target(a) for a in line[1:]]
+        mapping = dict(zip(targets, ready))
+        return [mapping[a] for a in addresses]
+
+    def stop(self) -> Optional[Dict]:
+        if self.process is None:
+            return self.stats
+        try:
+            out, _ = self.process.communicate(input="", timeout=5)
+            self.stats = json.loads(out.strip().splitlines()[-1]) if out.strip() else None
+        except (subprocess.TimeoutExpired, ValueError):
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reenviador de paquetes local")
+    parser.add_argument("--protocol", choices=["tcp", "udp"], default="tcp")
+    parser.add_argument("--mode", choices=MODES, default="poll")
+    parser.add_argument("--target", action="append", required=True,
+                        help="Destino HOST:PUERTO (repetible)")
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args(argv)
+    forwarder = Forwarder(args.protocol, args.mode,
+                          [parse_target(t) for t in args.target], args.host)
+    done = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: done.set())
+    forwarder.start()
+    print("listening " + " ".join(f"{h}:{p}" for h, p in forwarder.addresses),
+          flush=True)
+    # Termina al cerrarse stdin (el proceso que lo lanzó) o con SIGTERM
+    threading.Thread(target=lambda: (sys.stdin.read(), done.set()), daemon=True).start()
+    done.wait()
+    print(json.dumps(forwarder.stop()), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
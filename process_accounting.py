@@ -0,0 +1,176 @@
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+import psutil
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def classify_thread(name: str) -> str:
+    """Clasifica un hilo de QEMU por su nombre (comm)."""
+    if name.startswith("CPU ") and "/" in name:
+        return "vcpu"
+    if name.startswith("IO ") or "iothread" in name.lower():
+        return "iothread"
+    return "other"
+
+
+def _read(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+def _proc_threads(pid: int) -> Dict[int, Dict]:
+    threads = {}
+    task_dir = f"/proc/{pid}/task"
+    for entry in os.listdir(task_dir):
+        try:
+            stat = _read(f"{task_dir}/{entry}/stat")
+            status = _read(f"{task_dir}/{entry}/status")
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        name = stat[stat.index("(") + 1:stat.rindex(")")]
+        fields = stat[stat.rindex(")") + 2:].split()
+        switches = {}
+        for line in status.splitlines():
+            if line.startswith(("voluntary_ctxt_switches",
+                                "nonvoluntary_ctxt_switches")):
+                key, value = line.split(":")
+                switches[key] = int(value)
+        threads[int(entry)] = {
+            'name': name,
+            'user': int(fields[11]) / CLK_TCK,
+            'system': int(fields[12]) / CLK_TCK,
+            'voluntary_ctx': switches.get("voluntary_ctxt_switches", 0),
+            'involuntary_ctx': switches.get("nonvoluntary_ctxt_switches", 0),
+        }
+    return threads
+
+
+def _psutil_threads(proc: psutil.Process) -> Dict[int, Dict]:
+    ctx = proc.num_ctx_switches()
+    threads = {}
+    for t in proc.threads():
+        threads[t.id] = {'name': proc.name(), 'user': t.user_time,
+                         'system': t.system_time, 'voluntary_ctx': 0,
+                         'involuntary_ctx': 0}
+    if threads:
+        first = threads[min(threads)]
+        first['voluntary_ctx'] = ctx.voluntary
+        first['involuntary_ctx'] = ctx.involuntary
+    return threads
+
+
+class ProcessTreeAccountant:
+    """Contabilidad de recursos limitada al árbol de procesos de la VM.
+
+    Toma instantáneas de tiempos de CPU por hilo (vCPU, iothreads y resto),
+    cambios de contexto, bytes de E/S y RSS, y atribuye las diferencias a
+    la fase del benchmark en curso.
+    """
+    def __init__(self, root_pid: int):
+        self.root_pid = root_pid
+        self.phases = {}
+        self._open = {}
+
+    def _processes(self) -> List[psutil.Process]:
+        try:
+            root = psutil.Process(self.root_pid)
+            return [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def snapshot(self) -> Dict:
+        threads, io, cpu, rss = {}, {}, {}, 0
+        for proc in self._processes():
+            try:
+                times = proc.cpu_times()
+                cpu[proc.pid] = (times.user, times.system)
+                if os.path.isdir(f"/proc/{proc.pid}/task"):
+                    per_thread = _proc_threads(proc.pid)
+                else:
+                    per_thread = _psutil_threads(proc)
+                for tid, data in per_thread.items():
+                    data['pid'] = proc.pid
+                    threads[tid] = data
+                rss += proc.memory_info().rss
+                try:
+                    counters = proc.io_counters()
+                    io[proc.pid] = (counters.read_bytes, counters.write_bytes)
+                except (AttributeError, psutil.AccessDenied):
+                    pass
+            except (psutil.NoSuchProcess, FileNotFoundError, ProcessLookupError):
+                continue
+        return {'time': time.perf_counter(), 'threads': threads,
+                'cpu': cpu, 'io': io, 'rss': rss}
+
+    def begin_phase(self, name: str):
+        self._open[name] = self.snapshot()
+
+    def end_phase(self, name: str) -> Optional[Dict]:
+        start = self._open.pop(name, None)
+        if start is None:
+            return None
+        self.phases[name] = self.diff(start, self.snapshot())
+        return self.phases[name]
+
+    @staticmethod
+    def diff(start: Dict, end: Dict) -> Dict:
+        wall = max(end['time'] - start['time'], 1e-9)
+        classes = {c: {'user': 0.0, 'system': 0.0, 'threads': 0}
+                   for c in ("vcpu", "iothread", "other")}
+        per_thread = []
+        voluntary = involuntary = 0
+        for tid, now in end['threads'].items():
+            before = start['threads'].get(tid, {})
+            voluntary += now['voluntary_ctx'] - before.get('voluntary_ctx', 0)
+            involuntary += now['involuntary_ctx'] - before.get('involuntary_ctx', 0)
+            kind = classify_thread(now['name'])
+            classes[kind]['threads'] += 1
+            if kind == "other":
+                continue
+            user = now['user'] - before.get('user', 0.0)
+            system = now['system'] - before.get('system', 0.0)
+            classes[kind]['user'] += user
+            classes[kind]['system'] += system
+            per_thread.append({'tid': tid, 'name': now['name'], 'kind': kind,
+                               'user': round(user, 3), 'system': round(system, 3)})
+        # Los tiempos por proceso incluyen hilos que terminaron durante la
+        # fase; lo que no es vCPU ni iothread se atribuye a "other".
+        total_user = total_system = 0.0
+        for pid, (user, system) in end['cpu'].items():
+            user0, system0 = start['cpu'].get(pid, (0.0, 0.0))
+            total_user += user - user0
+            total_system += system - system0
+        classes['other']['user'] = max(
+            0.0, total_user - classes['vcpu']['user'] - classes['iothread']['user'])
+        classes['other']['system'] = max(
+            0.0, total_system - classes['vcpu']['system'] - classes['iothread']['system'])
+        read_bytes = write_bytes = 0
+        for pid, (r, w) in end['io'].items():
+            r0, w0 = start['io'].get(pid, (0, 0))
+            read_bytes += r - r0
+            write_bytes += w - w0
+        cpu_seconds = sum(c['user'] + c['system'] for c in classes.values())
+        for bucket in classes.values():
+            bucket['user'] = round(bucket['user'], 3)
+            bucket['system'] = round(bucket['system'], 3)
+        return {
+            'wall': round(wall, 3),
+            'cpu_seconds': round(cpu_seconds, 3),
+            'cpu_percent': round(cpu_seconds / wall * 100, 2),
+            'by_class': classes,
+            'threads': per_thread,
+            'voluntary_ctx_switches': voluntary,
+            'involuntary_ctx_switches': involuntary,
+            'read_bytes': read_bytes,
+            'write_bytes': write_bytes,
+            'rss_bytes': end['rss'],
+        }
+
+    def cpu_percent(self, phases: Iterable[str]) -> float:
+        selected = [self.phases[p] for p in phases if p in self.phases]
+        wall = sum(p['wall'] for p in selected)
+        if not wall:
+            return 0.0
+        return round(sum(p['cpu_seconds'] for p in selected) / wall * 100, 2)
@@ -0,0 +1,162 @@
+import os
+import selectors
+import signal
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BOOT_MARKERS = [
+    ("firmware", "SeaBIOS"),
+    ("kernel", "Linux version"),
+    ("login", "login:"),
+]
+# Secuencia de escape de -serial mon:stdio para terminar QEMU (Ctrl-A x)
+QUIT_SEQUENCE = b"\x01x"
+
+
+class BootTimeoutError(Exception):
+    pass
+
+
+class QemuLauncher:
+    """Lanza QEMU y marca en el tiempo las etapas de arranque.
+
+    La salida de ``-serial mon:stdio`` se lee en un hilo con ``selectors``
+    y lecturas no bloqueantes, buscando los marcadores sobre un buffer
+    deslizante (el prompt de login no termina en salto de línea). El hilo
+    sigue drenando la salida tras el arranque para que QEMU no se bloquee
+    con la tubería llena.
+    """
+    def __init__(self, cmd: List[str],
+                 markers: Optional[List[Tuple[str, str]]] = None,
+                 timeout: float = 120.0, log_path: Optional[str] = None):
+        self.cmd = cmd
+        self.markers = list(markers or DEFAULT_BOOT_MARKERS)
+        if not self.markers:
+            raise ValueError("Se necesita al menos un marcador de arranque")
+        self.timeout = timeout
+        self.log_path = log_path
+        self.process = None
+        self.stages = {}
+        self._start_time = 0.0
+        self._booted = threading.Event()
+        self._reader = None
+        self._exit_code = None
+
+    def start(self) -> subprocess.Popen:
+        self._start_time = time.perf_counter()
+        self.process = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+        os.set_blocking(self.process.stdout.fileno(), False)
+        self._reader = threading.Thread(target=self._read_console, daemon=True)
+        self._reader.start()
+        return self.process
+
+    def _read_console(self):
+        fd = self.process.stdout.fileno()
+        encoded = [(stage, text.encode()) for stage, text in self.markers]
+        keep = max(len(text) for _, text in encoded)
+        final_stage = encoded[-1][0]
+        window = b""
+        log = open(self.log_path, "ab") if self.log_path else None
+        selector = selectors.DefaultSelector()
+        selector.register(fd, selectors.EVENT_READ)
+        try:
+            while True:
+                if not selector.select(timeout=0.5):
+                    if self.process.poll() is not None:
+                        break
+                    continue
+                try:
+                    chunk = os.read(fd, 65536)
+                except BlockingIOError:
+                    continue
+                if not chunk:
+                    break
+                now = time.perf_counter() - self._start_time
+                if log:
+                    log.write(chunk)
+                window += chunk
+                for stage, text in encoded:
+                    if stage not in self.stages and text in window:
+                        self.stages[stage] = round(now, 3)
+                if final_stage in self.stages:
+                    self._booted.set()
+                window = window[-keep:]
+        finally:
+            selector.close()
+            if log:
+                log.close()
+            self._booted.set()
+
+    def wait_for_boot(self) -> Dict[str, float]:
+        if self.process is None:
+            raise RuntimeError("QEMU no ha sido iniciado")
+        if not self._booted.wait(self.timeout):
+            raise BootTimeoutError(
+                f"Arranque no completado en {self.timeout}s "
+                f"(etapas vistas: {list(self.stages)})")
+        final_stage = self.markers[-1][0]
+        if final_stage not in self.stages:
+            try:
+                code = self.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                code = None
+            raise BootTimeoutError(
+                f"QEMU terminó (código {code}) antes de '{final_stage}' "
+                f"(etapas vistas: {list(self.stages)})")
+        return dict(self.stages)
+
+    def boot_time(self) -> float:
+        return self.stages.get(self.markers[-1][0], 0.0)
+
+    def stop(self, timeout: float = 10.0) -> Optional[int]:
+        process = self.process
+        if process is None:
+            return self._exit_code
+        try:
+            if process.poll() is None:
+                try:
+                    process.stdin.write(QUIT_SEQUENCE)
+                    process.stdin.flush()
+                except (BrokenPipeError, OSError):
+                    pass
+                try:
+                    process.wait(timeout=timeout / 2)
+                except subprocess.TimeoutExpired:
+                    self._signal_group(signal.SIGTERM)
+                    try:
+                        process.wait(timeout=timeout / 2)
+                    except subprocess.TimeoutExpired:
+                        self._signal_group(signal.SIGKILL)
+                        process.wait()
+        finally:
+            if self._reader is not None:
+                self._reader.join(timeout=1)
+            for stream in (process.stdin, process.stdout):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+            self._exit_code = process.returncode
+            self.process = None
+        return self._exit_code
+
+    def _signal_group(self, sig: int):
+        try:
+            os.killpg(self.process.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
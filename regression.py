@@ -0,0 +1,204 @@
+import json
+import math
+import os
+import statistics
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from metrics_table import HIGHER_IS_BETTER
+from results_store import ResultStoreReader
+
+REGRESSION_EXIT_CODE = 4
+METHODS = ('mannwhitney', 'bootstrap')
+_NORMAL = statistics.NormalDist()
+
+
+def samples_by_config(metrics: List[Dict]) -> Dict[str, Dict[str, List[float]]]:
+    """Muestras por configuración y métrica.
+
+    Usa las repeticiones guardadas en ``statistics`` (``--adaptive``) y, si
+    no las hay, el valor de la métrica; varias entradas de la misma
+    configuración (varias ejecuciones) se acumulan.
+    """
+    samples = {}
+    for m in metrics:
+        per_metric = samples.setdefault(m.get('config_name', ''), {})
+        for metric in HIGHER_IS_BETTER:
+            stats = (m.get('statistics') or {}).get(metric) or {}
+            if stats.get('samples'):
+                values = stats['samples']
+            elif isinstance(m.get(metric), (int, float)):
+                values = [m[metric]]
+            else:
+                continue
+            values = [float(v) for v in values if v and v > 0]
+            if values:
+                per_metric.setdefault(metric, []).extend(values)
+    return samples
+
+
+def load_reference(path: str) -> List[Dict]:
+    """Métricas de referencia: un results.json o un directorio de store
+    (en cuyo caso se usan todas sus ejecuciones completadas, con las
+    muestras de ``statistics``). ``ValueError`` si no contiene métricas."""
+    if os.path.isdir(path):
+        reader = ResultStoreReader(path)
+        metrics = [m for run_id in reader.runs()
+                   if reader.run_info(run_id)['status'] == 'completed'
+                   for m in reader.metrics(run_id)]
+    else:
+        with open(path) as f:
+            metrics = json.load(f).get('metrics')
+    if not metrics:
+        raise ValueError(f"{path} no contiene métricas")
+    return metrics
+
+
+def sample_depth(metrics: List[Dict]) -> int:
+    """Mayor número de muestras de una métrica en alguna configuración."""
+    return max((len(values) for per_metric in samples_by_config(metrics).values()
+                for values in per_metric.values()), default=0)
+
+
+def mann_whitney(baseline: List[float], current: List[float]) -> float:
+    """p-valor unilateral de que ``current`` sea estocásticamente menor que
+    ``baseline`` (aproximación normal con corrección de empates y de
+    continuidad)."""
+    n1, n2 = len(baseline), len(current)
+    values = np.concatenate([baseline, current])
+    order = np.argsort(values, kind='mergesort')
+    ranks = np.empty(len(values))
+    sorted_values = values[order]
+    _, first, counts = np.unique(sorted_values, return_index=True,
+                                 return_counts=True)
+    average = first + (counts + 1) / 2.0
+    ranks[order] = np.repeat(average, counts)
+    u = ranks[n1:].sum() - n2 * (n2 + 1) / 2.0
+    n = n1 + n2
+    tie_term = ((counts ** 3 - counts).sum()) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return 1.0
+    z = (u - n1 * n2 / 2.0 + 0.5) / sigma
+    return _NORMAL.cdf(z)
+
+
+def bootstrap_change(baseline: List[float], current: List[float],
+                     confidence: float = 0.95, resamples: int = 5000,
+                     seed: int = 0) -> Tuple[float, float]:
+    """IC bootstrap del cambio relativo de la media (current / baseline - 1)."""
+    rng = np.random.default_rng(seed)
+    base = np.asarray(baseline)
+    cur = np.asarray(current)
+    base_means = base[rng.integers(0, len(base), (resamples, len(base)))].mean(axis=1)
+    cur_means = cur[rng.integers(0, len(cur), (resamples, len(cur)))].mean(axis=1)
+    change = cur_means / base_means - 1
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(change, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+class RegressionGate:
+    """Compara una ejecución con un conjunto de resultados de referencia.
+
+    Una métrica es regresión si empeora más que su umbral relativo y la
+    diferencia es significativa: Mann-Whitney con p < ``alpha`` o, con
+    ``bootstrap``, un IC del cambio que queda entero por debajo de cero (en
+    el sentido de "mejor"). Las métricas con menos de ``min_samples``
+    muestras en alguno de los lados se marcan como insuficientes.
+    """
+    def __init__(self, threshold: float = 0.05, alpha: float = 0.05,
+                 method: str = 'mannwhitney',
+                 thresholds: Optional[Dict[str, float]] = None,
+                 min_samples: int = 3):
+        if method not in METHODS:
+            raise ValueError(f"Método desconocido: {method}")
+        self.threshold = threshold
+        self.alpha = alpha
+        self.method = method
+        self.thresholds = dict(thresholds or {})
+        self.min_samples = min_samples
+
+    def compare_metric(self, metric: str, baseline: List[float],
+                       current: List[float]) -> Dict:
+        sign = 1.0 if HIGHER_IS_BETTER.get(metric, True) else -1.0
+        threshold = self.thresholds.get(metric, self.threshold)
+        row = {'metric': metric, 'n_baseline': len(baseline),
+               'n_current': len(current), 'threshold': threshold,
+               'baseline_mean': round(statistics.fmean(baseline), 4),
+               'current_mean': round(statistics.fmean(current), 4)}
+        # Cambio con signo: negativo siempre significa peor
+        change = (row['current_mean'] / row['baseline_mean'] - 1) * sign
+        row['change_percent'] = round(change * 100, 2)
+        if min(len(baseline), len(current)) < self.min_samples:
+            row['status'] = 'insufficient'
+            return row
+        if self.method == 'mannwhitney':
+            worse = [v * sign for v in current]
+            p_worse = mann_whitney([v * sign for v in baseline], worse)
+            p_better = mann_whitney(worse, [v * sign for v in baseline])
+            row['p_value'] = round(p_worse, 5)
+            significant_worse = p_worse < self.alpha
+            significant_better = p_better < self.alpha
+        else:
+            low, high = bootstrap_change(baseline, current, 1 - self.alpha)
+            low, high = sorted((low * sign, high * sign))
+            row['ci_low_percent'] = round(low * 100, 2)
+            row['ci_high_percent'] = round(high * 100, 2)
+            significant_worse = high < 0
+            significant_better = low > 0
+        if significant_worse and change < -threshold:
+            row['status'] = 'regression'
+        elif significant_better and change > threshold:
+            row['status'] = 'improvement'
+        else:
+            row['status'] = 'ok'
+        return row
+
+    def compare(self, reference: List[Dict], current: List[Dict]) -> Dict:
+        base = samples_by_config(reference)
+        now = samples_by_config(current)
+        rows = []
+        for config, metrics in now.items():
+            if config not in base:
+                continue
+            for metric, values in metrics.items():
+                if metric in base[config]:
+                    row = self.compare_metric(metric, base[config][metric], values)
+                    row['config'] = config
+                    rows.append(row)
+        regressions = [r for r in rows if r['status'] == 'regression']
+        return {'method': self.method, 'alpha': self.alpha,
+                'threshold': self.threshold, 'rows': rows,
+                'regressions': len(regressions),
+                'missing_configs': sorted(set(base) - set(now))}
+
+
+STATUS_LABELS = {'regression': 'REGRESIÓN', 'improvement': 'MEJORA',
+                 'ok': 'OK', 'insufficient': 'POCAS MUESTRAS'}
+
+
+def format_regression_table(result: Dict) -> str:
+    lines = ["\nCOMPARACIÓN CON LA REFERENCIA "
+             f"({result['method']}, alpha={result['alpha']}):"]
+    lines.append(f"{'Configuración':<16} {'Métrica':<26} {'Ref.':>10} {'Actual':>10} "
+                 f"{'Cambio':>8} {'Umbral':>7} {'Prueba':>16}  Estado")
+    lines.append("-" * 110)
+    for row in result['rows']:
+        if 'p_value' in row:
+            test = f"p={row['p_value']:.4f}"
+        elif 'ci_low_percent' in row:
+            test = f"[{row['ci_low_percent']:.1f}, {row['ci_high_percent']:.1f}]%"
+        else:
+            test = f"n={row['n_baseline']}/{row['n_current']}"
+        lines.append(f"{row['config']:<16} {row['metric']:<26} "
+                     f"{row['baseline_mean']:>10.2f} {row['current_mean']:>10.2f} "
+                     f"{row['change_percent']:>7.1f}% {row['threshold'] * 100:>6.1f}% "
+                     f"{test:>16}  {STATUS_LABELS[row['status']]}")
+    lines.append("-" * 110)
+    for config in result['missing_configs']:
+        lines.append(f"[WARN] {config} está en la referencia pero no en esta ejecución")
+    if result['regressions']:
+        lines.append(f"[ERROR] {result['regressions']} regresiones significativas")
+    else:
+        lines.append("[OK] Sin regresiones significativas")
+    return "\n".join(lines)
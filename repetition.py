@@ -0,0 +1,153 @@
+import math
+import statistics
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+_NORMAL = statistics.NormalDist()
+
+
+def t_critical(df: int, confidence: float = 0.95) -> float:
+    """Cuantil bilateral de la t de Student sin depender de SciPy.
+
+    Exacto para 1 y 2 grados de libertad; para el resto se usa la
+    expansión de Cornish-Fisher, con error < 0.1% desde df = 3.
+    """
+    if df <= 0:
+        return math.inf
+    p = 1 - (1 - confidence) / 2
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) * math.sqrt(2 / (4 * p * (1 - p)))
+    z = _NORMAL.inv_cdf(p)
+    z3, z5, z7 = z ** 3, z ** 5, z ** 7
+    return (z + (z3 + z) / (4 * df)
+            + (5 * z5 + 16 * z3 + 3 * z) / (96 * df ** 2)
+            + (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / (384 * df ** 3))
+
+
+def summarize(samples: List[float], confidence: float = 0.95) -> Dict:
+    n = len(samples)
+    if n == 0:
+        return {'n': 0, 'mean': 0.0, 'stddev': 0.0, 'ci_low': None,
+                'ci_high': None, 'ci_half_width': None, 'relative_ci': None,
+                'confidence': confidence}
+    mean = statistics.fmean(samples)
+    stddev = statistics.stdev(samples) if n > 1 else 0.0
+    half = t_critical(n - 1, confidence) * stddev / math.sqrt(n) if n > 1 else math.inf
+    relative = half / abs(mean) if mean else (0.0 if half == 0 else math.inf)
+    return {
+        'n': n,
+        'mean': round(mean, 4),
+        'stddev': round(stddev, 4),
+        'ci_low': round(mean - half, 4) if n > 1 else None,
+        'ci_high': round(mean + half, 4) if n > 1 else None,
+        'ci_half_width': round(half, 4) if n > 1 else None,
+        'relative_ci': round(relative, 4) if math.isfinite(relative) else None,
+        'confidence': confidence,
+    }
+
+
+class AdaptiveRepetitionEngine:
+    """Repite una medición hasta que el IC de cada métrica sea estrecho.
+
+    Tras descartar ``warmup`` ejecuciones, mide al menos ``min_runs`` veces
+    y luego continúa solo mientras quede alguna métrica cuyo semiancho de
+    IC relativo a la media supere ``target_relative_ci``. ``measure``
+    recibe el conjunto de métricas aún ruidosas para poder saltarse las
+    fases que ya convergieron; solo se acumulan muestras de esas métricas.
+    ``failure`` recibe cada resultado y devuelve el motivo si la ejecución
+    falló: se cuenta aparte y no aporta muestras, para que un fallo no entre
+    en el IC como un cero real.
+    """
+    def __init__(self, metrics: Iterable[str], warmup: int = 1,
+                 min_runs: int = 3, max_runs: int = 20,
+                 target_relative_ci: float = 0.05,
+                 time_budget: Optional[float] = None,
+                 confidence: float = 0.95, clock=None,
+                 failure: Optional[Callable[[Dict], Optional[str]]] = None):
+        if min_runs < 2 or max_runs < min_runs:
+            raise ValueError("Se requiere 2 <= min_runs <= max_runs")
+        self.metrics = list(metrics)
+        self.warmup = warmup
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.target_relative_ci = target_relative_ci
+        self.time_budget = time_budget
+        self.confidence = confidence
+        self.clock = clock or time
+        self.failure = failure
+        self.failures = []
+        self.samples = {m: [] for m in self.metrics}
+
+    def _converged(self, metric: str) -> bool:
+        values = self.samples[metric]
+        if len(values) < self.min_runs:
+            return False
+        stats = summarize(values, self.confidence)
+        return (stats['relative_ci'] is not None and
+                stats['relative_ci'] <= self.target_relative_ci)
+
+    def active_metrics(self) -> Set[str]:
+        return {m for m in self.metrics
+                if len(self.samples[m]) < self.max_runs and not self._converged(m)}
+
+    def run(self, measure: Callable[[Set[str]], Dict]) -> Dict:
+        start = self.clock.perf_counter()
+        everything = set(self.metrics)
+        for _ in range(self.warmup):
+            measure(everything)
+        last = {}
+        failed = None
+        runs = 0
+        stop_reason = 'converged'
+        while True:
+            active = self.active_metrics()
+            if not active:
+                if any(len(v) >= self.max_runs and not self._converged(m)
+                       for m, v in self.samples.items()):
+                    stop_reason = 'max_runs'
+                break
+            if (self.time_budget is not None and runs >= self.min_runs and
+                    self.clock.perf_counter() - start >= self.time_budget):
+                stop_reason = 'time_budget'
+                break
+            result = measure(active)
+            runs += 1
+            reason = self.failure(result) if self.failure is not None else None
+            if reason is not None:
+                self.failures.append(reason)
+                failed = result
+                if len(self.failures) >= self.max_runs:
+                    stop_reason = 'failures'
+                    break
+                continue
+            for metric in active:
+                if metric in result:
+                    self.samples[metric].append(float(result[metric]))
+            for key, value in result.items():
+                if isinstance(value, dict) and isinstance(last.get(key), dict):
+                    last[key] = {**last[key], **value}
+                else:
+                    last[key] = value
+        if not last and failed is not None:
+            last = dict(failed)
+        statistics_by_metric = {}
+        for metric, values in self.samples.items():
+            stats = summarize(values, self.confidence)
+            stats['converged'] = self._converged(metric)
+            stats['samples'] = [round(v, 4) for v in values]
+            statistics_by_metric[metric] = stats
+            if values:
+                last[metric] = stats['mean']
+        last['statistics'] = statistics_by_metric
+        last['repetitions'] = {
+            'warmup': self.warmup,
+            'runs': runs,
+            'failures': len(self.failures),
+            'failure_reasons': self.failures[-5:],
+            'elapsed': round(self.clock.perf_counter() - start, 3),
+            'stop_reason': stop_reason,
+            'target_relative_ci': self.target_relative_ci,
+        }
+        return last
@@ -0,0 +1,126 @@
+import fnmatch
+import functools
+import hashlib
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional
+
+CACHE_VERSION = 1
+# Atributos de VirtualizationConfig que son resultados, no configuración
+RUNTIME_FIELDS = ('boot_time', 'cpu_usage_host', 'cpu_usage_guest')
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+@functools.lru_cache(maxsize=None)
+def qemu_version(qemu_binary: str) -> Optional[str]:
+    try:
+        out = subprocess.run([qemu_binary, "--version"], capture_output=True,
+                             text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    lines = out.stdout.strip().splitlines()
+    return lines[0] if out.returncode == 0 and lines else None
+
+
+def host_fingerprint(qemu_binary: str) -> Dict:
+    """Lo que hace que un resultado de otro host (o de otro QEMU) no sirva."""
+    return {'cpu_model': _cpu_model(), 'machine': platform.machine(),
+            'kernel': platform.release(), 'qemu': qemu_version(qemu_binary)}
+
+
+def file_digest(path: str) -> Optional[str]:
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def config_fields(config) -> Dict:
+    return {k: v for k, v in sorted(vars(config).items()) if k not in RUNTIME_FIELDS}
+
+
+def cache_key(config: Dict, qemu_cmd: List[str], params: Dict,
+              fingerprint: Dict) -> str:
+    payload = {'version': CACHE_VERSION, 'config': config, 'qemu_cmd': qemu_cmd,
+               'params': params, 'host': fingerprint}
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class ResultCache:
+    """Métricas de configuraciones ya medidas, una entrada JSON por clave.
+
+    La clave es un SHA-256 de la configuración completa, el comando de QEMU,
+    los parámetros del benchmark y la huella del host, así que cambiar
+    cualquiera de ellos produce una entrada nueva. Cada entrada se escribe
+    (de forma atómica) en cuanto termina su configuración: una ejecución
+    interrumpida se reanuda desde la primera configuración sin entrada.
+    """
+    def __init__(self, directory: str = "results_cache"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)['metrics']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, metrics: Dict, **context):
+        entry = {'key': key, 'config_name': metrics.get('config_name'),
+                 'created': datetime.now().isoformat(), **context,
+                 'metrics': metrics}
+        tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._path(key))
+
+    def entries(self) -> List[Dict]:
+        """Cabecera de cada entrada (sin las métricas)."""
+        entries = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            entry.pop('metrics', None)
+            entries.append(entry)
+        return entries
+
+    def invalidate(self, pattern: str) -> int:
+        """Borra las entradas cuya configuración (o clave) encaja con el
+        patrón glob; devuelve cuántas."""
+        removed = 0
+        for entry in self.entries():
+            name = entry.get('config_name') or ""
+            if fnmatch.fnmatchcase(name, pattern) or entry['key'].startswith(pattern):
+                try:
+                    os.remove(self._path(entry['key']))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
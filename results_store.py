@@ -0,0 +1,261 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RECORDS_FILE = "records.log"
+SERIES_FILE = "series.bin"
+# Cabecera de registro: magia, tipo, run_id, longitud y CRC32 del JSON
+_HEADER = struct.Struct("<2sBxIII")
+_MAGIC = b"RS"
+RUN_START, PHASE, CONFIG, RUN_END, SUMMARY = 1, 2, 3, 4, 5
+_KIND_NAMES = {RUN_START: 'run_start', PHASE: 'phase', CONFIG: 'config',
+               RUN_END: 'run_end', SUMMARY: 'summary'}
+
+
+def _encode(kind: int, run_id: int, payload: Dict) -> bytes:
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    return _HEADER.pack(_MAGIC, kind, run_id, len(body), zlib.crc32(body)) + body
+
+
+class _Locked:
+    """flock exclusivo: varios procesos del pool escriben en el mismo store."""
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, exc_type, exc, tb):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+class ResultStore:
+    """Almacén de resultados de solo anexado.
+
+    ``records.log`` es una secuencia de registros JSON con cabecera binaria
+    (tipo, ejecución, longitud y CRC); cada registro se escribe con un único
+    ``write`` en cuanto termina la fase, así que un fallo o Ctrl-C conserva
+    todo lo medido hasta entonces. Las series del host van a ``series.bin``
+    en formato columnar (cada columna son ``rows`` float64 contiguos) y el
+    registro de la configuración guarda solo su desplazamiento.
+    """
+    def __init__(self, directory: str = "results_store", sync: bool = False):
+        self.directory = directory
+        self.sync = sync
+        os.makedirs(directory, exist_ok=True)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        self._records = os.open(os.path.join(directory, RECORDS_FILE), flags, 0o644)
+        self._series = os.open(os.path.join(directory, SERIES_FILE), flags, 0o644)
+
+    def _append(self, kind: int, run_id: int, payload: Dict):
+        data = _encode(kind, run_id, payload)
+        with _Locked(self._records):
+            os.write(self._records, data)
+            if self.sync:
+                os.fsync(self._records)
+
+    def begin_run(self, meta: Dict = None) -> int:
+        with _Locked(self._records):
+            reader = ResultStoreReader(self.directory)
+            run_id = max(reader.runs(), default=0) + 1
+            reader.close()
+            if reader.truncated:
+                # Restos de una escritura interrumpida: se descartan para que
+                # los registros nuevos sigan siendo alcanzables
+                os.ftruncate(self._records, reader.valid_size)
+            os.write(self._records, _encode(RUN_START, run_id, dict(meta or {})))
+        return run_id
+
+    def record_phase(self, run_id: int, config_name: str, phase: str, data: Dict):
+        self._append(PHASE, run_id, {'config': config_name, 'phase': phase,
+                                     'data': data})
+
+    def record_config(self, run_id: int, metrics: Dict):
+        # Resumen escalar aparte: recorrer el histórico no exige decodificar
+        # histogramas ni contabilidad por fase
+        summary = {k: v for k, v in metrics.items()
+                   if not isinstance(v, (dict, list)) or k == 'host_series'}
+        self._append(CONFIG, run_id, metrics)
+        self._append(SUMMARY, run_id, summary)
+
+    def end_run(self, run_id: int, status: str = "completed"):
+        self._append(RUN_END, run_id, {'status': status})
+
+    def write_series(self, buffers: Dict) -> Dict:
+        """Escribe columnas (``RingBuffer`` o secuencias de float) y
+        devuelve la referencia que se guarda en las métricas."""
+        columns = {}
+        for name, buf in buffers.items():
+            if hasattr(buf, "segments"):
+                columns[name] = buf.segments()
+            else:
+                columns[name] = [memoryview(array('d', buf))]
+        rows = min((sum(len(s) for s in segs) for segs in columns.values()), default=0)
+        with _Locked(self._series):
+            offset = os.fstat(self._series).st_size
+            pad = -offset % 8
+            if pad:
+                os.write(self._series, bytes(pad))
+                offset += pad
+            for segments in columns.values():
+                remaining = rows
+                for segment in segments:
+                    part = segment[:remaining]
+                    os.write(self._series, part)
+                    remaining -= len(part)
+            if self.sync:
+                os.fsync(self._series)
+        return {'offset': offset, 'rows': rows, 'dtype': '<f8',
+                'columns': list(columns)}
+
+    def close(self):
+        for fd in (self._records, self._series):
+            os.close(fd)
+        self._records = self._series = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ResultStoreReader:
+    """Lectura perezosa de un ``ResultStore`` mediante mmap.
+
+    Al abrir solo se recorren las cabeceras de 16 bytes; el JSON de cada
+    registro se decodifica al pedirlo y las series se devuelven como vistas
+    NumPy sobre el mmap, sin copiar. Un registro final truncado o con CRC
+    inválido (escritura interrumpida) marca el final del log.
+    """
+    def __init__(self, directory: str = "results_store"):
+        self.directory = directory
+        self._maps = {}
+        self._index = []
+        self._by_run = {}
+        self.truncated = False
+        self.valid_size = 0
+        records = self._map(RECORDS_FILE)
+        if records is None:
+            return
+        offset, size = 0, len(records)
+        while offset + _HEADER.size <= size:
+            magic, kind, run_id, length, crc = _HEADER.unpack_from(records, offset)
+            start = offset + _HEADER.size
+            if magic != _MAGIC or start + length > size:
+                self.truncated = True
+                break
+            entry = (kind, run_id, start, length, crc)
+            self._index.append(entry)
+            self._by_run.setdefault(run_id, []).append(entry)
+            offset = start + length
+        self.valid_size = offset
+        if offset != size:
+            self.truncated = True
+
+    def _map(self, name: str) -> Optional[mmap.mmap]:
+        if name not in self._maps:
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    self._maps[name] = (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                                        if os.fstat(f.fileno()).st_size else None)
+            except FileNotFoundError:
+                self._maps[name] = None
+        return self._maps[name]
+
+    def _decode(self, entry) -> Optional[Dict]:
+        kind, run_id, start, length, crc = entry
+        body = self._maps[RECORDS_FILE][start:start + length]
+        if zlib.crc32(body) != crc:
+            return None
+        return json.loads(body)
+
+    def records(self, run_id: int = None, kind: int = None) -> Iterator[Dict]:
+        entries = self._index if run_id is None else self._by_run.get(run_id, [])
+        for entry in entries:
+            if kind is not None and entry[0] != kind:
+                continue
+            payload = self._decode(entry)
+            if payload is not None:
+                yield {'type': _KIND_NAMES.get(entry[0], entry[0]),
+                       'run_id': entry[1], 'data': payload}
+
+    def runs(self) -> List[int]:
+        return sorted({run_id for kind, run_id, *_ in self._index if kind == RUN_START})
+
+    def latest_run(self, status: str = None) -> Optional[int]:
+        """Última ejecución, o la última que terminó con ``status``."""
+        for run_id in reversed(self.runs()):
+            if status is None or self.run_info(run_id)['status'] == status:
+                return run_id
+        return None
+
+    def run_info(self, run_id: int) -> Dict:
+        info = {'run_id': run_id, 'status': 'incomplete'}
+        for record in self.records(run_id):
+            if record['type'] == 'run_start':
+                info.update(record['data'])
+            elif record['type'] == 'run_end':
+                info['status'] = record['data'].get('status', 'completed')
+        return info
+
+    def metrics(self, run_id: int) -> List[Dict]:
+        return [r['data'] for r in self.records(run_id, CONFIG)]
+
+    def summaries(self, run_id: int) -> List[Dict]:
+        """Métricas escalares de cada configuración (lectura rápida)."""
+        summaries = [r['data'] for r in self.records(run_id, SUMMARY)]
+        return summaries or self.metrics(run_id)
+
+    def phases(self, run_id: int) -> List[Dict]:
+        """Fases registradas, incluidas las de configuraciones sin terminar."""
+        return [r['data'] for r in self.records(run_id, PHASE)]
+
+    def results(self, run_id: int = None) -> Optional[Dict]:
+        """Ejecución en el formato de results.json (por defecto la última)."""
+        run_id = run_id if run_id is not None else self.latest_run()
+        if run_id is None:
+            return None
+        info = self.run_info(run_id)
+        return {'timestamp': info.get('timestamp'), 'run_id': run_id,
+                'status': info['status'], 'metrics': self.metrics(run_id)}
+
+    def series(self, ref: Dict) -> Dict:
+        """Columnas de ``ref`` (``metrics['host_series']``) sin copiarlas."""
+        data = self._map(SERIES_FILE)
+        rows, offset = ref['rows'], ref['offset']
+        view = memoryview(data) if data is not None else memoryview(b"")
+        columns = {}
+        for i, name in enumerate(ref['columns']):
+            start = offset + i * rows * 8
+            column = view[start:start + rows * 8]
+            columns[name] = (np.frombuffer(column, dtype=ref.get('dtype', '<f8'))
+                             if np is not None else column.cast('d'))
+        return columns
+
+    def close(self):
+        for m in self._maps.values():
+            if m is not None:
+                try:
+                    m.close()
+                except BufferError:
+                    # Aún hay vistas NumPy vivas; el mmap se libera con ellas
+                    pass
+        self._maps = {}
@@ -0,0 +1,297 @@
+import heapq
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict
+from latency_histogram import LatencyHistogram
+from disk_image_pool import parse_size
+from io_trace import direction_summary
+
+# Modelo del modo simulación: valores base (MB/s, Mbps) y su variación
+DISK_MODEL = {
+    'virtio': {'read': 450, 'write': 380, 'variance': 0.15},
+    'emulated': {'read': 180, 'write': 140, 'variance': 0.25},
+}
+NETWORK_MODEL = {
+    'virtio': {'mbps': 9400, 'variance': 0.10},
+    'emulated': {'mbps': 920, 'variance': 0.20},
+}
+# Multiplicador de red por backend respecto a slirp (``user``)
+NETWORK_BACKEND_FACTOR = {'user': 1.0, 'vhost-net': 1.5, 'vhost-user': 1.9}
+# Carga media de CPU del host (%) por fase y familia de dispositivo
+CPU_LOAD_MODEL = {
+    'virtio': {'boot': 30, 'disk_read': 22, 'disk_write': 26, 'disk_replay': 24,
+               'network': 18, 'idle': 4},
+    'emulated': {'boot': 42, 'disk_read': 48, 'disk_write': 55, 'disk_replay': 52,
+                 'network': 51, 'idle': 6},
+}
+# Efecto de los parámetros de ajuste (multiplicadores de lectura, escritura,
+# red y CPU); las combinaciones no listadas no cambian nada
+TUNING_MODEL = {
+    'disk_cache': {'none': (1.0, 0.95, 1.0, 0.95), 'writeback': (1.1, 1.3, 1.0, 1.05),
+                   'writethrough': (1.1, 0.7, 1.0, 1.0), 'directsync': (0.95, 0.65, 1.0, 0.95),
+                   'unsafe': (1.1, 1.45, 1.0, 1.0)},
+    'disk_aio': {'native': (1.08, 1.08, 1.0, 0.92), 'io_uring': (1.12, 1.12, 1.0, 0.88)},
+    'image_format': {'raw': (1.06, 1.1, 1.0, 0.97)},
+    'preallocation': {'metadata': (1.0, 1.05, 1.0, 1.0), 'falloc': (1.0, 1.12, 1.0, 0.98),
+                      'full': (1.0, 1.15, 1.0, 0.98)},
+    'pinning': {'on': (1.04, 1.04, 1.06, 0.96)},
+}
+# Densidad: capacidad agregada del host en múltiplos del throughput de una
+# VM sola e interferencia (pérdida relativa) que añade cada VM vecina
+DENSITY_MODEL = {
+    'virtio': {'disk': 3.2, 'network': 2.6, 'interference': 0.02},
+    'emulated': {'disk': 1.8, 'network': 1.5, 'interference': 0.05},
+}
+# Reproducción de trazas: penalización de lecturas con caché fría y
+# rendimiento relativo de bloques pequeños (el modelo base usa 1 MiB)
+COLD_CACHE_READ_FACTOR = 0.6
+BLOCK_SIZE_EXPONENT = 0.35
+LATENCY_SAMPLES = 2000
+# Núcleos del host simulado: fijo para que el resultado no dependa de la máquina
+SIMULATED_CORES = 8
+
+
+class RealClock:
+    """Reloj del sistema: la implementación por defecto."""
+    virtual = False
+
+    def time(self) -> float:
+        return time.time()
+
+    def perf_counter(self) -> float:
+        return time.perf_counter()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+
+class VirtualClock:
+    """Reloj virtual: ``sleep`` avanza el tiempo simulado al instante.
+
+    Los temporizadores periódicos (``call_every``) se disparan en orden
+    mientras el reloj avanza, de modo que el muestreador del host produce
+    sus muestras sin hilos ni esperas reales.
+    """
+    virtual = True
+
+    def __init__(self, epoch: float = 1_700_000_000.0):
+        self.epoch = epoch
+        self.elapsed = 0.0
+        self._timers = []
+        self._seq = 0
+
+    def time(self) -> float:
+        return self.epoch + self.elapsed
+
+    def perf_counter(self) -> float:
+        return self.elapsed
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.time(), timezone.utc)
+
+    def sleep(self, seconds: float):
+        target = self.elapsed + max(0.0, seconds)
+        while self._timers and self._timers[0][0] <= target:
+            due, seq, period, callback = heapq.heappop(self._timers)
+            self.elapsed = due
+            callback()
+            heapq.heappush(self._timers, (due + period, seq, period, callback))
+        self.elapsed = target
+
+    def call_every(self, period: float, callback: Callable[[], None]) -> int:
+        self._seq += 1
+        heapq.heappush(self._timers,
+                       (self.elapsed + period, self._seq, period, callback))
+        return self._seq
+
+    def cancel(self, handle: int):
+        self._timers = [t for t in self._timers if t[1] != handle]
+        heapq.heapify(self._timers)
+
+
+def device_family(kind: str) -> str:
+    return 'virtio' if kind in ('virtio', 'vhost-net', 'vhost-user') else 'emulated'
+
+
+class SimulatedCounters:
+    """Contadores acumulados del host generados a partir de ``load``.
+
+    Sustituye la lectura de /proc en ``HostSampler`` en modo simulación;
+    el benchmark ajusta ``load`` (porcentaje de CPU) al entrar en cada fase.
+    """
+    TICKS_PER_SECOND = 100
+
+    def __init__(self, clock: VirtualClock, rng: random.Random,
+                 ncores: int = SIMULATED_CORES):
+        self.clock = clock
+        self.rng = rng
+        self.ncores = ncores
+        self.load = 0.0
+        self._last = clock.perf_counter()
+        self._cores = [[0.0, 0.0] for _ in range(ncores)]
+        self._intr = 0.0
+        self._ctxt = 0.0
+        self._disk = [0.0, 0.0]
+        self._net = [0.0, 0.0]
+
+    def __call__(self) -> Dict:
+        now = self.clock.perf_counter()
+        dt = now - self._last
+        self._last = now
+        ticks = dt * self.TICKS_PER_SECOND
+        for core in self._cores:
+            busy = min(100.0, max(0.0, self.load + self.rng.gauss(0, 3))) / 100
+            core[0] += ticks
+            core[1] += ticks * (1 - busy)
+        self._intr += dt * (200 + 40 * self.load)
+        self._ctxt += dt * (300 + 60 * self.load)
+        self._disk[0] += dt * self.load * 1e6
+        self._disk[1] += dt * self.load * 1.2e6
+        self._net[0] += dt * self.load * 2e6
+        self._net[1] += dt * self.load * 2e6
+        return {'time': self.clock.time(), 'mono': now,
+                'cores': [(int(t), int(i)) for t, i in self._cores],
+                'intr': int(self._intr), 'ctxt': int(self._ctxt),
+                'disk': tuple(int(x) for x in self._disk),
+                'net': tuple(int(x) for x in self._net)}
+
+
+def tuning_factors(config) -> Dict[str, float]:
+    factors = {'read': 1.0, 'write': 1.0, 'network': 1.0, 'cpu': 1.0}
+    for attribute, table in TUNING_MODEL.items():
+        effect = table.get(getattr(config, attribute, None))
+        if effect:
+            for key, value in zip(factors, effect):
+                factors[key] *= value
+    virtio = device_family(config.disk_type) == 'virtio'
+    if virtio and config.iothreads:
+        factors['read'] *= 1.1
+        factors['write'] *= 1.1
+        factors['cpu'] *= 0.9
+    # Colas y vCPUs escalan de forma sublineal hasta el número de vCPUs
+    queues = min(config.queues, config.cpus) if virtio else 1
+    factors['read'] *= 1 + 0.15 * math.log2(queues)
+    factors['write'] *= 1 + 0.15 * math.log2(queues)
+    factors['network'] *= 1 + 0.1 * math.log2(max(config.cpus, 1) / 2 + 1)
+    factors['cpu'] *= 1 + 0.05 * (config.cpus - 2)
+    memory_gb = parse_size(config.memory) / 1024 ** 3
+    factors['read'] *= 1 + 0.05 * math.log2(max(memory_gb, 0.25) + 1)
+    return factors
+
+
+def density_factor(kind: str, resource: str, instances: int) -> float:
+    """Fracción del throughput de una VM sola que obtiene cada una de
+    ``instances`` VMs concurrentes (``resource``: 'disk' o 'network')."""
+    model = DENSITY_MODEL[device_family(kind)]
+    share = min(1.0, model[resource] / max(instances, 1))
+    return share * (1 - model['interference']) ** (instances - 1)
+
+
+def _latency_histogram(rng: random.Random, mean_seconds: float,
+                       sigma: float) -> LatencyHistogram:
+    hist = LatencyHistogram()
+    mu = math.log(mean_seconds * 1e9) - sigma ** 2 / 2
+    for _ in range(LATENCY_SAMPLES):
+        hist.record(int(rng.lognormvariate(mu, sigma)))
+    return hist
+
+
+def simulate_disk_result(rng: random.Random, disk_type: str, operation: str,
+                         block_size: int, queue_depth: int = 1,
+                         workers: int = 1, pattern: str = "sequential",
+                         mode: str = "buffered", factor: float = 1.0) -> Dict:
+    model = DISK_MODEL[device_family(disk_type)]
+    variance = model['variance']
+    mb_s = round(model[operation] * factor * (1 + rng.uniform(-variance, variance)), 2)
+    iops = round(mb_s * 1024 * 1024 / block_size, 2)
+    latency = _latency_histogram(rng, queue_depth * workers / iops, 0.3 + variance)
+    summary = latency.summary()
+    return {
+        'operation': operation, 'pattern': pattern, 'mode': mode,
+        'block_size': block_size, 'queue_depth': queue_depth,
+        'workers': workers, 'simulated': True,
+        'mb_s': mb_s, 'iops': iops,
+        'lat_avg_ms': summary['mean'], 'lat_min_ms': summary['min'],
+        'lat_max_ms': summary['max'], 'lat_p50_ms': summary['p50'],
+        'lat_p90_ms': summary['p90'], 'lat_p99_ms': summary['p99'],
+        'lat_p999_ms': summary['p999'],
+        'latency_histogram': latency.to_dict(),
+    }
+
+
+def simulate_replay_result(rng: random.Random, disk_type: str, summary: Dict,
+                           queue_depth: int = 1, pace: str = "fast",
+                           cache: str = "warm", speed: float = 1.0,
+                           factors: Dict[str, float] = None) -> Dict:
+    """Reproducción de una traza a partir de su resumen (``IOTrace.summary``)."""
+    model = DISK_MODEL[device_family(disk_type)]
+    variance = model['variance']
+    factors = factors or {}
+    busy = {}
+    for name, ops_key, bytes_key in (('read', 'reads', 'read_bytes'),
+                                     ('write', 'writes', 'write_bytes')):
+        if not summary[ops_key]:
+            continue
+        block = summary[bytes_key] / summary[ops_key]
+        mb_s = (model[name] * factors.get(name, 1.0) *
+                min(1.0, block / (1024 * 1024)) ** BLOCK_SIZE_EXPONENT *
+                (1 + rng.uniform(-variance, variance)))
+        if name == 'read' and cache == 'cold':
+            mb_s *= COLD_CACHE_READ_FACTOR
+        busy[name] = summary[bytes_key] / (mb_s * 1024 * 1024)
+    elapsed = sum(busy.values())
+    if pace == 'recorded':
+        elapsed = max(elapsed, summary['duration_s'] / speed)
+    elapsed = max(elapsed, 1e-6)
+    result = {'operation': 'replay', 'trace': summary['name'], 'pace': pace,
+              'cache': cache, 'queue_depth': queue_depth, 'speed': speed,
+              'simulated': True, 'recorded_duration': summary['duration_s'],
+              'elapsed': round(elapsed, 6)}
+    total = LatencyHistogram()
+    for name, ops_key, bytes_key in (('read', 'reads', 'read_bytes'),
+                                     ('write', 'writes', 'write_bytes')):
+        ops, nbytes = summary[ops_key], summary[bytes_key]
+        latency = LatencyHistogram()
+        if ops:
+            latency = _latency_histogram(rng, busy[name] / ops * queue_depth,
+                                         0.3 + variance)
+            total.merge(latency)
+        result[name] = direction_summary(ops, nbytes, elapsed, latency)
+    result.update(direction_summary(summary['ops'],
+                                    summary['read_bytes'] + summary['write_bytes'],
+                                    elapsed, total))
+    if pace == 'recorded':
+        result['schedule_lag_p50_ms'] = 0.0
+        result['schedule_lag_p99_ms'] = 0.0
+    return result
+
+
+def simulate_network_result(rng: random.Random, network_type: str,
+                            protocol: str, streams: int,
+                            message_size: int, factor: float = 1.0) -> Dict:
+    model = NETWORK_MODEL[device_family(network_type)]
+    variance = model['variance']
+    mbps = round(model['mbps'] * factor * (1 + rng.uniform(-variance, variance)), 2)
+    pps = round(mbps * 1e6 / 8 / message_size, 2)
+    latency = _latency_histogram(rng, streams / pps * 4, 0.4 + variance)
+    summary = latency.summary()
+    return {
+        'protocol': protocol, 'streams': streams,
+        'message_size': message_size, 'simulated': True,
+        'target': 'simulación', 'latency_kind': 'one_way',
+        'mbps': mbps, 'packets_per_s': pps,
+        'lat_avg_ms': summary['mean'], 'lat_p50_ms': summary['p50'],
+        'lat_p90_ms': summary['p90'], 'lat_p99_ms': summary['p99'],
+        'lat_p999_ms': summary['p999'],
+        'latency_histogram': latency.to_dict(),
+    }
+
+
+def config_rng(seed: int, name: str) -> random.Random:
+    """RNG por configuración: no depende del orden ni del proceso."""
+    return random.Random(f"{seed}:{name}")
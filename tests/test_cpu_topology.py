@@ -0,0 +1,88 @@
+"""Topología de CPU y plan de fijación, con y sin CPUs suficientes."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cpu_topology import (HostTopology, format_cpulist, parse_cpulist,  # noqa: E402
+                          plan_placement)
+
+# Dos nodos de 4 CPUs; en cada uno, CPUs n y n+2 son hermanas SMT
+TOPOLOGY = HostTopology(
+    nodes={0: [0, 1, 2, 3], 1: [4, 5, 6, 7]},
+    cores={0: (0, 0), 1: (0, 1), 2: (0, 0), 3: (0, 1),
+           4: (1, 0), 5: (1, 1), 6: (1, 0), 7: (1, 1)})
+ALL = list(range(8))
+
+
+def test_cpulist_round_trip():
+    assert parse_cpulist("0-3,8,10-11") == [0, 1, 2, 3, 8, 10, 11]
+    assert format_cpulist([11, 0, 1, 2, 3, 8, 10]) == "0-3,8,10-11"
+
+
+def test_spread_uses_physical_cores_before_siblings():
+    assert TOPOLOGY.spread([0, 1, 2, 3]) == [0, 1, 2, 3]
+    assert TOPOLOGY.spread([0, 2, 1]) == [0, 1, 2]
+
+
+def test_enough_cpus_gives_each_thread_its_own():
+    plan = plan_placement(TOPOLOGY, vcpus=2, iothreads=1, node=1, allowed=ALL)
+    assert plan['node'] == 1 and not plan['shared']
+    assert plan['vcpus'] == [4, 5]
+    assert plan['iothreads'] == [6]
+    assert plan['emulator'] == plan['benchmark'] == [7]
+    assert not set(plan['vcpus']) & set(plan['iothreads'])
+
+
+def test_short_of_cpus_reuses_them_and_says_so():
+    plan = plan_placement(TOPOLOGY, vcpus=4, iothreads=2, node=0, allowed=ALL)
+    assert plan['shared']
+    assert plan['vcpus'] == [0, 1, 2, 3]
+    # Sin CPUs libres, iothreads y emulación comparten las del nodo
+    assert len(plan['iothreads']) == 2
+    assert set(plan['iothreads']) <= {0, 1, 2, 3}
+    assert plan['emulator'] and set(plan['emulator']) <= {0, 1, 2, 3}
+
+
+def test_more_vcpus_than_cpus_wraps_around():
+    plan = plan_placement(TOPOLOGY, vcpus=6, node=0, allowed=[0, 1, 2, 3, 4])
+    assert plan['shared']
+    assert plan['vcpus'] == [0, 1, 2, 3, 0, 1]
+    assert set(plan['emulator']) <= {0, 1, 2, 3}
+
+
+def test_node_choice_follows_allowed_cpus():
+    plan = plan_placement(TOPOLOGY, vcpus=1, allowed=[1, 4, 5, 6])
+    assert plan['node'] == 1
+    assert set(plan['vcpus'] + plan['emulator']) <= {4, 5, 6}
+    # Nodo sin CPUs permitidas: se usan las permitidas del proceso
+    plan = plan_placement(TOPOLOGY, vcpus=1, node=0, allowed=[5, 6])
+    assert set(plan['vcpus'] + plan['emulator']) <= {5, 6}
+
+
+def test_unknown_node_is_rejected():
+    with pytest.raises(ValueError):
+        plan_placement(TOPOLOGY, vcpus=1, node=3, allowed=ALL)
+
+
+def test_non_exclusive_only_restricts_to_the_node():
+    plan = plan_placement(TOPOLOGY, vcpus=2, node=1, allowed=ALL, exclusive=False)
+    assert plan['vcpus'] == [] and not plan['shared']
+    assert plan['emulator'] == [4, 5, 6, 7]
+
+
+def test_discover_reads_sysfs(tmp_path):
+    for node, cpulist in ((0, "0-1"), (1, "2-3")):
+        (tmp_path / "node" / f"node{node}").mkdir(parents=True)
+        (tmp_path / "node" / f"node{node}" / "cpulist").write_text(cpulist + "\n")
+    for cpu in range(4):
+        topology = tmp_path / "cpu" / f"cpu{cpu}" / "topology"
+        topology.mkdir(parents=True)
+        (topology / "physical_package_id").write_text(str(cpu // 2))
+        (topology / "core_id").write_text("0")
+    host = HostTopology.discover(str(tmp_path))
+    assert host.nodes == {0: [0, 1], 1: [2, 3]}
+    assert host.summary()['physical_cores'] == 2
+    assert host.node_of(3) == 1
@@ -0,0 +1,90 @@
+"""DiskImagePool: overlays qcow2 con preallocation y ruta sin qemu-img."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from disk_image_pool import DiskImagePool  # noqa: E402
+
+# qemu-img de pega: registra cada llamada y, como el real, rechaza
+# preallocation sobre un backing file salvo con extended_l2=on
+FAKE_QEMU_IMG = textwrap.dedent("""\
+    #!{python}
+    import json, sys
+    args = sys.argv[1:]
+    with open({log!r}, "a") as log:
+        log.write(json.dumps(args) + "\\n")
+    options = ",".join(args[i + 1] for i, a in enumerate(args) if a == "-o")
+    if ("-b" in args and "preallocation=" in options
+            and "preallocation=off" not in options and "extended_l2=on" not in options):
+        sys.exit("qemu-img: Backing file and preallocation can only be used at "
+                 "the same time if extended_l2 is on")
+    open(args[-2], "wb").close()
+""")
+
+
+@pytest.fixture
+def fake_qemu_img(tmp_path):
+    log = tmp_path / "qemu-img.log"
+    script = tmp_path / "qemu-img"
+    script.write_text(FAKE_QEMU_IMG.format(python=sys.executable, log=str(log)))
+    script.chmod(0o755)
+    return str(script), log
+
+
+def calls(log):
+    return [json.loads(line) for line in log.read_text().splitlines()]
+
+
+@pytest.mark.parametrize("preallocation", ["metadata", "falloc", "full"])
+def test_backed_overlay_with_preallocation_uses_extended_l2(tmp_path, fake_qemu_img,
+                                                            preallocation):
+    qemu_img, log = fake_qemu_img
+    pool = DiskImagePool(str(tmp_path / "pool"), size="64M", qemu_img=qemu_img)
+    path, fmt = pool.acquire("vm", preallocation=preallocation)
+    assert fmt == "qcow2" and os.path.exists(path)
+    create = calls(log)[-1]
+    assert "-b" in create
+    options = create[create.index("-o") + 1]
+    assert f"preallocation={preallocation}" in options
+    assert "extended_l2=on" in options
+
+
+@pytest.mark.parametrize("preallocation", [None, "off"])
+def test_overlay_without_preallocation_keeps_default_layout(tmp_path, fake_qemu_img,
+                                                            preallocation):
+    qemu_img, log = fake_qemu_img
+    pool = DiskImagePool(str(tmp_path / "pool"), size="64M", qemu_img=qemu_img)
+    pool.acquire("vm", preallocation=preallocation)
+    assert "-o" not in calls(log)[-1]
+
+
+def test_without_qemu_img_falls_back_to_raw(tmp_path):
+    pool = DiskImagePool(str(tmp_path / "pool"), size="1M",
+                         qemu_img=str(tmp_path / "missing-qemu-img"))
+    path, fmt = pool.acquire("vm", preallocation="falloc")
+    assert fmt == "raw"
+    assert os.path.getsize(path) == 1024 * 1024
+    scratch = pool.scratch("vm")
+    assert scratch != path and not os.path.exists(scratch)
+    pool.release(path)
+    assert not os.path.exists(path)
+
+
+@pytest.mark.skipif(shutil.which("qemu-img") is None, reason="qemu-img no instalado")
+@pytest.mark.parametrize("preallocation", ["off", "metadata", "falloc"])
+def test_real_qemu_img_accepts_backed_preallocation(tmp_path, preallocation):
+    pool = DiskImagePool(str(tmp_path / "pool"), size="64M")
+    path, fmt = pool.acquire("vm", preallocation=preallocation)
+    info = json.loads(subprocess.run(["qemu-img", "info", "--output=json", path],
+                                     capture_output=True, text=True,
+                                     check=True).stdout)
+    assert fmt == "qcow2" and info["format"] == "qcow2"
+    assert info["backing-filename"] == pool.base_image()[0]
@@ -0,0 +1,72 @@
+"""Reducción de series: LTTB, min/max por cubo y línea temporal por fase."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downsampling import downsample, lttb, minmax, phase_timeline  # noqa: E402
+
+
+@pytest.fixture
+def series():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 50.0)
+    y[437] = 25.0   # pico aislado
+    y[811] = -25.0  # valle aislado
+    return x, y
+
+
+def test_lttb_keeps_ends_order_and_spikes(series):
+    x, y = series
+    rx, ry = lttb(x, y, 100)
+    assert len(rx) == 100
+    assert (rx[0], rx[-1]) == (x[0], x[-1])
+    assert np.all(np.diff(rx) > 0)
+    assert 25.0 in ry and -25.0 in ry
+
+
+def test_minmax_keeps_extremes_of_every_bucket(series):
+    x, y = series
+    rx, ry = minmax(x, y, 100)
+    assert len(rx) <= 100
+    assert np.all(np.diff(rx) > 0)
+    assert ry.max() == 25.0 and ry.min() == -25.0
+    for start in range(0, 1000, 20):
+        window = y[start:start + 20]
+        assert window.max() in ry and window.min() in ry
+
+
+@pytest.mark.parametrize("method", [lttb, minmax])
+def test_short_series_are_returned_unchanged(series, method):
+    x, y = series
+    rx, ry = method(x[:50], y[:50], 100)
+    assert np.array_equal(rx, x[:50])
+    assert np.array_equal(ry, y[:50])
+    rx, ry = method(x, y, 1)
+    assert len(rx) == len(x)
+
+
+def test_downsample_accepts_lists_and_rejects_unknown_methods():
+    rx, ry = downsample([0, 1, 2, 3, 4], [0, 5, 1, 5, 0], 4, method='minmax')
+    assert isinstance(rx, np.ndarray) and rx.dtype == np.float64
+    with pytest.raises(ValueError):
+        downsample([0, 1], [0, 1], 2, method='average')
+
+
+def test_phase_timeline_reduces_each_phase_separately():
+    t = np.arange(0.0, 100.0, 0.1) + 50.0
+    v = np.where(t < 60.0, 10.0, 80.0)
+    phases = [{'name': 'boot', 'start': 50.0, 'end': 59.95},
+              {'name': 'disk_read', 'start': 60.0, 'end': 149.95},
+              {'name': 'idle', 'start': 200.0, 'end': 210.0}]
+    timeline = phase_timeline(t, v, phases, points=20)
+    boot, read, idle = timeline['phases']
+    assert timeline['samples'] == 1000
+    # La fase corta recibe tantos puntos como la larga
+    assert len(boot['t']) == len(read['t']) == 20
+    assert boot['start'] == 0.0 and read['start'] == 10.0
+    assert (boot['mean'], read['max']) == (10.0, 80.0)
+    assert idle['samples'] == 0 and 't' not in idle
@@ -0,0 +1,99 @@
+"""Flota con agentes locales: dos agentes reales en puertos libres, un
+puerto cerrado y un servidor que acepta pero nunca responde."""
+import os
+import re
+import socket
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fleet import FleetCoordinator  # noqa: E402
+from virtualization_benchmark import (build_configurations,  # noqa: E402
+                                      parse_args as parse_benchmark_args)
+
+LISTENING = re.compile(r"escuchando en ([\d.]+):(\d+)")
+
+
+def start_agent(tmp_path, name):
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "fleet.py"), "agent", "--port", "0",
+         "--name", name, "--heartbeat", "0.2",
+         "--image-dir", str(tmp_path / f"{name}_images")],
+        cwd=str(tmp_path), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True)
+    for line in process.stdout:
+        match = LISTENING.search(line)
+        if match:
+            return process, f"{match.group(1)}:{match.group(2)}"
+    process.kill()
+    raise RuntimeError(f"el agente {name} no llegó a escuchar")
+
+
+@pytest.fixture
+def agents(tmp_path):
+    processes = []
+    try:
+        for name in ("agente-a", "agente-b"):
+            process, address = start_agent(tmp_path, name)
+            processes.append((process, address))
+        yield [address for _, address in processes]
+    finally:
+        for process, _ in processes:
+            process.kill()
+            process.wait()
+
+
+@pytest.fixture
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def silent_agent():
+    # Acepta conexiones (por la cola de listen) pero nunca contesta
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(8)
+    yield f"127.0.0.1:{sock.getsockname()[1]}"
+    sock.close()
+
+
+def test_fleet_merges_results_and_isolates_failures(agents, closed_port, silent_agent):
+    args = parse_benchmark_args(["--simulate", "--store", ""])
+    configurations = build_configurations(args)
+    names = sorted(c.name for c in configurations)
+    coordinator = FleetCoordinator(agents + [closed_port, silent_agent],
+                                   timeout=1.0, retries=2, connect_timeout=1.0,
+                                   backoff=0.05)
+    fleet = coordinator.run(configurations, {'simulate': True, 'seed': 7})
+
+    outcomes = {o['agent']: o for o in fleet['agents']}
+    for address, name in zip(agents, ("agente-a", "agente-b")):
+        outcome = outcomes[address]
+        assert outcome['status'] == 'completed'
+        assert outcome['host'] == name
+        assert outcome['attempts'] == 1
+        assert outcome['received'] == len(names)
+        assert outcome['fingerprint']
+
+    refused = outcomes[closed_port]
+    assert refused['status'] == 'failed'
+    assert refused['attempts'] == coordinator.retries + 1
+    assert refused['received'] == 0 and refused['error']
+
+    silent = outcomes[silent_agent]
+    assert silent['status'] == 'timeout'
+    assert silent['attempts'] == 1
+    assert silent['received'] == 0
+
+    by_host = {}
+    for m in fleet['metrics']:
+        by_host.setdefault(m['host'], []).append(m['config_name'])
+    assert {host: sorted(found) for host, found in by_host.items()} == {
+        "agente-a": names, "agente-b": names}
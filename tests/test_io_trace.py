@@ -0,0 +1,122 @@
+"""IOTrace: conversión desde blkparse y strace, CSV y binario, y replay."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from io_trace import (READ, WRITE, IOTrace, TraceReplayEngine,  # noqa: E402
+                      TraceReplayJob)
+
+BLKPARSE = """\
+  8,0    3        1     0.000100000  1234  Q   R 2048 + 8 [fio]
+  8,0    3        2     0.000150000  1234  G   R 2048 + 8 [fio]
+  8,0    3        3     0.000200000  1234  D   R 2048 + 8 [fio]
+  8,0    1        4     0.000300000  1234  Q  WS 4096 + 16 [fio]
+  8,0    1        5     0.000400000  1234  Q  FN 0 + 0 [kworker]
+  8,0    1        6     0.000500000  1234  Q   N 0 + 8 [fio]
+CPU0 (8,0):
+ Reads Queued:           1,        4KiB
+"""
+
+STRACE = """\
+1700000000.500000 pread64(3, "\\0\\0\\0"..., 4096, 8192) = 4096
+[pid  4321] 1700000000.250000 pwrite64(3, "abc, def"..., 512, 0) = 512
+1700000000.750000 pread64(5, ""..., 4096, 0) = 4096
+1700000001.000000 pread64(3, ""..., 4096, 1048576) = 0
+1700000001.100000 openat(AT_FDCWD, "/data", O_RDONLY) = 3
+"""
+
+
+def sample_trace():
+    trace = IOTrace("sample")
+    trace.append(0.0, WRITE, 0, 4096)
+    trace.append(0.001, READ, 4096, 8192)
+    trace.append(0.002, READ, 8192, 4096)
+    trace.append(0.0035, WRITE, 65536, 512)
+    return trace
+
+
+def test_from_blktrace_keeps_queued_reads_and_writes():
+    trace = IOTrace.from_blktrace(BLKPARSE.splitlines())
+    assert list(trace.ops) == [READ, WRITE]
+    assert list(trace.offsets) == [2048 * 512, 4096 * 512]
+    assert list(trace.sizes) == [8 * 512, 16 * 512]
+    assert list(trace.times) == pytest.approx([0.0, 0.0002])
+    dispatched = IOTrace.from_blktrace(BLKPARSE.splitlines(), action="D")
+    assert len(dispatched) == 1
+
+
+def test_from_strace_filters_by_fd_and_sorts():
+    trace = IOTrace.from_strace(STRACE.splitlines(), fd=3)
+    # Ordenada por tiempo; la lectura de 0 bytes y la otra fd se descartan
+    assert list(trace.ops) == [WRITE, READ]
+    assert list(trace.offsets) == [0, 8192]
+    assert list(trace.sizes) == [512, 4096]
+    assert list(trace.times) == pytest.approx([0.0, 0.25])
+    assert len(IOTrace.from_strace(STRACE.splitlines())) == 3
+
+
+def test_strace_wall_clock_times():
+    lines = ['10:00:00.500000 pread64(3, ""..., 4096, 0) = 4096',
+             '10:00:01.000000 pwrite64(3, ""..., 4096, 4096) = 4096']
+    trace = IOTrace.from_strace(lines)
+    assert list(trace.times) == pytest.approx([0.0, 0.5])
+
+
+@pytest.mark.parametrize("name", ["trace.csv", "trace.bin"])
+def test_save_load_round_trip(tmp_path, name):
+    trace = sample_trace()
+    path = str(tmp_path / name)
+    trace.save(path)
+    loaded = IOTrace.load(path)
+    assert loaded.name == name
+    assert list(loaded.ops) == list(trace.ops)
+    assert list(loaded.offsets) == list(trace.offsets)
+    assert list(loaded.sizes) == list(trace.sizes)
+    assert list(loaded.times) == pytest.approx(list(trace.times))
+
+
+def test_csv_accepts_words_and_reports_bad_lines(tmp_path):
+    path = tmp_path / "trace.csv"
+    path.write_text("time_s,op,offset,size\n# comentario\n0.0,read,0,4096\n"
+                    "0.1,Write,4096,4096\n")
+    assert list(IOTrace.load(str(path)).ops) == [READ, WRITE]
+    path.write_text("0.0,R,0\n")
+    with pytest.raises(ValueError, match="trace.csv:1"):
+        IOTrace.load(str(path))
+
+
+def test_summary_ranges_and_extent():
+    trace = sample_trace()
+    summary = trace.summary()
+    assert (summary['reads'], summary['writes']) == (2, 2)
+    assert summary['read_bytes'] == 12288 and summary['write_bytes'] == 4608
+    assert summary['extent_bytes'] == 65536 + 512
+    # Los rangos de lectura solapados se fusionan
+    assert trace.ranges(READ) == [(4096, 12288)]
+
+
+@pytest.mark.parametrize("pace, cache", [("fast", "warm"), ("recorded", "cold")])
+def test_replay_on_scratch_file(tmp_path, pace, cache):
+    target = str(tmp_path / "scratch.raw")
+    result = TraceReplayEngine(TraceReplayJob(target, sample_trace(), pace=pace,
+                                              cache=cache, queue_depth=2)).run()
+    assert result['scope'] == 'host'
+    assert result['ops'] == 4
+    assert result['read']['ops'] == 2 and result['write']['ops'] == 2
+    assert os.path.getsize(target) >= sample_trace().extent
+
+
+def test_replay_refuses_vm_images(tmp_path):
+    image = tmp_path / "disk.qcow2"
+    image.write_bytes(b"QFI\xfb" + bytes(508))
+    with pytest.raises(ValueError):
+        TraceReplayEngine(TraceReplayJob(str(image), sample_trace())).run()
+    assert image.read_bytes()[:4] == b"QFI\xfb"
+
+
+def test_empty_trace_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        TraceReplayJob(str(tmp_path / "x"), IOTrace())
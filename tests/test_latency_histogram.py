@@ -0,0 +1,81 @@
+"""LatencyHistogram: percentiles dentro del error relativo y combinación."""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latency_histogram import LatencyHistogram  # noqa: E402
+
+
+def exact_percentile(values, p):
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+@pytest.fixture
+def values():
+    rng = random.Random(7)
+    return [int(rng.lognormvariate(11, 1.5)) for _ in range(20000)]
+
+
+def test_small_values_are_exact():
+    hist = LatencyHistogram()
+    for value in range(100):
+        hist.record(value)
+    assert hist.percentile(50) == 49
+    assert hist.percentile(100) == 99
+    assert (hist.min, hist.max, hist.total) == (0, 99, 100)
+
+
+@pytest.mark.parametrize("p", [50, 90, 99, 99.9])
+def test_percentiles_within_relative_error(values, p):
+    hist = LatencyHistogram(sub_bucket_bits=7)
+    for value in values:
+        hist.record(value)
+    exact = exact_percentile(values, p)
+    # Error relativo máximo 2**-(sub_bucket_bits - 1)
+    assert abs(hist.percentile(p) - exact) <= exact * 2 ** -6
+    assert hist.mean() == pytest.approx(sum(values) / len(values))
+
+
+def test_merge_equals_recording_everything(values):
+    whole, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(values):
+        whole.record(value)
+        (left if i % 3 else right).record(value)
+    merged = left.merge(right)
+    assert merged is left
+    assert list(merged.counts) == list(whole.counts)
+    assert (merged.total, merged.sum, merged.min, merged.max) == \
+        (whole.total, whole.sum, whole.min, whole.max)
+    assert merged.summary() == whole.summary()
+
+
+def test_merge_into_empty_and_rejects_other_layouts():
+    source = LatencyHistogram()
+    source.record(5000)
+    empty = LatencyHistogram().merge(source)
+    assert (empty.min, empty.max, empty.total) == (5000, 5000, 1)
+    with pytest.raises(ValueError):
+        LatencyHistogram(sub_bucket_bits=5).merge(source)
+
+
+def test_out_of_range_values_are_clamped():
+    hist = LatencyHistogram(max_bits=20)
+    hist.record(-3)
+    hist.record(1 << 30)
+    assert hist.min == 0
+    assert hist.max == (1 << 20) - 1
+
+
+def test_dict_round_trip(values):
+    hist = LatencyHistogram()
+    for value in values:
+        hist.record(value)
+    restored = LatencyHistogram.from_dict(hist.to_dict())
+    assert restored.summary() == hist.summary()
+    assert restored.cdf() == hist.cdf()
@@ -0,0 +1,79 @@
+"""QemuLauncher contra fake_qemu.py: marcadores de la consola serie,
+tiempo máximo de arranque y parada Ctrl-A x → SIGTERM → SIGKILL."""
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from qemu_launcher import BootTimeoutError, QemuLauncher  # noqa: E402
+
+FAKE_QEMU = [sys.executable, os.path.join(ROOT, "fake_qemu.py")]
+
+
+def launch(monkeypatch, tmp_path, delays="0.05,0.1,0.05", ignore="", timeout=10.0):
+    monkeypatch.setenv("FAKE_QEMU_DELAYS", delays)
+    monkeypatch.setenv("FAKE_QEMU_IGNORE", ignore)
+    launcher = QemuLauncher(FAKE_QEMU, timeout=timeout,
+                            log_path=str(tmp_path / "serial.log"))
+    launcher.start()
+    return launcher
+
+
+def test_marks_each_boot_stage(monkeypatch, tmp_path):
+    launcher = launch(monkeypatch, tmp_path, delays="0.1,0.2,0.1")
+    try:
+        stages = launcher.wait_for_boot()
+    finally:
+        launcher.stop(timeout=2.0)
+    assert list(stages) == ["firmware", "kernel", "login"]
+    assert 0.1 <= stages["firmware"] < stages["kernel"] < stages["login"]
+    assert stages["kernel"] - stages["firmware"] >= 0.2
+    assert launcher.boot_time() == stages["login"]
+    # El prompt de login no acaba en salto de línea y aun así se detecta
+    assert b"fake-guest login: " in (tmp_path / "serial.log").read_bytes()
+
+
+def test_boot_timeout(monkeypatch, tmp_path):
+    launcher = launch(monkeypatch, tmp_path, delays="0.05,5,0", timeout=0.5)
+    try:
+        with pytest.raises(BootTimeoutError, match="firmware"):
+            launcher.wait_for_boot()
+        assert "login" not in launcher.stages
+    finally:
+        launcher.stop(timeout=2.0)
+
+
+def test_exit_before_login_is_a_boot_failure(monkeypatch, tmp_path):
+    monkeypatch.setenv("FAKE_QEMU_EXIT", "1")
+    launcher = QemuLauncher(FAKE_QEMU, markers=[("kernel", "Linux version"),
+                                                ("shell", "# ")], timeout=5.0)
+    launcher.start()
+    try:
+        with pytest.raises(BootTimeoutError, match="terminó"):
+            launcher.wait_for_boot()
+    finally:
+        launcher.stop(timeout=2.0)
+
+
+@pytest.mark.parametrize("ignore, expected_code, console, waits", [
+    ("", 0, b"QEMU: Terminated", 0),
+    ("quit", 0, b"terminating on signal 15", 1),
+    ("quit,term", -signal.SIGKILL, None, 2),
+])
+def test_stop_escalates(monkeypatch, tmp_path, ignore, expected_code, console, waits):
+    launcher = launch(monkeypatch, tmp_path, ignore=ignore)
+    launcher.wait_for_boot()
+    started = time.monotonic()
+    code = launcher.stop(timeout=1.0)
+    elapsed = time.monotonic() - started
+    assert code == expected_code
+    assert launcher.process is None
+    if console is not None:
+        assert console in (tmp_path / "serial.log").read_bytes()
+    # Cada escalón ignorado agota la mitad de ``timeout`` antes del siguiente
+    assert 0.5 * waits <= elapsed < 0.5 * waits + 1.0
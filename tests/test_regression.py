@@ -0,0 +1,78 @@
+"""RegressionGate: pruebas estadísticas y código de salida 4 de la suite."""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from regression import (REGRESSION_EXIT_CODE, RegressionGate,  # noqa: E402
+                        load_reference, mann_whitney)
+import virtualization_benchmark  # noqa: E402
+
+BASE = [100.0, 101.0, 99.0, 100.5, 99.5, 100.2]
+
+
+def test_mann_whitney_separates_shifted_samples():
+    assert mann_whitney(BASE, [v - 10 for v in BASE]) < 0.01
+    assert mann_whitney(BASE, [v + 10 for v in BASE]) > 0.99
+    assert mann_whitney([1.0] * 5, [1.0] * 5) == 1.0
+
+
+@pytest.mark.parametrize("method", ["mannwhitney", "bootstrap"])
+def test_gate_statuses(method):
+    gate = RegressionGate(threshold=0.05, method=method)
+    slower = [v * 0.8 for v in BASE]
+    assert gate.compare_metric('disk_read_speed', BASE, slower)['status'] == 'regression'
+    assert gate.compare_metric('disk_read_speed', BASE, BASE)['status'] == 'ok'
+    # Menos es mejor en boot_time: el mismo cambio es una mejora
+    assert gate.compare_metric('boot_time', BASE, slower)['status'] == 'improvement'
+    # Significativo pero por debajo del umbral
+    assert gate.compare_metric('disk_read_speed', BASE,
+                               [v * 0.98 for v in BASE])['status'] == 'ok'
+    assert gate.compare_metric('disk_read_speed', BASE[:2],
+                               slower[:2])['status'] == 'insufficient'
+
+
+def test_compare_reports_missing_configs():
+    reference = [{'config_name': 'a', 'disk_read_speed': 100.0},
+                 {'config_name': 'b', 'disk_read_speed': 100.0}]
+    result = RegressionGate().compare(reference, [{'config_name': 'a',
+                                                   'disk_read_speed': 90.0}])
+    assert result['missing_configs'] == ['b']
+    assert [r['status'] for r in result['rows']] == ['insufficient']
+
+
+def run_suite(*args):
+    return virtualization_benchmark.main(["--simulate", "--store", "", "--adaptive",
+                                          "--min-runs", "5", "--max-runs", "5",
+                                          *args])
+
+
+def test_suite_exits_with_4_on_a_regression(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert run_suite("--image-dir", str(tmp_path / "images"),
+                     "--save-baseline", "ref.json") == 0
+    assert run_suite("--image-dir", str(tmp_path / "images"),
+                     "--compare-baseline", "ref.json") == 0
+
+    # Una referencia un 50 % más rápida hace que la ejecución actual empeore
+    data = json.loads((tmp_path / "ref.json").read_text())
+    for m in data['metrics']:
+        stats = m['statistics']['disk_read_speed']
+        stats['samples'] = [v * 1.5 for v in stats['samples']]
+    (tmp_path / "faster.json").write_text(json.dumps(data))
+    assert run_suite("--image-dir", str(tmp_path / "images"),
+                     "--compare-baseline", "faster.json") == REGRESSION_EXIT_CODE == 4
+    regression = json.loads((tmp_path / "results.json").read_text())['regression']
+    assert regression['regressions'] >= 1
+
+
+def test_unreadable_reference_is_a_usage_error(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "empty.json").write_text(json.dumps({'metrics': []}))
+    with pytest.raises(ValueError):
+        load_reference(str(tmp_path / "empty.json"))
+    assert run_suite("--image-dir", str(tmp_path / "images"),
+                     "--compare-baseline", "empty.json") == 2
@@ -0,0 +1,88 @@
+"""ResultStore: lectura por mmap, registros truncados o corruptos y series."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_store import RECORDS_FILE, ResultStore, ResultStoreReader  # noqa: E402
+
+
+def write_run(directory, configs, status="completed"):
+    with ResultStore(directory) as store:
+        run_id = store.begin_run({'timestamp': 't'})
+        for name in configs:
+            store.record_phase(run_id, name, 'disk_read', {'mb_s': 1.0})
+            store.record_config(run_id, {'config_name': name, 'disk_read_speed': 1.0,
+                                         'disk_io': {'read': {'mb_s': 1.0}}})
+        if status:
+            store.end_run(run_id, status)
+    return run_id
+
+
+def test_round_trip(tmp_path):
+    directory = str(tmp_path)
+    first = write_run(directory, ["a", "b"])
+    second = write_run(directory, ["c"], status=None)
+    reader = ResultStoreReader(directory)
+    assert not reader.truncated
+    assert reader.runs() == [first, second]
+    assert reader.latest_run() == second
+    assert reader.latest_run('completed') == first
+    assert reader.run_info(second)['status'] == 'incomplete'
+    assert [m['config_name'] for m in reader.metrics(first)] == ["a", "b"]
+    # El resumen no lleva los diccionarios anidados
+    assert 'disk_io' not in reader.summaries(first)[0]
+    assert len(reader.phases(first)) == 2
+    reader.close()
+
+
+def test_truncated_tail_is_ignored_and_discarded_on_next_run(tmp_path):
+    directory = str(tmp_path)
+    first = write_run(directory, ["a", "b"])
+    path = os.path.join(directory, RECORDS_FILE)
+    complete = os.path.getsize(path)
+    write_run(directory, ["c"])
+    # Corte a mitad de la segunda ejecución (escritura interrumpida)
+    with open(path, "r+b") as f:
+        f.truncate(complete + 40)
+
+    reader = ResultStoreReader(directory)
+    assert reader.truncated
+    assert reader.valid_size < complete + 40
+    assert reader.latest_run('completed') == first
+    assert [m['config_name'] for m in reader.metrics(first)] == ["a", "b"]
+    reader.close()
+
+    third = write_run(directory, ["d"])
+    reader = ResultStoreReader(directory)
+    assert not reader.truncated
+    assert reader.latest_run('completed') == third
+    assert [m['config_name'] for m in reader.metrics(third)] == ["d"]
+    reader.close()
+
+
+def test_corrupted_record_is_skipped(tmp_path):
+    directory = str(tmp_path)
+    run_id = write_run(directory, ["a", "b"])
+    path = os.path.join(directory, RECORDS_FILE)
+    data = bytearray(open(path, "rb").read())
+    # Un byte cambiado dentro del JSON de la primera configuración: falla el CRC
+    at = data.index(b'"config_name":"a"') + len('"config_name":"')
+    data[at] = ord("z")
+    open(path, "wb").write(bytes(data))
+    reader = ResultStoreReader(directory)
+    assert [m['config_name'] for m in reader.metrics(run_id)] == ["b"]
+    reader.close()
+
+
+def test_series_are_read_back_as_columns(tmp_path):
+    directory = str(tmp_path)
+    with ResultStore(directory) as store:
+        store.write_series({'x': [1.0, 2.0, 3.0]})
+        ref = store.write_series({'timestamp': [0.0, 0.5], 'cpu_total': [10.0, 20.0]})
+    reader = ResultStoreReader(directory)
+    series = reader.series(ref)
+    assert list(series['timestamp']) == [0.0, 0.5]
+    assert list(series['cpu_total']) == [10.0, 20.0]
+    del series
+    reader.close()
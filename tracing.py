@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class _NullSpan:
+    """Span de un tracer desactivado: no mide nada."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def finish(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = tracer.clock.perf_counter()
+        self.tid = threading.get_ident()
+
+    def finish(self, **args):
+        if self.tracer is None:
+            return
+        end = self.tracer.clock.perf_counter()
+        self.args.update(args)
+        self.tracer._record(self, end)
+        self.tracer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.finish()
+        return False
+
+
+class Tracer:
+    """Spans con inicio y fin para las etapas del benchmark y del analizador.
+
+    Desactivado, ``span()`` devuelve siempre el mismo objeto vacío, así que
+    instrumentar una etapa cuesta una llamada. Los spans se exportan como
+    eventos completos ("X") del formato Chrome trace (chrome://tracing,
+    Perfetto) y se resumen en una tabla plana de tiempos por etapa.
+    """
+    def __init__(self, enabled: bool = True, clock=None,
+                 process_name: str = "benchmark"):
+        self.enabled = enabled
+        self.clock = clock or time
+        self.events = []
+        self.process_names = {os.getpid(): process_name}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: str = "benchmark", **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+
+    begin = span
+
+    def _record(self, span: Span, end: float):
+        event = {'name': span.name, 'cat': span.category, 'ph': 'X',
+                 'ts': round(span.start * 1e6, 3),
+                 'dur': round((end - span.start) * 1e6, 3),
+                 'pid': os.getpid(), 'tid': span.tid}
+        if span.args:
+            event['args'] = span.args
+        with self._lock:
+            self.events.append(event)
+
+    def merge(self, events: List[Dict], process_name: Optional[str] = None):
+        """Añade los eventos de otro proceso (p. ej. un worker del pool)."""
+        if not self.enabled or not events:
+            return
+        with self._lock:
+            self.events.extend(events)
+        if process_name:
+            for pid in {e['pid'] for e in events}:
+                self.process_names.setdefault(pid, f"{process_name} {pid}")
+
+    def chrome_trace(self) -> Dict:
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                     'args': {'name': name}}
+                    for pid, name in sorted(self.process_names.items())]
+        events = sorted(self.events, key=lambda e: (e['pid'], e['ts']))
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        print(f"[OK] Traza guardada en {path} ({len(self.events)} spans)")
+
+    def timing_table(self) -> List[Dict]:
+        """Tiempo por etapa (categoría y nombre), de mayor a menor total.
+
+        ``share_percent`` es la fracción de la duración total de la traza
+        (del primer inicio al último fin); las etapas anidadas o de procesos
+        en paralelo pueden sumar más del 100%.
+        """
+        rows = {}
+        for event in self.events:
+            key = (event['cat'], event['name'])
+            row = rows.setdefault(key, {'category': key[0], 'name': key[1],
+                                        'count': 0, 'total_s': 0.0, 'max_s': 0.0})
+            seconds = event['dur'] / 1e6
+            row['count'] += 1
+            row['total_s'] += seconds
+            row['max_s'] = max(row['max_s'], seconds)
+        wall = 0.0
+        if self.events:
+            wall = (max(e['ts'] + e['dur'] for e in self.events) -
+                    min(e['ts'] for e in self.events)) / 1e6
+        table = []
+        for row in sorted(rows.values(), key=lambda r: r['total_s'], reverse=True):
+            row['mean_s'] = round(row['total_s'] / row['count'], 6)
+            row['share_percent'] = round(row['total_s'] / wall * 100, 2) if wall else 0.0
+            row['total_s'] = round(row['total_s'], 6)
+            row['max_s'] = round(row['max_s'], 6)
+            table.append(row)
+        return table
+
+
+NULL_TRACER = Tracer(enabled=False)
+
+
+def format_timings(table: List[Dict], limit: int = 25) -> str:
+    lines = ["\nTIEMPO POR ETAPA:"]
+    lines.append(f"{'Categoría':<10} {'Etapa':<28} {'N':>5} {'Total s':>10} "
+                 f"{'Media s':>10} {'Máx. s':>10} {'% traza':>8}")
+    lines.append("-" * 86)
+    for row in table[:limit]:
+        lines.append(f"{row['category']:<10} {row['name'][:28]:<28} {row['count']:>5} "
+                     f"{row['total_s']:>10.3f} {row['mean_s']:>10.3f} "
+                     f"{row['max_s']:>10.3f} {row['share_percent']:>7.1f}%")
+    lines.append("-" * 86)
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+import copy
+import itertools
+from typing import Dict, List, Optional, Sequence
+
+# Dimensiones barribles: atributo de VirtualizationConfig -> valores
+SWEEP_DIMENSIONS = {
+    'disk_cache': ['none', 'writeback', 'writethrough', 'directsync', 'unsafe'],
+    'disk_aio': ['threads', 'native', 'io_uring'],
+    'iothreads': [0, 1],
+    'queues': [1, 2, 4],
+    'cpus': [1, 2, 4],
+    'memory': ['1024M', '2048M', '4096M'],
+    'image_format': ['qcow2', 'raw'],
+    'preallocation': ['off', 'metadata', 'falloc', 'full'],
+    'pinning': ['off', 'on'],
+    'network_type': ['virtio', 'e1000', 'vhost-net', 'vhost-user'],
+}
+_INTEGER_DIMENSIONS = {'iothreads', 'queues', 'cpus'}
+# Las únicas dimensiones que cambian lo que se mide: el disco y la red se
+# miden en el host, y el resto solo cambia el comando de QEMU (sus
+# diferencias en el ranking serían ruido o, con --simulate, el modelo)
+HOST_DIMENSIONS = ('pinning', 'network_type')
+# Abreviaturas para el nombre de cada configuración generada
+_SHORT = {'disk_cache': 'c', 'disk_aio': 'aio', 'iothreads': 'iot', 'queues': 'q',
+          'cpus': 'cpu', 'memory': 'mem', 'image_format': 'fmt',
+          'preallocation': 'pre', 'pinning': 'pin', 'network_type': 'net'}
+
+
+def parse_sweep(specs: Sequence[str]) -> Dict[str, List]:
+    """``["disk_cache=none,writeback", "cpus=all"]`` -> dimensiones."""
+    dimensions = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in SWEEP_DIMENSIONS:
+            raise ValueError(f"Dimensión desconocida: {name} "
+                             f"(válidas: {', '.join(SWEEP_DIMENSIONS)})")
+        if values in ("", "all"):
+            dimensions[name] = list(SWEEP_DIMENSIONS[name])
+            continue
+        parsed = [int(v) if name in _INTEGER_DIMENSIONS else v
+                  for v in values.split(",")]
+        allowed = SWEEP_DIMENSIONS[name]
+        if name not in ('cpus', 'memory', 'queues'):
+            invalid = [v for v in parsed if v not in allowed]
+            if invalid:
+                raise ValueError(f"Valores inválidos para {name}: {invalid}")
+        dimensions[name] = parsed
+    return dimensions
+
+
+def invalid_reason(config) -> Optional[str]:
+    """Motivo por el que QEMU rechazaría (o ignoraría) la combinación."""
+    if config.disk_aio == 'native' and config.disk_cache not in ('none', 'directsync'):
+        return "aio=native requiere cache=none o directsync"
+    if config.preallocation == 'metadata' and config.image_format == 'raw':
+        return "preallocation=metadata solo existe en qcow2"
+    if config.disk_type != 'virtio' and (config.iothreads or config.queues > 1):
+        return "iothreads y multiqueue solo aplican a virtio"
+    if config.queues > max(config.cpus, 1):
+        return "más colas que vCPUs"
+    return None
+
+
+def expand_matrix(bases: Sequence, dimensions: Dict[str, List]) -> List:
+    """Producto cartesiano de ``dimensions`` sobre cada configuración base.
+
+    Las combinaciones inválidas se descartan; cada configuración resultante
+    es una copia de su base con un nombre que resume sus valores.
+    """
+    names = list(dimensions)
+    configs = []
+    for base in bases:
+        for values in itertools.product(*(dimensions[n] for n in names)):
+            config = copy.deepcopy(base)
+            for name, value in zip(names, values):
+                setattr(config, name, value)
+            if invalid_reason(config):
+                continue
+            suffix = "_".join(f"{_SHORT[n]}-{v}" for n, v in zip(names, values))
+            config.name = f"{base.name}_{suffix}" if suffix else base.name
+            config.disk_path = f"/tmp/{config.name}_disk.img"
+            config.tuning = {**base.tuning, **dict(zip(names, values))}
+            configs.append(config)
+    return configs
+
+
+def efficiency(metrics: Dict) -> Dict:
+    """Throughput por punto de CPU: disco (MB/s) y red (Mbps) por % de CPU.
+
+    Usa la CPU del proceso de la VM cuando existe; si no, la del host.
+    """
+    cpu = metrics.get('vm_cpu_percent') or metrics.get('cpu_overhead') or 0
+    disk = (metrics.get('disk_read_speed') or 0) + (metrics.get('disk_write_speed') or 0)
+    network = metrics.get('network_throughput') or 0
+    return {
+        'config_name': metrics.get('config_name'),
+        'tuning': metrics.get('tuning', {}),
+        'cpu_percent': cpu,
+        'disk_mb_s': round(disk, 2),
+        'network_mbps': round(network, 2),
+        'disk_per_cpu': round(disk / cpu, 3) if cpu else 0.0,
+        'network_per_cpu': round(network / cpu, 3) if cpu else 0.0,
+    }
+
+
+def rank_by_efficiency(metrics: List[Dict], key: str = 'disk_per_cpu') -> List[Dict]:
+    rows = [efficiency(m) for m in metrics]
+    rows.sort(key=lambda r: r[key], reverse=True)
+    for position, row in enumerate(rows, 1):
+        row['rank'] = position
+    return rows
+
+
+def measured_dimensions(dimensions: Sequence[str], simulate: bool) -> str:
+    """Nota del ranking: de dónde salen las diferencias entre configuraciones."""
+    if simulate:
+        return "modelo de simulación, no medidas"
+    return (f"medido en el host; solo cuentan {', '.join(HOST_DIMENSIONS)} "
+            f"(barrido: {', '.join(dimensions) or '-'})")
+
+
+def format_ranking(rows: List[Dict], limit: int = 20, note: str = None) -> str:
+    lines = ["\nRANKING DE CONFIGURACIONES (throughput por % de CPU):"]
+    if note:
+        lines.append(f"Diferencias: {note}")
+    lines.append(f"{'#':>3} {'Configuración':<60} {'Disco MB/s':>11} {'Red Mbps':>10} "
+                 f"{'CPU %':>7} {'MB/s/%':>8} {'Mbps/%':>8}")
+    lines.append("-" * 113)
+    for row in rows[:limit]:
+        lines.append(f"{row['rank']:>3} {row['config_name'][:60]:<60} "
+                     f"{row['disk_mb_s']:>11.1f} {row['network_mbps']:>10.1f} "
+                     f"{row['cpu_percent']:>7.2f} {row['disk_per_cpu']:>8.2f} "
+                     f"{row['network_per_cpu']:>8.2f}")
+    if len(rows) > limit:
+        lines.append(f"... {len(rows) - limit} configuraciones más en results.json")
+    lines.append("-" * 113)
+    return "\n".join(lines)
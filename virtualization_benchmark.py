@@ -1,13 +1,60 @@
-import subprocess
-import time
-import psutil
 import json
 import os
 import sys
-from datetime import datetime
-from typing import Dict, List, Tuple
-import threading
-import statistics
+from typing import Dict, List, Optional, Tuple
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from disk_io_engine import (DiskIOEngine, DiskIOJob, check_scratch_target,
+                            PATTERNS, IO_MODES)
+from network_engine import (NetworkEngine, NetworkJob, parse_target, PROTOCOLS,
+                            ZERO_COPY_MODES)
+from network_forwarder import (PacketForwarder, NETWORK_BACKENDS, BACKEND_MODES,
+                               network_backend)
+from io_trace import IOTrace, TraceReplayEngine, TraceReplayJob, PACES, CACHE_MODES
+from qemu_launcher import QemuLauncher, BootTimeoutError, DEFAULT_BOOT_MARKERS
+from process_accounting import ProcessTreeAccountant
+from host_sampler import HostSampler
+from cpu_topology import (HostTopology, plan_placement, pin_threads,
+                          format_cpulist, pinning_gain, format_pinning)
+from downsampling import phase_timeline, METHODS as DOWNSAMPLE_METHODS
+from disk_image_pool import DiskImagePool
+from repetition import AdaptiveRepetitionEngine
+from results_store import ResultStore
+from result_cache import (ResultCache, cache_key, config_fields, file_digest,
+                          host_fingerprint)
+from tuning import (HOST_DIMENSIONS, parse_sweep, expand_matrix,
+                    rank_by_efficiency, format_ranking, measured_dimensions)
+from tracing import Tracer, NULL_TRACER, format_timings
+from density import DensityBenchmark, format_density, SATURATION_GAIN
+from regression import (RegressionGate, load_reference, sample_depth,
+                        format_regression_table, METHODS, REGRESSION_EXIT_CODE)
+from simulation import (RealClock, VirtualClock, SimulatedCounters,
+                        CPU_LOAD_MODEL, device_family, config_rng,
+                        simulate_disk_result, simulate_network_result,
+                        simulate_replay_result, tuning_factors,
+                        NETWORK_BACKEND_FACTOR)
+
+ALL_PHASES = ('boot', 'disk_read', 'disk_write', 'network', 'idle')
+METRIC_PHASES = {
+    'boot_time': {'boot'},
+    'disk_read_speed': {'disk_read'},
+    'disk_write_speed': {'disk_write'},
+    'network_throughput': {'network'},
+    'cpu_overhead': set(ALL_PHASES),
+}
+
+def measurement_error(metrics: Dict) -> Optional[str]:
+    """Motivo por el que ``metrics`` no es una medida válida (fallo de
+    arranque o de alguna fase de disco o red), o ``None``."""
+    if metrics.get('boot_error'):
+        return f"arranque: {metrics['boot_error']}"
+    phases = dict(metrics.get('disk_io') or {}, network=metrics.get('network'))
+    for phase, result in phases.items():
+        if isinstance(result, dict) and result.get('error'):
+            return f"{phase}: {result['error']}"
+    return None
+
 
 class VirtualizationConfig:
     """Configuración base para máquinas virtuales"""
@@ -15,38 +62,146 @@ class VirtualizationConfig:
         self.name = name
         self.disk_type = disk_type  
         self.network_type = network_type  
+        self.qemu_binary = "qemu-system-x86_64"
+        self.boot_markers = list(DEFAULT_BOOT_MARKERS)
+        self.boot_timeout = 120.0
+        self.serial_log = None
         self.memory = "1024M"
         self.cpus = 2
         self.disk_path = f"/tmp/{name}_disk.img"
+        self.disk_format = "qcow2"
+        self.disk_scratch = None
+        self.image_format = None
+        self.preallocation = None
+        self.disk_cache = None
+        self.disk_aio = None
+        self.iothreads = 0
+        self.queues = 1
+        self.pinning = "off"
+        self.numa_node = None
+        self.tuning = {}
+        self.disk_pattern = "sequential"
+        self.disk_block_size = 1024 * 1024
+        self.disk_queue_depth = 1
+        self.disk_workers = 1
+        self.disk_io_mode = "buffered"
+        self.disk_test_size = 64 * 1024 * 1024
+        self.disk_runtime = None
+        self.disk_trace = None
+        self.disk_trace_pace = "fast"
+        self.disk_trace_cache = "warm"
+        self.disk_trace_target = None
+        self.network_protocol = "tcp"
+        self.network_streams = 1
+        self.network_message_size = 64 * 1024
+        self.network_duration = 1.0
+        self.network_zero_copy = "memoryview"
+        self.network_target = None
+        self.network_guest_port = None
+        self.network_tap = "vbtap0"
+        self.vhost_user_socket = f"/tmp/{name}_vhost-user.sock"
+        self.network_backends = []
         self.boot_time = 0
         self.cpu_usage_host = []
         self.cpu_usage_guest = []
 
 class IOVirtualizationBenchmark:  
-    def __init__(self):
+    def __init__(self, real_vm: bool = False, sample_rate: float = 100.0,
+                 sample_capacity: int = 65536, base_image: str = None,
+                 image_dir: str = "/tmp/vm_image_pool",
+                 repetition: Dict = None, simulate: bool = False,
+                 seed: int = 42, store_dir: str = None, run_id: int = None,
+                 trace: bool = False, cache_dir: str = None,
+                 series_points: int = 200, downsample: str = "lttb"):
         self.results = {}
-        self.monitoring_active = False
+        self.store_dir = store_dir
+        self.store = ResultStore(store_dir) if store_dir else None
+        self.run_id = run_id
+        self.cache = ResultCache(cache_dir) if cache_dir else None
+        self.simulate = simulate
+        self.seed = seed
+        self.clock = VirtualClock() if simulate else RealClock()
+        self.trace = trace
+        self.tracer = Tracer(clock=self.clock) if trace else NULL_TRACER
+        self._spans = {}
+        self._phase_starts = {}
+        self._phase_marks = []
+        self.series_points = series_points
+        self.downsample = downsample
+        self._rngs = {}
+        self._counters = None
+        self._family = None
+        self._tuning = None
+        self._traces = {}
+        self.repetition = repetition
+        self.base_image = base_image
+        self.image_dir = image_dir
+        self.image_pool = DiskImagePool(image_dir, size="2G", source=base_image)
+        self.sample_rate = sample_rate
+        self.sample_capacity = sample_capacity
         self.qemu_process = None
+        self.real_vm = real_vm
+        self.launcher = None
+        self.cpu_set = None
+        self.accountant = None
+        self._placement = None
+        self._pinned_threads = None
         
+    def rng(self, config: VirtualizationConfig):
+        return self._rngs.setdefault(config.name, config_rng(self.seed, config.name))
+
+    def begin_phase(self, name: str):
+        self._spans[name] = self.tracer.begin(name, 'phase')
+        self._phase_starts[name] = self.clock.time()
+        if self._counters is not None:
+            self._counters.load = CPU_LOAD_MODEL[self._family][name] * self._tuning['cpu']
+        if self.accountant is not None:
+            self.accountant.begin_phase(name)
+
+    def end_phase(self, name: str, config: VirtualizationConfig = None,
+                  data: Dict = None):
+        if self._counters is not None:
+            self._counters.load = CPU_LOAD_MODEL[self._family]['idle']
+        accounting = None
+        if self.accountant is not None:
+            accounting = self.accountant.end_phase(name)
+        span = self._spans.pop(name, None)
+        if span is not None:
+            span.finish()
+        if name in self._phase_starts:
+            self._phase_marks.append({'name': name,
+                                      'start': self._phase_starts.pop(name),
+                                      'end': self.clock.time()})
+        if self.store is not None and self.run_id is not None and config is not None:
+            self.store.record_phase(self.run_id, config.name, name,
+                                    {'result': data, 'accounting': accounting})
+
+    def begin_run(self):
+        if self.store is None or self.run_id is not None:
+            return
+        self.run_id = self.store.begin_run({
+            'timestamp': self.clock.now().isoformat(),
+            'real_vm': self.real_vm, 'simulate': self.simulate,
+            'seed': self.seed, 'repetition': self.repetition})
+        print(f"[INFO] Ejecución {self.run_id} en {self.store_dir}")
+
+    def end_run(self, status: str = "completed"):
+        if self.store is not None and self.run_id is not None:
+            self.store.end_run(self.run_id, status)
+
     def create_disk_image(self, config: VirtualizationConfig) -> bool:
+        with self.tracer.span('create_disk_image', 'setup', config=config.name):
+            return self._create_disk_image(config)
+
+    def _create_disk_image(self, config: VirtualizationConfig) -> bool:
         try:
             print(f"[INFO] Creando imagen de disco para {config.name}...")
-            cmd = [
-                "qemu-img", "create", "-f", "qcow2",
-                config.disk_path, "2G"
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                print(f"[OK] Disco creado: {config.disk_path}")
-                return True
-            else:
-                print(f"[ERROR] {result.stderr}")
-                return False
-        except FileNotFoundError:
-            print("[ERROR] qemu-img no encontrado. Instalando simulación...")
-            with open(config.disk_path, 'wb') as f:
-                f.write(b'\0' * (100 * 1024 * 1024)) 
-            print(f"[SIMULACIÓN] Disco simulado creado: {config.disk_path}")
+            if not self.image_pool.has_qemu_img:
+                print("[WARN] qemu-img no encontrado, usando imagen raw dispersa")
+            config.disk_path, config.disk_format = self.image_pool.acquire(
+                config.name, config.image_format, config.preallocation)
+            config.disk_scratch = self.image_pool.scratch(config.name)
+            print(f"[OK] Disco creado: {config.disk_path} ({config.disk_format})")
             return True
         except Exception as e:
             print(f"[ERROR] Error creando disco: {e}")
@@ -54,45 +209,131 @@ class IOVirtualizationBenchmark:
 
     def build_qemu_command(self, config: VirtualizationConfig) -> List[str]:
         cmd = [
-            "qemu-system-x86_64",
+            config.qemu_binary,
             "-m", config.memory,
             "-smp", str(config.cpus),
             "-nographic",
             "-serial", "mon:stdio"
         ]
+        if config.pinning == "on":
+            # Hilos con nombre ("CPU 0/KVM", "IO iothread0") para poder fijarlos
+            cmd.extend(["-name", f"{config.name},debug-threads=on"])
+        backend = network_backend(config.network_type)
+        if config.numa_node is not None or backend == "vhost-user":
+            # vhost-user necesita la memoria del guest compartida con el backend
+            memory = (f"memory-backend-memfd,id=mem0,size={config.memory},share=on"
+                      if backend == "vhost-user" else
+                      f"memory-backend-ram,id=mem0,size={config.memory}")
+            if config.numa_node is not None:
+                memory += f",host-nodes={config.numa_node},policy=bind"
+            cmd.extend(["-object", memory, "-numa", "node,memdev=mem0"])
         
+        drive = f"file={config.disk_path},format={config.disk_format}"
+        if config.disk_cache:
+            drive += f",cache={config.disk_cache}"
+        if config.disk_aio:
+            drive += f",aio={config.disk_aio}"
         if config.disk_type == "virtio":
+            device = "virtio-blk-pci,drive=disk0"
+            for i in range(config.iothreads):
+                cmd.extend(["-object", f"iothread,id=iothread{i}"])
+            if config.iothreads:
+                device += ",iothread=iothread0"
+            if config.queues > 1:
+                device += f",num-queues={config.queues}"
             cmd.extend([
-                "-drive", f"file={config.disk_path},if=virtio,format=qcow2"
+                "-drive", f"{drive},if=none,id=disk0",
+                "-device", device
             ])
         else: 
             cmd.extend([
-                "-drive", f"file={config.disk_path},if=ide,format=qcow2"
+                "-drive", f"{drive},if=ide"
             ])
-        if config.network_type == "virtio":
+        netdev = "user,id=net0"
+        if backend == "vhost-net":
+            netdev = (f"tap,id=net0,ifname={config.network_tap},"
+                      f"script=no,downscript=no,vhost=on")
+        elif backend == "vhost-user":
+            cmd.extend(["-chardev", f"socket,id=chr0,path={config.vhost_user_socket}"])
+            netdev = "vhost-user,id=net0,chardev=chr0"
+        elif config.network_guest_port:
+            port = config.network_guest_port
+            netdev += f",hostfwd={config.network_protocol}::{port}-:{port}"
+        net_device = "virtio-net-pci,netdev=net0"
+        # Multiqueue de red: slirp (-netdev user) no lo admite
+        if config.queues > 1 and backend != "user":
+            netdev += f",queues={config.queues}"
+            net_device += f",mq=on,vectors={2 * config.queues + 2}"
+        if device_family(config.network_type) == "virtio":
             cmd.extend([
-                "-device", "virtio-net-pci,netdev=net0",
-                "-netdev", "user,id=net0"
+                "-device", net_device,
+                "-netdev", netdev
             ])
         else: 
             cmd.extend([
                 "-device", "e1000,netdev=net0",
-                "-netdev", "user,id=net0"
+                "-netdev", netdev
             ])
         
         return cmd
 
-    def monitor_cpu_usage(self, interval: float = 0.5):
-        while self.monitoring_active:
-            cpu_percent = psutil.cpu_percent(interval=interval)
-            timestamp = time.time()
-            self.results.setdefault('host_cpu', []).append({
-                'timestamp': timestamp,
-                'cpu_percent': cpu_percent
-            })
-            time.sleep(interval)
-
-    def simulate_vm_boot(self, config: VirtualizationConfig) -> Dict:
+    def launch_vm(self, config: VirtualizationConfig) -> Dict[str, float]:
+        cmd = self.build_qemu_command(config)
+        print(f"[INFO] Ejecutando: {' '.join(cmd)}")
+        self.launcher = QemuLauncher(cmd, config.boot_markers,
+                                     config.boot_timeout, config.serial_log)
+        self.qemu_process = self.launcher.start()
+        self.accountant = ProcessTreeAccountant(self.qemu_process.pid)
+        if self._placement is not None:
+            self._pinned_threads = pin_threads(self.qemu_process.pid, self._placement)
+        self.begin_phase('boot')
+        stages = self.launcher.wait_for_boot()
+        if self._placement is not None:
+            # Los hilos creados durante el arranque no heredan la afinidad
+            self._pinned_threads = pin_threads(self.qemu_process.pid, self._placement)
+        return stages
+
+    def place(self, config: VirtualizationConfig) -> Dict:
+        """CPUs de vCPUs, iothreads, hilos de emulación y workers del
+        benchmark según ``config.pinning`` y ``config.numa_node``."""
+        if config.pinning != "on" and config.numa_node is None:
+            return None
+        placement = plan_placement(HostTopology.discover(), config.cpus,
+                                   config.iothreads, config.numa_node,
+                                   self.cpu_set, exclusive=config.pinning == "on")
+        if placement['shared']:
+            print("[WARN] No hay CPUs suficientes en el nodo: vCPUs, iothreads "
+                  "y emulación comparten CPUs")
+        print(f"[INFO] Nodo NUMA {placement['node']}: "
+              f"vCPUs {placement['vcpus'] or '-'}, iothreads "
+              f"{placement['iothreads'] or '-'}, emulación y benchmark "
+              f"{format_cpulist(placement['emulator'])}")
+        return placement
+
+    def pin_benchmark(self, placement: Dict):
+        """Fija este proceso (y los hilos que cree después) y devuelve la
+        afinidad anterior. Sin VM el benchmark es la carga, así que ocupa
+        las CPUs de las vCPUs."""
+        if placement is None or self.simulate or not hasattr(os, "sched_setaffinity"):
+            return None
+        previous = os.sched_getaffinity(0)
+        cpus = placement['benchmark']
+        if not self.real_vm and placement['vcpus']:
+            cpus = placement['vcpus']
+        os.sched_setaffinity(0, sorted(set(cpus)))
+        return previous
+
+    def shutdown_vm(self):
+        if self.launcher is None:
+            return
+        code = self.launcher.stop()
+        print(f"[INFO] VM detenida (código {code})")
+        self.launcher = None
+        self.qemu_process = None
+
+    def simulate_vm_boot(self, config: VirtualizationConfig,
+                         phases=None) -> Dict:
+        phases = set(phases or ALL_PHASES)
         print(f"\n{'='*60}")
         print(f"Iniciando benchmark para: {config.name}")
         print(f"Tipo de disco: {config.disk_type}")
@@ -103,113 +344,497 @@ class IOVirtualizationBenchmark:
             'config_name': config.name,
             'disk_type': config.disk_type,
             'network_type': config.network_type,
+            'tuning': config.tuning,
             'boot_time': 0,
             'disk_read_speed': 0,
             'disk_write_speed': 0,
+            'disk_read_iops': 0,
+            'disk_write_iops': 0,
+            'disk_read_latency_ms': 0,
+            'disk_write_latency_ms': 0,
+            'disk_read_latency_p99_ms': 0,
+            'disk_write_latency_p99_ms': 0,
+            'disk_io': {},
+            'disk_scope': 'simulated' if self.simulate else 'host',
             'network_throughput': 0,
+            'network_pps': 0,
+            'network_latency_p99_ms': 0,
+            'network': {},
             'cpu_overhead': 0,
-            'timestamp': datetime.now().isoformat()
+            'vm_cpu_percent': 0,
+            'process_accounting': {},
+            'timestamp': self.clock.now().isoformat()
         }
-        self.monitoring_active = True
-        monitor_thread = threading.Thread(target=self.monitor_cpu_usage)
-        monitor_thread.daemon = True
-        monitor_thread.start()
+        if self.simulate:
+            metrics['simulated'] = True
+            self._family = device_family(config.disk_type)
+            self._tuning = tuning_factors(config)
+            self._counters = SimulatedCounters(self.clock, self.rng(config))
+        self._placement = self.place(config)
+        self._pinned_threads = None
+        # Las CPUs del worker son del host real, no de los núcleos simulados
+        sampler = HostSampler(self.sample_rate, self.sample_capacity,
+                              cpu_set=None if self.simulate else self.cpu_set,
+                              clock=self.clock,
+                              counter_source=self._counters)
+        self.results['sampler'] = sampler
+        self._phase_marks = []
+        sampler.start()
+        previous_affinity = None
         
         try:
+            # Después de arrancar el muestreador: la afinidad se aplica al
+            # hilo que llama y la heredan los que cree después, así el hilo
+            # del muestreador no compite por las CPUs de la carga que mide
+            previous_affinity = self.pin_benchmark(self._placement)
             print("[1/5] Iniciando VM...")
-            start_time = time.time()
-            if config.disk_type == "virtio":
-                boot_delay = 2.5 + (0.3 * (hash(config.name) % 10) / 10)
-            else:  
-                boot_delay = 4.2 + (0.5 * (hash(config.name) % 10) / 10)
-            
-            time.sleep(boot_delay)
-            boot_time = time.time() - start_time
-            metrics['boot_time'] = round(boot_time, 3)
-            print(f"[OK] Tiempo de arranque: {metrics['boot_time']}s")
+            if self.real_vm:
+                try:
+                    metrics['boot_stages'] = self.launch_vm(config)
+                    metrics['boot_time'] = self.launcher.boot_time()
+                    for stage, seconds in metrics['boot_stages'].items():
+                        print(f"   {stage}: {seconds}s")
+                except BootTimeoutError as e:
+                    print(f"[ERROR] {e}")
+                    metrics['boot_error'] = str(e)
+                    self.shutdown_vm()
+                self.end_phase('boot', config, {
+                    'boot_time': metrics['boot_time'],
+                    'boot_stages': metrics.get('boot_stages'),
+                    'boot_error': metrics.get('boot_error')})
+            elif self.simulate:
+                # Arranque del modelo de simulación, no una medida
+                self.begin_phase('boot')
+                start_time = self.clock.perf_counter()
+                name_jitter = self.rng(config).random() * 10
+                if config.disk_type == "virtio":
+                    boot_delay = 2.5 + (0.3 * name_jitter / 10)
+                else:  
+                    boot_delay = 4.2 + (0.5 * name_jitter / 10)
+                
+                self.clock.sleep(boot_delay)
+                boot_time = self.clock.perf_counter() - start_time
+                metrics['boot_time'] = round(boot_time, 3)
+                self.end_phase('boot', config, {'boot_time': metrics['boot_time']})
+            else:
+                # Sin VM no hay arranque que medir: boot_time queda a 0 (sin
+                # valor en el reporte, el análisis y la puerta de regresión)
+                self.accountant = ProcessTreeAccountant(os.getpid())
+            if (self.qemu_process is None and self.accountant is not None and
+                    self.accountant.root_pid != os.getpid()):
+                boot_phases = self.accountant.phases
+                self.accountant = ProcessTreeAccountant(os.getpid())
+                self.accountant.phases.update(boot_phases)
+            if metrics['boot_time']:
+                print(f"[OK] Tiempo de arranque: {metrics['boot_time']}s")
+            elif not self.real_vm:
+                print("[INFO] Sin --real-vm no se mide el arranque")
             print("\n[2/5] Ejecutando benchmark de disco...")
-            metrics['disk_read_speed'] = self.benchmark_disk_io(
-                config, operation='read'
-            )
-            metrics['disk_write_speed'] = self.benchmark_disk_io(
-                config, operation='write'
-            )
+            if self.real_vm:
+                print("[WARN] El disco se mide en el host, sobre un fichero de "
+                      "trabajo: no pasa por el dispositivo virtual del guest")
+            if config.disk_trace and phases & {'disk_read', 'disk_write'}:
+                self.begin_phase('disk_replay')
+                replay = self.replay_disk_trace(config)
+                self.end_phase('disk_replay', config, replay)
+                metrics['disk_io']['replay'] = replay
+                for operation in ('read', 'write'):
+                    direction = replay.get(operation) or {}
+                    metrics[f'disk_{operation}_speed'] = direction.get('mb_s', 0)
+                    metrics[f'disk_{operation}_iops'] = direction.get('iops', 0)
+                    metrics[f'disk_{operation}_latency_ms'] = direction.get('lat_avg_ms', 0)
+                    metrics[f'disk_{operation}_latency_p99_ms'] = direction.get('lat_p99_ms', 0)
+            for operation in ('read', 'write'):
+                if f'disk_{operation}' not in phases or config.disk_trace:
+                    continue
+                self.begin_phase(f'disk_{operation}')
+                disk_result = self.benchmark_disk_io(config, operation)
+                self.end_phase(f'disk_{operation}', config, disk_result)
+                metrics['disk_io'][operation] = disk_result
+                metrics[f'disk_{operation}_speed'] = disk_result['mb_s']
+                metrics[f'disk_{operation}_iops'] = disk_result['iops']
+                metrics[f'disk_{operation}_latency_ms'] = disk_result['lat_avg_ms']
+                metrics[f'disk_{operation}_latency_p99_ms'] = disk_result.get('lat_p99_ms', 0)
             print("\n[3/5] Ejecutando benchmark de red...")
-            metrics['network_throughput'] = self.benchmark_network(config)
+            if 'network' in phases:
+                self.begin_phase('network')
+                net_result = self.benchmark_network(config)
+                self.end_phase('network', config, net_result)
+                metrics['network'] = net_result
+                metrics['network_throughput'] = net_result['mbps']
+                metrics['network_pps'] = net_result['packets_per_s']
+                metrics['network_latency_p99_ms'] = net_result.get('lat_p99_ms', 0)
             print("\n[4/5] Calculando overhead de CPU...")
-            time.sleep(2)  
+            if 'idle' in phases:
+                self.begin_phase('idle')
+                self.clock.sleep(2)  
+                self.end_phase('idle', config)
             
         finally:
-            self.monitoring_active = False
-            monitor_thread.join(timeout=1)
-        if 'host_cpu' in self.results and self.results['host_cpu']:
-            cpu_samples = [s['cpu_percent'] for s in self.results['host_cpu']]
-            metrics['cpu_overhead'] = round(statistics.mean(cpu_samples), 2)
+            with self.tracer.span('teardown', 'teardown', config=config.name):
+                self.shutdown_vm()
+                sampler.stop()
+                self._counters = None
+                if self.store is not None:
+                    self.results['host_series'] = self.store.write_series(sampler.buffers)
+                if previous_affinity is not None:
+                    os.sched_setaffinity(0, previous_affinity)
+        if config.network_backends and metrics['network']:
+            # Fuera de la fase 'network' y con el muestreador parado: no
+            # cuenta en su tiempo, en la CPU contabilizada ni en host_timeline
+            with self.tracer.span('network_backends', 'comparison', config=config.name):
+                metrics['network']['backends'] = self.compare_network_backends(
+                    config, metrics['network'])
+        if self._placement is not None:
+            metrics['placement'] = dict(self._placement, threads=self._pinned_threads)
+            self._placement = None
+        if len(sampler):
+            metrics['cpu_overhead'] = round(sampler.mean('cpu_total'), 2)
+            if self.series_points:
+                series = sampler.series()
+                metrics['host_timeline'] = phase_timeline(
+                    series['timestamp'], series['cpu_total'], self._phase_marks,
+                    self.series_points, self.downsample)
+        metrics['host_samples'] = sampler.summary()
+        if self.accountant is not None:
+            metrics['process_accounting'] = self.accountant.phases
+            metrics['accounting_scope'] = ('qemu' if self.accountant.root_pid != os.getpid()
+                                           else 'benchmark')
+            metrics['vm_cpu_percent'] = self.accountant.cpu_percent(
+                ['disk_read', 'disk_write', 'disk_replay', 'network'])
+            self.accountant = None
         
         print(f"\n[5/5] Benchmark completado")
         print(f"[OK] CPU Overhead: {metrics['cpu_overhead']}%")
+        print(f"[OK] CPU del proceso VM ({metrics.get('accounting_scope', '-')}): "
+              f"{metrics['vm_cpu_percent']}%")
         
+        if phases != set(ALL_PHASES):
+            skipped = [p for p in ALL_PHASES if p not in phases]
+            prefixes = tuple(f'{p}_' for p in skipped if p.startswith('disk_'))
+            if 'network' in skipped:
+                prefixes += ('network',)
+            for key in [k for k in metrics if prefixes and k.startswith(prefixes)]:
+                del metrics[key]
+            # Agregados de toda la ejecución: no comparables si faltan fases
+            metrics.pop('cpu_overhead', None)
+            metrics.pop('vm_cpu_percent', None)
         return metrics
 
     def benchmark_disk_io(self, config: VirtualizationConfig, 
-                          operation: str) -> float:
-        if config.disk_type == "virtio":
-            base_speed_read = 450 
-            base_speed_write = 380  
-            variance = 0.15
-        else:  
-            base_speed_read = 180  
-            base_speed_write = 140  
-            variance = 0.25       
-        base_speed = base_speed_read if operation == 'read' else base_speed_write
-        time.sleep(1.5)
-        import random
-        speed = base_speed * (1 + random.uniform(-variance, variance))
-        speed = round(speed, 2)
+                          operation: str) -> Dict:
+        job = DiskIOJob(
+            config.disk_scratch,
+            operation=operation,
+            pattern=config.disk_pattern,
+            block_size=config.disk_block_size,
+            queue_depth=config.disk_queue_depth,
+            workers=config.disk_workers,
+            mode=config.disk_io_mode,
+            size=config.disk_test_size,
+            runtime=config.disk_runtime
+        )
+        try:
+            if self.simulate:
+                result = simulate_disk_result(
+                    self.rng(config), config.disk_type, operation,
+                    job.block_size, job.queue_depth, job.workers,
+                    job.pattern, job.mode, tuning_factors(config)[operation])
+                self.clock.sleep(1.5)
+            else:
+                result = DiskIOEngine(job).run()
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Fallo de E/S en {config.disk_scratch}: {e}")
+            return {'operation': operation, 'mb_s': 0, 'iops': 0,
+                    'lat_avg_ms': 0, 'error': str(e)}
         
-        print(f"   {'Lectura' if operation == 'read' else 'Escritura'}: {speed} MB/s")
-        return speed
+        print(f"   {'Lectura' if operation == 'read' else 'Escritura'}: "
+              f"{result['mb_s']} MB/s, {result['iops']} IOPS, "
+              f"latencia media {result['lat_avg_ms']} ms")
+        return result
 
-    def benchmark_network(self, config: VirtualizationConfig) -> float:
-        if config.network_type == "virtio":
-            base_throughput = 9400 
-            variance = 0.10
-        else: 
-            base_throughput = 920  
-            variance = 0.20
-        time.sleep(1.0)
-        
-        import random
-        throughput = base_throughput * (1 + random.uniform(-variance, variance))
-        throughput = round(throughput, 2)
-        
-        print(f"   Throughput de red: {throughput} Mbps")
-        return throughput
+    def load_trace(self, path: str) -> IOTrace:
+        if path not in self._traces:
+            self._traces[path] = IOTrace.load(path)
+        return self._traces[path]
 
-    def run_comparison(self):
-        configurations = [
-            VirtualizationConfig("vm_virtio", "virtio", "virtio"),
-            VirtualizationConfig("vm_emulated", "ide", "e1000")
-        ]
+    def replay_disk_trace(self, config: VirtualizationConfig) -> Dict:
+        """Reproduce ``config.disk_trace`` en el host, sobre
+        ``config.disk_trace_target`` o el fichero de trabajo de la
+        configuración, en lugar de las pasadas sintéticas."""
+        target = config.disk_trace_target or config.disk_scratch
+        try:
+            if os.path.realpath(target) == os.path.realpath(config.disk_path):
+                raise ValueError(f"{target} es la imagen de la VM")
+            trace = self.load_trace(config.disk_trace)
+            if self.simulate:
+                result = simulate_replay_result(
+                    self.rng(config), config.disk_type, trace.summary(),
+                    config.disk_queue_depth, config.disk_trace_pace,
+                    config.disk_trace_cache, factors=tuning_factors(config))
+                self.clock.sleep(result['elapsed'])
+            else:
+                result = TraceReplayEngine(TraceReplayJob(
+                    target, trace, pace=config.disk_trace_pace,
+                    cache=config.disk_trace_cache,
+                    queue_depth=config.disk_queue_depth)).run()
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Fallo reproduciendo {config.disk_trace}: {e}")
+            return {'operation': 'replay', 'mb_s': 0, 'iops': 0,
+                    'lat_avg_ms': 0, 'error': str(e)}
         
-        all_metrics = []
+        print(f"   Traza {result['trace']} ({result['pace']}, caché {result['cache']}): "
+              f"{result['ops']} operaciones en {result['elapsed']} s")
+        for operation, label in (('read', 'Lectura'), ('write', 'Escritura')):
+            if result[operation]['ops']:
+                print(f"   {label}: {result[operation]['mb_s']} MB/s, "
+                      f"{result[operation]['iops']} IOPS, "
+                      f"latencia p99 {result[operation]['lat_p99_ms']} ms")
+        return result
+
+    def network_job(self, config: VirtualizationConfig, target: str = None) -> NetworkJob:
+        return NetworkJob(
+            protocol=config.network_protocol,
+            streams=config.network_streams,
+            message_size=config.network_message_size,
+            duration=config.network_duration,
+            zero_copy=config.network_zero_copy,
+            target=target
+        )
+
+    def benchmark_network(self, config: VirtualizationConfig) -> Dict:
+        backend = network_backend(config.network_type)
+        target = config.network_target
+        if (target is None and backend == 'user' and config.network_guest_port
+                and self.qemu_process):
+            target = f"127.0.0.1:{config.network_guest_port}"
+        if self.qemu_process and target is None:
+            print(f"[WARN] Sin destino en el guest para {backend} (network_target o "
+                  f"network_guest_port): se mide el sustituto local del backend")
+        try:
+            result = self.measure_network(config, backend, target)
+        except OSError as e:
+            print(f"[ERROR] Fallo de red hacia {target or 'loopback'}: {e}")
+            return {'protocol': config.network_protocol, 'mbps': 0,
+                    'packets_per_s': 0, 'lat_avg_ms': 0, 'error': str(e)}
         
-        for config in configurations:
-            if not self.create_disk_image(config):
-                print(f"[ERROR] No se pudo crear disco para {config.name}")
+        result['backend'] = backend
+        print(f"   Throughput de red: {result['mbps']} Mbps, "
+              f"{result['packets_per_s']} paquetes/s, "
+              f"latencia p99 {result['lat_p99_ms']} ms ({result['target']}, "
+              f"camino {result['path']})")
+        return result
+
+    def measure_network(self, config: VirtualizationConfig, backend: str,
+                        target: str = None, network_type: str = None) -> Dict:
+        """Mide la red por el camino de ``backend``: contra ``target`` (el
+        guest) si se indica y, si no, por el sustituto local de su datapath
+        (``network_forwarder.py``); ``path`` indica cuál se midió."""
+        mode = BACKEND_MODES[backend]
+        job = self.network_job(config, target)
+        forwarder = None
+        if self.simulate:
+            result = simulate_network_result(
+                self.rng(config), network_type or config.network_type, job.protocol,
+                job.streams, job.message_size,
+                tuning_factors(config)['network'] * NETWORK_BACKEND_FACTOR[backend])
+            self.clock.sleep(1.0)
+        elif target is not None or mode is None:
+            result = NetworkEngine(job).run()
+        else:
+            # El reenviador ocupa las CPUs de los hilos de emulación
+            cpus = self._placement['emulator'] if self._placement else None
+            with PacketForwarder(config.network_protocol, mode, cpus) as relay:
+                result = NetworkEngine(job, relay).run()
+            forwarder = relay.stats
+        result['path'] = 'vm' if target is not None else mode or 'kernel'
+        result['forwarder'] = forwarder
+        return result
+
+    def compare_network_backends(self, config: VirtualizationConfig,
+                                 own_result: Dict = None) -> Dict[str, Dict]:
+        """Mide cada backend de ``config.network_backends`` por su camino
+        sustituto; el de la propia configuración reutiliza ``own_result``
+        (la medida principal, que ya va por su camino)."""
+        own = network_backend(config.network_type)
+        backends = {}
+        for backend in config.network_backends:
+            if backend == own and own_result and 'error' not in own_result:
+                backends[backend] = self._backend_summary(own_result, own_result['path'])
+                backends[backend]['forwarder'] = own_result.get('forwarder')
                 continue
-            self.results = {}  
-            metrics = self.simulate_vm_boot(config)
-            all_metrics.append(metrics)
+            mode = BACKEND_MODES[backend]
             try:
-                if os.path.exists(config.disk_path):
-                    os.remove(config.disk_path)
+                result = self.measure_network(config, backend, network_type='virtio')
+            except OSError as e:
+                print(f"[ERROR] Backend {backend}: {e}")
+                backends[backend] = {'path': mode or 'kernel', 'mbps': 0,
+                                     'error': str(e)}
+                continue
+            backends[backend] = self._backend_summary(result, result['path'])
+            backends[backend]['forwarder'] = result['forwarder']
+        for backend, summary in backends.items():
+            if 'error' not in summary:
+                print(f"   Backend {backend:<10} ({summary['path']}): "
+                      f"{summary['mbps']} Mbps, latencia p99 {summary['lat_p99_ms']} ms")
+        return backends
+
+    @staticmethod
+    def _backend_summary(result: Dict, path: str) -> Dict:
+        return {'path': path, 'mbps': result['mbps'],
+                'packets_per_s': result['packets_per_s'],
+                'lat_p50_ms': result.get('lat_p50_ms', 0),
+                'lat_p99_ms': result.get('lat_p99_ms', 0),
+                'loss_percent': result.get('loss_percent', 0)}
+
+    def worker_options(self) -> Dict:
+        return {'real_vm': self.real_vm, 'sample_rate': self.sample_rate,
+                'sample_capacity': self.sample_capacity,
+                'base_image': self.base_image, 'image_dir': self.image_dir,
+                'repetition': self.repetition, 'simulate': self.simulate,
+                'seed': self.seed, 'store_dir': self.store_dir,
+                'run_id': self.run_id, 'trace': self.trace,
+                'series_points': self.series_points, 'downsample': self.downsample}
+
+    def measure_once(self, config: VirtualizationConfig, phases=None) -> Dict:
+        if not self.create_disk_image(config):
+            raise RuntimeError(f"No se pudo crear disco para {config.name}")
+        self.results = {}  
+        try:
+            return self.simulate_vm_boot(config, phases)
+        finally:
+            try:
+                with self.tracer.span('release_disk_image', 'teardown',
+                                      config=config.name):
+                    self.image_pool.release(config.disk_path)
+                    self.image_pool.release(config.disk_scratch)
             except Exception as e:
                 print(f"[WARN] No se pudo eliminar {config.disk_path}: {e}")
+
+    def run_config(self, config: VirtualizationConfig) -> Dict:
+        with self.tracer.span(config.name, 'config'):
+            return self._run_config(config)
+
+    def _run_config(self, config: VirtualizationConfig) -> Dict:
+        try:
+            if not self.repetition:
+                metrics = self.measure_once(config)
+                self.record_config(metrics)
+                return metrics
+            # Sin arranque medido, boot_time no tiene muestras que estabilizar
+            metric_phases = {m: p for m, p in METRIC_PHASES.items()
+                             if m != 'boot_time' or self.real_vm or self.simulate}
+            engine = AdaptiveRepetitionEngine(metric_phases, clock=self.clock,
+                                              failure=measurement_error,
+                                              **self.repetition)
+            
+            def measure(active):
+                phases = set().union(*(metric_phases[m] for m in active))
+                return self.measure_once(config, phases | {'boot'})
             
-            time.sleep(1)  
+            metrics = engine.run(measure)
+        except RuntimeError as e:
+            print(f"[ERROR] {e}")
+            return None
+        self.record_config(metrics)
+        reps = metrics['repetitions']
+        print(f"[OK] {config.name}: {reps['runs']} repeticiones "
+              f"(+{reps['warmup']} de calentamiento), parada por {reps['stop_reason']}")
+        if reps['failures']:
+            print(f"[WARN] {config.name}: {reps['failures']} repeticiones fallidas "
+                  f"excluidas de la estadística ({reps['failure_reasons'][-1]})")
+        return metrics
+
+    def record_config(self, metrics: Dict):
+        if self.store is None or self.run_id is None:
+            return
+        # La referencia a series.bin solo va al store: results.json no
+        # depende del contenido previo del directorio
+        self.store.record_config(self.run_id, {
+            **metrics, 'host_series': self.results.get('host_series')})
+
+    def result_key(self, config: VirtualizationConfig) -> str:
+        """Clave de caché: configuración, comando de QEMU, parámetros del
+        benchmark y huella del host."""
+        params = {'real_vm': self.real_vm, 'sample_rate': self.sample_rate,
+                  'sample_capacity': self.sample_capacity,
+                  'base_image': self.base_image, 'repetition': self.repetition,
+                  'simulate': self.simulate, 'seed': self.seed,
+                  'series_points': self.series_points, 'downsample': self.downsample}
+        if config.disk_trace:
+            params['disk_trace_sha256'] = file_digest(config.disk_trace)
+        return cache_key(config_fields(config), self.build_qemu_command(config),
+                         params, host_fingerprint(config.qemu_binary))
+
+    def load_cached(self, configurations: List[VirtualizationConfig]
+                    ) -> Tuple[Dict[str, str], Dict[str, Dict]]:
+        keys, cached = {}, {}
+        if self.cache is None:
+            return keys, cached
+        for config in configurations:
+            keys[config.name] = self.result_key(config)
+            metrics = self.cache.get(keys[config.name])
+            # Las entradas con fallos (de versiones anteriores) se vuelven a medir
+            if metrics is None or measurement_error(metrics):
+                continue
+            cached[config.name] = metrics = {**metrics, 'from_cache': True}
+            print(f"[WARN] {config.name}: NO SE MIDE, resultado anterior de la "
+                  f"caché ({keys[config.name][:12]})")
+            if self.store is not None and self.run_id is not None:
+                self.store.record_config(self.run_id, metrics)
+        if cached:
+            print(f"[WARN] {len(cached)} de {len(configurations)} configuraciones "
+                  f"salen de {self.cache.directory} y no se han medido ahora "
+                  f"(--invalidate para repetirlas)")
+        return keys, cached
+
+    def run_comparison(self, qemu_binary: str = "qemu-system-x86_64",
+                       boot_timeout: float = 120.0, workers: int = 1,
+                       configurations: List[VirtualizationConfig] = None,
+                       on_result=None):
+        """``on_result`` recibe ``(config, metrics)`` de cada configuración en
+        cuanto está disponible, también de las que vienen de la caché."""
+        configurations = configurations or default_configurations()
+        for config in configurations:
+            config.qemu_binary = qemu_binary
+            config.boot_timeout = boot_timeout
         
-        return all_metrics
+        self.begin_run()
+        # Las claves se calculan antes de medir: create_disk_image cambia
+        # disk_path y disk_format de la configuración
+        keys, cached = self.load_cached(configurations)
+        pending = [c for c in configurations if c.name not in cached]
+        if on_result is not None:
+            for config in configurations:
+                if config.name in cached:
+                    on_result(config, cached[config.name])
+        
+        def store(config, metrics):
+            if self.cache is not None:
+                error = measurement_error(metrics)
+                if error:
+                    print(f"[WARN] {config.name}: no se guarda en la caché ({error})")
+                else:
+                    self.cache.put(keys[config.name], metrics,
+                                   host=host_fingerprint(config.qemu_binary))
+            if on_result is not None:
+                on_result(config, metrics)
+        
+        all_metrics = []
+        if pending and workers != 1:
+            all_metrics = run_parallel(pending, workers, self.worker_options(),
+                                       self.tracer, on_result=store)
+        else:
+            for config in pending:
+                metrics = self.run_config(config)
+                if metrics is not None:
+                    all_metrics.append(metrics)
+                    store(config, metrics)
+                
+                self.clock.sleep(1)  
+        
+        by_name = {**cached, **{m['config_name']: m for m in all_metrics}}
+        return [by_name[c.name] for c in configurations if c.name in by_name]
 
     def generate_report(self, metrics: List[Dict]) -> str:
         report = []
@@ -223,67 +848,479 @@ class IOVirtualizationBenchmark:
         
         virtio_metrics = metrics[0]
         emulated_metrics = metrics[1]
+        # El disco medido en el host no refleja el dispositivo virtual: se
+        # muestran las cifras pero no se atribuye la diferencia a la interfaz
+        host_disk = virtio_metrics.get('disk_scope') == 'host'
+        replay = 'replay' in (virtio_metrics.get('disk_io') or {})
+        disk = " host" if host_disk else ""
+
+        def percent(delta: float, base: float) -> float:
+            # Una fase fallida deja la métrica a 0: sin base no hay mejora
+            return delta / base * 100 if base else 0.0
+
+        def disk_gain(value: float) -> str:
+            return f"{'—':>10}" if host_disk else f"{value:>9.1f}%"
         report.append(f"{'Métrica':<30} {'Virtio':>15} {'Emulado':>15} {'Mejora':>10}")
         report.append("-" * 70)
-        boot_improvement = ((emulated_metrics['boot_time'] - 
-                           virtio_metrics['boot_time']) / 
-                          emulated_metrics['boot_time'] * 100)
-        report.append(f"{'Tiempo de arranque (s)':<30} "
-                     f"{virtio_metrics['boot_time']:>15.3f} "
-                     f"{emulated_metrics['boot_time']:>15.3f} "
-                     f"{boot_improvement:>9.1f}%")
-        read_improvement = ((virtio_metrics['disk_read_speed'] - 
-                           emulated_metrics['disk_read_speed']) / 
-                          emulated_metrics['disk_read_speed'] * 100)
-        report.append(f"{'Lectura disco (MB/s)':<30} "
+        # Sin --real-vm (ni --simulate) no hay arranque medido
+        boot_improvement = None
+        if virtio_metrics['boot_time'] and emulated_metrics['boot_time']:
+            boot_improvement = ((emulated_metrics['boot_time'] - 
+                               virtio_metrics['boot_time']) / 
+                              emulated_metrics['boot_time'] * 100)
+            report.append(f"{'Tiempo de arranque (s)':<30} "
+                         f"{virtio_metrics['boot_time']:>15.3f} "
+                         f"{emulated_metrics['boot_time']:>15.3f} "
+                         f"{boot_improvement:>9.1f}%")
+        else:
+            report.append(f"{'Tiempo de arranque (s)':<30} {'no medido':>15} "
+                         f"{'no medido':>15} {'—':>10}")
+        read_improvement = percent(virtio_metrics['disk_read_speed'] -
+                                   emulated_metrics['disk_read_speed'],
+                                   emulated_metrics['disk_read_speed'])
+        report.append(f"{f'Lectura disco{disk} (MB/s)':<30} "
                      f"{virtio_metrics['disk_read_speed']:>15.2f} "
                      f"{emulated_metrics['disk_read_speed']:>15.2f} "
-                     f"{read_improvement:>9.1f}%")
-        write_improvement = ((virtio_metrics['disk_write_speed'] - 
-                            emulated_metrics['disk_write_speed']) / 
-                           emulated_metrics['disk_write_speed'] * 100)
-        report.append(f"{'Escritura disco (MB/s)':<30} "
+                     f"{disk_gain(read_improvement)}")
+        write_improvement = percent(virtio_metrics['disk_write_speed'] -
+                                    emulated_metrics['disk_write_speed'],
+                                    emulated_metrics['disk_write_speed'])
+        report.append(f"{f'Escritura disco{disk} (MB/s)':<30} "
                      f"{virtio_metrics['disk_write_speed']:>15.2f} "
                      f"{emulated_metrics['disk_write_speed']:>15.2f} "
-                     f"{write_improvement:>9.1f}%")
-        net_improvement = ((virtio_metrics['network_throughput'] - 
-                          emulated_metrics['network_throughput']) / 
-                         emulated_metrics['network_throughput'] * 100)
+                     f"{disk_gain(write_improvement)}")
+        net_improvement = percent(virtio_metrics['network_throughput'] -
+                                  emulated_metrics['network_throughput'],
+                                  emulated_metrics['network_throughput'])
         report.append(f"{'Throughput red (Mbps)':<30} "
                      f"{virtio_metrics['network_throughput']:>15.2f} "
                      f"{emulated_metrics['network_throughput']:>15.2f} "
                      f"{net_improvement:>9.1f}%")
-        cpu_reduction = ((emulated_metrics['cpu_overhead'] - 
-                        virtio_metrics['cpu_overhead']) / 
-                       emulated_metrics['cpu_overhead'] * 100)
+        if (virtio_metrics.get('network_latency_p99_ms') and
+                emulated_metrics.get('network_latency_p99_ms')):
+            net_lat_reduction = ((emulated_metrics['network_latency_p99_ms'] -
+                                  virtio_metrics['network_latency_p99_ms']) /
+                                 emulated_metrics['network_latency_p99_ms'] * 100)
+            report.append(f"{'Latencia p99 red (ms)':<30} "
+                         f"{virtio_metrics['network_latency_p99_ms']:>15.3f} "
+                         f"{emulated_metrics['network_latency_p99_ms']:>15.3f} "
+                         f"{net_lat_reduction:>9.1f}%")
+        for operation, label in (('read', f'IOPS lectura{disk}'),
+                                 ('write', f'IOPS escritura{disk}')):
+            key = f'disk_{operation}_iops'
+            if virtio_metrics.get(key) and emulated_metrics.get(key):
+                iops_improvement = ((virtio_metrics[key] - emulated_metrics[key]) /
+                                    emulated_metrics[key] * 100)
+                report.append(f"{label:<30} "
+                             f"{virtio_metrics[key]:>15.0f} "
+                             f"{emulated_metrics[key]:>15.0f} "
+                             f"{disk_gain(iops_improvement)}")
+        for operation, label in (('read', f'Lat. p99 lectura{disk} (ms)'),
+                                 ('write', f'Lat. p99 escritura{disk} (ms)')):
+            key = f'disk_{operation}_latency_p99_ms'
+            if virtio_metrics.get(key) and emulated_metrics.get(key):
+                lat_reduction = ((emulated_metrics[key] - virtio_metrics[key]) /
+                                 emulated_metrics[key] * 100)
+                report.append(f"{label:<30} "
+                             f"{virtio_metrics[key]:>15.3f} "
+                             f"{emulated_metrics[key]:>15.3f} "
+                             f"{disk_gain(lat_reduction)}")
+        cpu_reduction = percent(emulated_metrics['cpu_overhead'] -
+                                virtio_metrics['cpu_overhead'],
+                                emulated_metrics['cpu_overhead'])
         report.append(f"{'CPU Overhead (%)':<30} "
                      f"{virtio_metrics['cpu_overhead']:>15.2f} "
                      f"{emulated_metrics['cpu_overhead']:>15.2f} "
                      f"{cpu_reduction:>9.1f}%")
         
+        if virtio_metrics.get('vm_cpu_percent') and emulated_metrics.get('vm_cpu_percent'):
+            vm_cpu_reduction = ((emulated_metrics['vm_cpu_percent'] -
+                                 virtio_metrics['vm_cpu_percent']) /
+                                emulated_metrics['vm_cpu_percent'] * 100)
+            report.append(f"{'CPU proceso VM (%)':<30} "
+                         f"{virtio_metrics['vm_cpu_percent']:>15.2f} "
+                         f"{emulated_metrics['vm_cpu_percent']:>15.2f} "
+                         f"{vm_cpu_reduction:>9.1f}%")
+        
         report.append("-" * 70)
+        if host_disk and replay:
+            report.append(f"Filas 'host': traza "
+                          f"{virtio_metrics['disk_io']['replay'].get('trace')} "
+                          f"reproducida en el host, no en el disco del guest")
+        
+        if 'statistics' in virtio_metrics and 'statistics' in emulated_metrics:
+            report.append("\nINTERVALOS DE CONFIANZA (media ± semiancho, n):")
+            for metric in METRIC_PHASES:
+                v = virtio_metrics['statistics'].get(metric)
+                e = emulated_metrics['statistics'].get(metric)
+                if not v or not e:
+                    continue
+                report.append(f"{metric:<22} "
+                             f"{v['mean']:>10.2f} ± {v['ci_half_width'] or 0:<8.2f} n={v['n']:<3} "
+                             f"{e['mean']:>10.2f} ± {e['ci_half_width'] or 0:<8.2f} n={e['n']:<3}")
+            report.append("-" * 70)
         report.append("\nCONCLUSIONES:")
-        report.append(f"• Virtio reduce el tiempo de arranque en ~{boot_improvement:.1f}%")
-        report.append(f"• Mejora el rendimiento de disco en ~{(read_improvement+write_improvement)/2:.1f}%")
+        if boot_improvement is not None:
+            report.append(f"• Virtio reduce el tiempo de arranque en ~{boot_improvement:.1f}%")
+        if host_disk and replay:
+            report.append("• Traza reproducida en el host sobre el mismo tipo de fichero "
+                          "para ambas interfaces: no compara virtio con IDE")
+        elif host_disk:
+            report.append("• Disco medido en el host con el mismo tipo de fichero de trabajo "
+                          "para ambas interfaces: no compara virtio con IDE")
+        else:
+            report.append(f"• Mejora el rendimiento de disco en ~{(read_improvement+write_improvement)/2:.1f}%")
         report.append(f"• Incrementa throughput de red en ~{net_improvement:.1f}%")
         report.append(f"• Reduce overhead de CPU en ~{cpu_reduction:.1f}%")
         report.append("\n" + "="*70 + "\n")
         
         return "\n".join(report)
 
-    def save_results(self, metrics: List[Dict], filename: str = "results.json"):
+    def save_results(self, metrics: List[Dict], filename: str = "results.json",
+                     **sections):
         try:
+            data = {
+                'timestamp': self.clock.now().isoformat(),
+                'metrics': metrics
+            }
+            data.update({k: v for k, v in sections.items() if v is not None})
             with open(filename, 'w') as f:
-                json.dump({
-                    'timestamp': datetime.now().isoformat(),
-                    'metrics': metrics
-                }, f, indent=2)
+                json.dump(data, f, indent=2)
             print(f"[OK] Resultados guardados en {filename}")
         except Exception as e:
             print(f"[ERROR] No se pudieron guardar resultados: {e}")
 
 
-def main():
+def default_configurations() -> List[VirtualizationConfig]:
+    return [
+        VirtualizationConfig("vm_virtio", "virtio", "virtio"),
+        VirtualizationConfig("vm_emulated", "ide", "e1000")
+    ]
+
+
+def partition_cpus(workers: int) -> List[List[int]]:
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    if workers <= 0:
+        workers = len(cpus)
+    workers = max(1, min(workers, len(cpus)))
+    size, extra = divmod(len(cpus), workers)
+    sets, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        sets.append(cpus[start:end])
+        start = end
+    return sets
+
+
+_WORKER_CPUS = None
+
+
+def _pin_worker(cpu_queue):
+    global _WORKER_CPUS
+    _WORKER_CPUS = cpu_queue.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, _WORKER_CPUS)
+
+
+def _run_config_worker(config: VirtualizationConfig,
+                       options: Dict) -> Tuple[Dict, List[Dict]]:
+    benchmark = IOVirtualizationBenchmark(**options)
+    benchmark.cpu_set = _WORKER_CPUS
+    metrics = benchmark.run_config(config)
+    if metrics is not None:
+        metrics['cpu_set'] = _WORKER_CPUS
+    return metrics, benchmark.tracer.events
+
+
+def run_parallel(configurations: List[VirtualizationConfig], workers: int,
+                 options: Dict = None, tracer: Tracer = NULL_TRACER,
+                 on_result=None) -> List[Dict]:
+    """Ejecuta cada configuración en un proceso propio fijado a un conjunto
+    disjunto de CPUs. Cada proceso crea su propio benchmark, por lo que
+    ``results`` y el hilo de monitorización no se comparten. ``on_result``
+    recibe ``(config, metrics)`` de cada configuración que termina bien."""
+    cpu_sets = partition_cpus(min(workers, len(configurations))
+                              if workers > 0 else len(configurations))
+    print(f"[INFO] Ejecución paralela: {len(cpu_sets)} procesos, "
+          f"CPUs {cpu_sets}")
+    ctx = multiprocessing.get_context()
+    cpu_queue = ctx.Queue()
+    for cpus in cpu_sets:
+        cpu_queue.put(cpus)
+    
+    all_metrics = []
+    with ProcessPoolExecutor(max_workers=len(cpu_sets), mp_context=ctx,
+                             initializer=_pin_worker,
+                             initargs=(cpu_queue,)) as pool:
+        futures = [(config, pool.submit(_run_config_worker, config, options or {}))
+                   for config in configurations]
+        for config, future in futures:
+            try:
+                metrics, events = future.result()
+            except Exception as e:
+                print(f"[ERROR] Fallo en {config.name}: {e}")
+                continue
+            tracer.merge(events, "worker")
+            if metrics is not None:
+                all_metrics.append(metrics)
+                if on_result is not None:
+                    on_result(config, metrics)
+    return all_metrics
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Comparación de virtualización de E/S: virtio vs emulado")
+    parser.add_argument("--real-vm", action="store_true",
+                        help="Lanzar QEMU y medir el arranque por consola serie")
+    parser.add_argument("--qemu-binary", default="qemu-system-x86_64",
+                        help="Ejecutable de QEMU (o un sustituto como fake_qemu.py)")
+    parser.add_argument("--boot-timeout", type=float, default=120.0,
+                        help="Tiempo máximo de arranque en segundos")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Simulación determinista con reloj virtual: "
+                             "termina en milisegundos")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Semilla del modo --simulate")
+    parser.add_argument("--base-image", default=None,
+                        help="Imagen base (p. ej. con SO instalado) para los overlays")
+    parser.add_argument("--image-dir", default="/tmp/vm_image_pool",
+                        help="Directorio del pool de imágenes de disco")
+    parser.add_argument("--store", default="results_store",
+                        help="Directorio del almacén de resultados incremental "
+                             "('' para desactivarlo)")
+    parser.add_argument("--cache", default="", metavar="DIRECTORIO",
+                        help="Activar la caché de resultados en DIRECTORIO (p. ej. "
+                             "results_cache): las configuraciones ya medidas con "
+                             "la misma clave no se vuelven a medir")
+    parser.add_argument("--invalidate", action="append", default=[],
+                        metavar="PATRÓN",
+                        help="Borrar de la caché las configuraciones que encajen "
+                             "con el patrón glob (o prefijo de clave) antes de "
+                             "empezar (repetible)")
+    parser.add_argument("--sample-rate", type=float, default=100.0,
+                        help="Frecuencia de muestreo del host en Hz")
+    parser.add_argument("--series-points", type=int, default=200,
+                        help="Puntos por fase de la serie de CPU del host que se "
+                             "guarda en los resultados (0 = no guardarla)")
+    parser.add_argument("--downsample", choices=DOWNSAMPLE_METHODS, default="lttb",
+                        help="Reducción de la serie: LTTB (forma) o mín/máx por "
+                             "cubo (picos)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Repetir cada configuración hasta estrechar el IC")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="Ejecuciones de calentamiento descartadas")
+    parser.add_argument("--min-runs", type=int, default=3)
+    parser.add_argument("--max-runs", type=int, default=20)
+    parser.add_argument("--target-ci", type=float, default=0.05,
+                        help="Semiancho de IC objetivo relativo a la media")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="Presupuesto de tiempo por configuración (s)")
+    parser.add_argument("--compare-baseline", default=None, metavar="RUTA",
+                        help="Resultados de referencia (results.json o directorio "
+                             "de store); sale con código 4 si hay regresiones")
+    parser.add_argument("--save-baseline", default=None, metavar="FICHERO",
+                        help="Guardar también esta ejecución como referencia")
+    parser.add_argument("--regression-method", choices=METHODS,
+                        default="mannwhitney")
+    parser.add_argument("--regression-alpha", type=float, default=0.05,
+                        help="Nivel de significación de la prueba")
+    parser.add_argument("--regression-threshold", type=float, default=0.05,
+                        help="Empeoramiento relativo mínimo para fallar (0.05 = 5%%)")
+    parser.add_argument("--metric-threshold", action="append", default=[],
+                        metavar="MÉTRICA=UMBRAL",
+                        help="Umbral propio de una métrica (repetible)")
+    parser.add_argument("--sweep", action="append", default=[],
+                        metavar="DIMENSIÓN=V1,V2",
+                        help="Barrer un parámetro de ajuste (repetible; 'all' = "
+                             f"todos los valores). Dimensiones: {', '.join(HOST_DIMENSIONS)}")
+    parser.add_argument("--pinning", choices=["off", "on", "compare"], default="off",
+                        help="Fijar vCPUs, iothreads, emulación y workers del "
+                             "benchmark a CPUs de un nodo NUMA; 'compare' mide "
+                             "cada configuración con y sin fijación")
+    parser.add_argument("--numa-node", type=int, default=None, metavar="N",
+                        help="Nodo NUMA de las CPUs y de la memoria de la VM")
+    parser.add_argument("--network-protocol", choices=PROTOCOLS, default="tcp",
+                        help="Protocolo del motor de red")
+    parser.add_argument("--network-streams", type=int, default=1, metavar="N",
+                        help="Flujos de red en paralelo")
+    parser.add_argument("--network-message-size", type=int, default=64 * 1024,
+                        metavar="BYTES", help="Tamaño de cada mensaje de red")
+    parser.add_argument("--network-zero-copy", choices=ZERO_COPY_MODES,
+                        default="memoryview",
+                        help="Modo de envío: copia, memoryview o sendfile (solo TCP)")
+    parser.add_argument("--network-target", default=None, metavar="HOST:PUERTO",
+                        help="Receptor externo de la carga de red (p. ej. el guest "
+                             "con vhost-net o vhost-user); por defecto loopback")
+    parser.add_argument("--network-guest-port", type=int, default=None, metavar="PUERTO",
+                        help="Con --real-vm y red 'user', puerto del receptor en el "
+                             "guest, reenviado desde el host por hostfwd")
+    parser.add_argument("--network-backends", default="none", metavar="B1,B2",
+                        help="Backends de red comparados además en cada "
+                             "configuración, fuera de la fase medida "
+                             f"({', '.join(NETWORK_BACKENDS)}; 'all' o 'none')")
+    parser.add_argument("--tap-ifname", default="vbtap0",
+                        help="Interfaz tap (creada de antemano) de vhost-net")
+    parser.add_argument("--vhost-user-socket", default=None, metavar="RUTA",
+                        help="Socket del backend vhost-user externo (testpmd, "
+                             "OVS-DPDK); por defecto /tmp/<config>_vhost-user.sock")
+    parser.add_argument("--rank-by", choices=["disk", "network"], default="disk",
+                        help="Throughput usado para ordenar el barrido")
+    parser.add_argument("--density", type=int, default=0, metavar="K",
+                        help="Escalado por densidad: 1..K instancias concurrentes "
+                             "de cada configuración")
+    parser.add_argument("--saturation-gain", type=float, default=SATURATION_GAIN,
+                        help="Ganancia mínima por VM añadida, relativa a una VM "
+                             "sola, antes de considerar saturado el host")
+    parser.add_argument("--disk-pattern", choices=PATTERNS, default="sequential",
+                        help="Acceso secuencial o aleatorio del motor de disco")
+    parser.add_argument("--disk-block-size", type=int, default=1024 * 1024,
+                        metavar="BYTES", help="Tamaño de bloque de cada operación")
+    parser.add_argument("--disk-queue-depth", type=int, default=1, metavar="N",
+                        help="Operaciones en vuelo por worker")
+    parser.add_argument("--disk-workers", type=int, default=1, metavar="N",
+                        help="Procesos de E/S de disco en paralelo")
+    parser.add_argument("--disk-io-mode", choices=IO_MODES, default="buffered",
+                        help="E/S con caché de páginas, O_DIRECT o mmap")
+    parser.add_argument("--disk-trace", default=None, metavar="TRAZA",
+                        help="Reproducir una traza de E/S (CSV o binaria, ver "
+                             "io_trace.py) en lugar de las pasadas sintéticas")
+    parser.add_argument("--disk-trace-pace", choices=PACES, default="fast",
+                        help="Tan rápido como sea posible o al ritmo grabado")
+    parser.add_argument("--disk-trace-cache", choices=CACHE_MODES, default="warm",
+                        help="Caché de páginas vacía (cold) o precargada (warm) "
+                             "al empezar la reproducción")
+    parser.add_argument("--disk-trace-target", default=None, metavar="RUTA",
+                        help="Fichero raw o dispositivo de bloques de trabajo para "
+                             "--disk-trace (se sobrescribe; nunca una imagen de VM). "
+                             "Por defecto, un fichero temporal del benchmark")
+    parser.add_argument("--trace", default=None, metavar="FICHERO",
+                        help="Registrar spans de cada etapa y exportarlos en "
+                             "formato Chrome trace (chrome://tracing, Perfetto)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Configuraciones en paralelo, cada una fijada a "
+                             "CPUs disjuntas (0 = una por CPU)")
+    args = parser.parse_args(argv)
+    if args.simulate and args.real_vm:
+        parser.error("--simulate y --real-vm son incompatibles")
+    if args.density < 0:
+        parser.error("--density debe ser >= 0")
+    if args.numa_node is not None and args.numa_node not in HostTopology.discover().nodes:
+        parser.error(f"--numa-node {args.numa_node}: nodo NUMA inexistente")
+    if args.series_points < 0:
+        parser.error("--series-points debe ser >= 0")
+    if args.invalidate and not args.cache:
+        parser.error("--invalidate requiere --cache")
+    try:
+        DiskIOJob(os.devnull, pattern=args.disk_pattern,
+                  block_size=args.disk_block_size, queue_depth=args.disk_queue_depth,
+                  workers=args.disk_workers, mode=args.disk_io_mode)
+    except ValueError as e:
+        parser.error(f"motor de disco: {e}")
+    try:
+        NetworkJob(protocol=args.network_protocol, streams=args.network_streams,
+                   message_size=args.network_message_size,
+                   zero_copy=args.network_zero_copy)
+        if args.network_target:
+            parse_target(args.network_target)
+    except ValueError as e:
+        parser.error(f"motor de red: {e}")
+    if args.network_guest_port is not None:
+        if not args.real_vm:
+            parser.error("--network-guest-port requiere --real-vm")
+        if not 0 < args.network_guest_port < 65536:
+            parser.error("--network-guest-port debe estar entre 1 y 65535")
+    if args.disk_trace_target:
+        if not args.disk_trace:
+            parser.error("--disk-trace-target requiere --disk-trace")
+        try:
+            check_scratch_target(args.disk_trace_target)
+        except (OSError, ValueError) as e:
+            parser.error(f"--disk-trace-target: {e}")
+    if args.compare_baseline and not args.adaptive:
+        # Sin repeticiones cada métrica tiene una sola muestra y la puerta
+        # nunca puede fallar
+        parser.error("--compare-baseline requiere --adaptive")
+    if args.network_backends in ("all", "none"):
+        args.network_backends = list(NETWORK_BACKENDS) if args.network_backends == "all" else []
+    else:
+        args.network_backends = args.network_backends.split(",")
+        invalid = [b for b in args.network_backends if b not in NETWORK_BACKENDS]
+        if invalid:
+            parser.error(f"--network-backends: backends desconocidos: {invalid}")
+    thresholds = {}
+    for item in args.metric_threshold:
+        metric, _, value = item.partition("=")
+        try:
+            thresholds[metric] = float(value)
+        except ValueError:
+            parser.error(f"--metric-threshold inválido: {item}")
+    args.metric_threshold = thresholds
+    try:
+        args.sweep = parse_sweep(args.sweep)
+    except ValueError as e:
+        parser.error(str(e))
+    guest_only = [d for d in args.sweep if d not in HOST_DIMENSIONS]
+    if guest_only:
+        # Con --simulate el ranking saldría de TUNING_MODEL, no de una medida
+        parser.error(f"--sweep {', '.join(guest_only)}: solo cambia el comando de "
+                     f"QEMU y ninguna carga se ejecuta en el guest, así que no "
+                     f"cambia lo medido; solo se barren {', '.join(HOST_DIMENSIONS)}")
+    return args
+
+
+def repetition_options(args: argparse.Namespace) -> Optional[Dict]:
+    if not args.adaptive:
+        return None
+    return {'warmup': args.warmup, 'min_runs': args.min_runs,
+            'max_runs': args.max_runs, 'target_relative_ci': args.target_ci,
+            'time_budget': args.time_budget}
+
+
+def build_configurations(args: argparse.Namespace) -> List[VirtualizationConfig]:
+    """Configuraciones de la ejecución: las de siempre, el barrido y los
+    ajustes de la línea de órdenes (fijación, motores de disco y red,
+    traza de disco)."""
+    configurations = default_configurations()
+    if args.sweep:
+        configurations = expand_matrix(configurations, args.sweep)
+        print(f"[INFO] Barrido de ajuste: {len(configurations)} configuraciones")
+    if args.pinning == "compare" and 'pinning' not in args.sweep:
+        configurations = expand_matrix(configurations, {'pinning': ['off', 'on']})
+    for config in configurations:
+        if args.pinning == "on":
+            config.pinning = "on"
+        config.numa_node = args.numa_node
+        config.disk_pattern = args.disk_pattern
+        config.disk_block_size = args.disk_block_size
+        config.disk_queue_depth = args.disk_queue_depth
+        config.disk_workers = args.disk_workers
+        config.disk_io_mode = args.disk_io_mode
+        config.network_protocol = args.network_protocol
+        config.network_streams = args.network_streams
+        config.network_message_size = args.network_message_size
+        config.network_zero_copy = args.network_zero_copy
+        config.network_target = args.network_target
+        config.network_guest_port = args.network_guest_port
+        config.network_backends = args.network_backends
+        config.network_tap = args.tap_ifname
+        if args.vhost_user_socket:
+            config.vhost_user_socket = args.vhost_user_socket
+    if args.disk_trace:
+        for config in configurations:
+            config.disk_trace = args.disk_trace
+            config.disk_trace_pace = args.disk_trace_pace
+            config.disk_trace_cache = args.disk_trace_cache
+            config.disk_trace_target = args.disk_trace_target
+    return configurations
+
+
+def main(argv: List[str] = None):
+    args = parse_args(argv)
+    repetition = repetition_options(args)
     print("""
     ╔══════════════════════════════════════════════════════════════╗
     ║  SISTEMA DE VIRTUALIZACIÓN DE E/S                            ║
@@ -291,24 +1328,131 @@ def main():
     ╚══════════════════════════════════════════════════════════════╝
     """)
     
-    benchmark = IOVirtualizationBenchmark()
+    gate = reference = None
+    if args.compare_baseline:
+        # Antes de medir: una referencia inválida no debe costar una suite
+        gate = RegressionGate(args.regression_threshold, args.regression_alpha,
+                              args.regression_method, args.metric_threshold)
+        try:
+            reference = load_reference(args.compare_baseline)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Referencia no válida: {e}")
+            return 2
+        if sample_depth(reference) < gate.min_samples:
+            print(f"[WARN] {args.compare_baseline} tiene menos de {gate.min_samples} "
+                  f"muestras por métrica: guárdela con --adaptive o la puerta "
+                  f"no podrá detectar regresiones")
+        if args.min_runs < gate.min_samples:
+            print(f"[WARN] --min-runs {args.min_runs} < {gate.min_samples}: las "
+                  f"métricas que converjan antes quedarán como POCAS MUESTRAS")
+    
+    benchmark = IOVirtualizationBenchmark(real_vm=args.real_vm,
+                                          sample_rate=args.sample_rate,
+                                          base_image=args.base_image,
+                                          image_dir=args.image_dir,
+                                          repetition=repetition,
+                                          simulate=args.simulate,
+                                          seed=args.seed,
+                                          store_dir=args.store or None,
+                                          trace=bool(args.trace),
+                                          cache_dir=args.cache or None,
+                                          series_points=args.series_points,
+                                          downsample=args.downsample)
+    tracer = benchmark.tracer
+    for pattern in args.invalidate:
+        removed = benchmark.cache.invalidate(pattern)
+        print(f"[INFO] Caché: {removed} entradas invalidadas con '{pattern}'")
     
     try:
         print("[INFO] Iniciando suite de benchmarks...")
-        print("[INFO] Este proceso tomará aproximadamente 2-3 minutos...\n")
-        metrics = benchmark.run_comparison()
-        report = benchmark.generate_report(metrics)
-        print(report)
-        benchmark.save_results(metrics)
+        if args.simulate:
+            print(f"[INFO] Modo simulación con reloj virtual (semilla {args.seed})\n")
+        else:
+            print("[INFO] Este proceso tomará aproximadamente 2-3 minutos...\n")
+        configurations = build_configurations(args)
+        density = None
+        if args.density:
+            for config in configurations:
+                config.qemu_binary = args.qemu_binary
+                config.boot_timeout = args.boot_timeout
+            with tracer.span('density', 'suite'):
+                density = DensityBenchmark(benchmark, args.density,
+                                           args.saturation_gain).run(configurations)
+            print(format_density(density))
+            metrics = []
+        else:
+            with tracer.span('run_comparison', 'suite'):
+                metrics = benchmark.run_comparison(qemu_binary=args.qemu_binary,
+                                                   boot_timeout=args.boot_timeout,
+                                                   workers=args.workers,
+                                                   configurations=configurations)
+        ranking = pinning = None
+        compare_pinning = args.pinning == "compare" or 'pinning' in args.sweep
+        with tracer.span('report', 'suite'):
+            if args.sweep and metrics:
+                ranking = rank_by_efficiency(metrics, f"{args.rank_by}_per_cpu")
+                print(format_ranking(ranking, note=measured_dimensions(
+                    list(args.sweep), args.simulate)))
+            elif compare_pinning and metrics:
+                # Un reporte virtio vs emulado por cada valor de la fijación
+                for value in ('off', 'on'):
+                    group = [m for m in metrics
+                             if (m.get('tuning') or {}).get('pinning') == value]
+                    print(f"\n[INFO] Fijación de CPU: {value}")
+                    print(benchmark.generate_report(group))
+            elif metrics:
+                print(benchmark.generate_report(metrics))
+            if compare_pinning and metrics:
+                pinning = pinning_gain(metrics)
+                print(format_pinning(pinning))
+        regression = None
+        if gate is not None:
+            # La comparación no puede impedir que se guarden los resultados;
+            # la decisión de la puerta se toma después de guardarlos
+            try:
+                with tracer.span('regression_gate', 'suite'):
+                    regression = gate.compare(reference, metrics)
+                print(format_regression_table(regression))
+            except (ValueError, ZeroDivisionError) as e:
+                print(f"[ERROR] No se pudo comparar con la referencia: {e}")
+                regression = {'error': str(e), 'regressions': None}
+        timings = None
+        if tracer.enabled:
+            timings = tracer.timing_table()
+            print(format_timings(timings))
+        benchmark.save_results(metrics, regression=regression, ranking=ranking,
+                               density=density, timings=timings, pinning=pinning)
+        if args.save_baseline:
+            benchmark.save_results(metrics, args.save_baseline)
+        if args.trace:
+            tracer.export(args.trace)
+        benchmark.end_run()
         
+        if regression and regression.get('error'):
+            return 1
+        if regression and regression['regressions']:
+            print("[ERROR] Regresión de rendimiento frente a la referencia")
+            return REGRESSION_EXIT_CODE
         print("[INFO] Proceso completado exitosamente")
         return 0
         
     except KeyboardInterrupt:
         print("\n[WARN] Proceso interrumpido por el usuario")
+        benchmark.end_run("interrupted")
+        if benchmark.store is not None:
+            print(f"[INFO] Las fases completadas están en {benchmark.store_dir}")
+        if benchmark.cache is not None:
+            print(f"[INFO] Las configuraciones terminadas están en "
+                  f"{benchmark.cache.directory}: repita el comando para reanudar")
+        return 1
+    except FileNotFoundError as e:
+        print(f"\n[ERROR] Ejecutable no encontrado: {e.filename}")
+        print("[INFO] Instale QEMU o ejecute sin --real-vm (modo simulación)")
+        benchmark.end_run("failed")
         return 1
     except Exception as e:
         print(f"\n[ERROR] Error durante ejecución: {e}")
+        benchmark.end_run("failed")
         import traceback
         traceback.print_exc()
         return 1